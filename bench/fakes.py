@@ -0,0 +1,319 @@
+# bench/fakes.py
+"""
+Lightweight offline stand-ins for the discord.py objects our hot paths touch.
+
+Member and TextChannel subclass the real discord classes (without calling their
+__init__) so the isinstance() checks in utils/checks.py and the cogs still pass.
+Every outbound call is recorded on the fake instead of going to the network.
+"""
+import asyncio
+import itertools
+from typing import Dict, List, Optional
+
+import discord
+
+_ids = itertools.count(10_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeRole:
+    def __init__(self, name: str, position: int = 1, role_id: Optional[int] = None):
+        self.id = role_id or next_id()
+        self.name = name
+        self.position = position
+        self.mention = f"<@&{self.id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeCategory:
+    def __init__(self, guild: "FakeGuild", name: str):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.channels: List["FakeTextChannel"] = []
+
+
+class FakeMessage:
+    def __init__(self, channel, author=None, content: str = "", **kwargs):
+        self.id = next_id()
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = getattr(channel, "guild", None)
+        self.embeds = [kwargs["embed"]] if kwargs.get("embed") else []
+        self.kwargs = kwargs
+
+    async def delete(self):
+        pass
+
+
+class FakeTextChannel(discord.TextChannel):
+    def __init__(self, guild: "FakeGuild", name: str, category: Optional[FakeCategory] = None, overwrites=None):
+        self._fake_id = next_id()
+        self._fake_name = name
+        self._fake_guild = guild
+        self._fake_category = category
+        self._fake_overwrites = dict(overwrites or {})
+        self.sent: List[dict] = []
+        self.send_latency = 0.0
+
+    # --- identity ---
+    @property
+    def id(self):
+        return self._fake_id
+
+    @property
+    def name(self):
+        return self._fake_name
+
+    @property
+    def guild(self):
+        return self._fake_guild
+
+    @property
+    def mention(self):
+        return f"<#{self._fake_id}>"
+
+    @property
+    def category(self):
+        return self._fake_category
+
+    @property
+    def overwrites(self):
+        return dict(self._fake_overwrites)
+
+    def overwrites_for(self, obj):
+        return self._fake_overwrites.get(obj, discord.PermissionOverwrite())
+
+    def __repr__(self):
+        return f"<FakeTextChannel id={self._fake_id} name={self._fake_name!r}>"
+
+    # --- outbound ---
+    async def send(self, content=None, **kwargs):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        self.sent.append({"content": content, **kwargs})
+        return FakeMessage(self, content=content or "", **kwargs)
+
+    async def edit(self, **kwargs):
+        if "category" in kwargs:
+            self._fake_category = kwargs["category"]
+        if "overwrites" in kwargs:
+            self._fake_overwrites = dict(kwargs["overwrites"])
+        if "name" in kwargs:
+            self._fake_name = kwargs["name"]
+        return self
+
+    async def set_permissions(self, target, *, overwrite=None, reason=None, **kwargs):
+        if overwrite is None:
+            self._fake_overwrites.pop(target, None)
+        else:
+            self._fake_overwrites[target] = overwrite
+
+    async def purge(self, *, limit=100, reason=None, **kwargs):
+        return [FakeMessage(self) for _ in range(limit)]
+
+    async def fetch_message(self, message_id: int):
+        return FakeMessage(self)
+
+    async def delete(self, *, reason=None):
+        self._fake_guild._channels.pop(self._fake_id, None)
+
+
+class FakePermissions:
+    def __init__(self, administrator: bool = False):
+        self.administrator = administrator
+
+
+class FakeMember(discord.Member):
+    def __init__(self, guild: "FakeGuild", name: str, roles: Optional[List[FakeRole]] = None, administrator: bool = False, bot: bool = False):
+        self._fake_id = next_id()
+        self._fake_name = name
+        self._fake_guild = guild
+        self._fake_roles = list(roles or [])
+        self._fake_perms = FakePermissions(administrator)
+        self._fake_bot = bot
+        self.added_roles: List[FakeRole] = []
+
+    @property
+    def id(self):
+        return self._fake_id
+
+    @property
+    def name(self):
+        return self._fake_name
+
+    @property
+    def display_name(self):
+        return self._fake_name
+
+    @property
+    def bot(self):
+        return self._fake_bot
+
+    @property
+    def guild(self):
+        return self._fake_guild
+
+    @property
+    def roles(self):
+        return list(self._fake_roles)
+
+    @property
+    def guild_permissions(self):
+        return self._fake_perms
+
+    @property
+    def mention(self):
+        return f"<@{self._fake_id}>"
+
+    def __str__(self):
+        return self._fake_name
+
+    def __repr__(self):
+        return f"<FakeMember id={self._fake_id} name={self._fake_name!r}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeMember) and other._fake_id == self._fake_id
+
+    def __hash__(self):
+        return hash(self._fake_id)
+
+    async def add_roles(self, *roles, reason=None, atomic=True):
+        self.added_roles.extend(roles)
+        self._fake_roles.extend(roles)
+
+    async def kick(self, *, reason=None):
+        pass
+
+    async def ban(self, *, reason=None, **kwargs):
+        pass
+
+    async def timeout(self, until, *, reason=None):
+        pass
+
+
+class FakeGuild:
+    def __init__(self, guild_id: Optional[int] = None, name: str = "Bench Guild", role_names=("Member", "Staff Perms Role", "Admin+ Perms")):
+        self.id = guild_id or next_id()
+        self.name = name
+        self.owner_id = 0
+        self.default_role = FakeRole("@everyone", position=0, role_id=self.id)
+        self.roles: List[FakeRole] = [self.default_role] + [FakeRole(n, position=i + 1) for i, n in enumerate(role_names)]
+        self.categories: List[FakeCategory] = []
+        self._channels: Dict[int, FakeTextChannel] = {}
+        self.me = None
+        self.system_channel = None
+
+    # --- lookups ---
+    def get_role(self, role_id: int):
+        return discord.utils.get(self.roles, id=role_id)
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    def get_member(self, member_id: int):
+        return None
+
+    @property
+    def text_channels(self):
+        return list(self._channels.values())
+
+    # --- builders ---
+    def add_text_channel(self, name: str, category: Optional[FakeCategory] = None) -> FakeTextChannel:
+        ch = FakeTextChannel(self, name, category=category)
+        self._channels[ch.id] = ch
+        return ch
+
+    def add_category(self, name: str) -> FakeCategory:
+        cat = FakeCategory(self, name)
+        self.categories.append(cat)
+        return cat
+
+    # --- REST-ish ---
+    async def create_text_channel(self, name: str, *, category=None, overwrites=None, reason=None, **kwargs):
+        ch = FakeTextChannel(self, name, category=category, overwrites=overwrites)
+        self._channels[ch.id] = ch
+        return ch
+
+    async def create_category(self, name: str, *, overwrites=None, reason=None, **kwargs):
+        return self.add_category(name)
+
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+        self.sent: List[dict] = []
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(None)  # type: ignore[arg-type]
+        self._done = True
+        self.sent.append({"content": content, **kwargs})
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        self._done = True
+
+    async def send_modal(self, modal):
+        self._done = True
+        self.sent.append({"modal": modal})
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent: List[dict] = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append({"content": content, **kwargs})
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeMember, channel: Optional[FakeTextChannel] = None, client: Optional["FakeBot"] = None):
+        self.id = next_id()
+        self.client = client if client is not None else FakeBot([user.guild])
+        self.user = user
+        self.guild = user.guild
+        self.guild_id = user.guild.id
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.extras: dict = {}
+
+
+class FakeBot:
+    """Just enough of commands.Bot for cogs that only look up channels and dispatch."""
+
+    def __init__(self, guilds: List[FakeGuild], dispatcher=None):
+        self.guilds = guilds
+        self.latency = 0.042
+        self.cogs: dict = {}
+        if dispatcher is not None:
+            self.dispatcher = dispatcher
+
+    def get_channel(self, channel_id: int):
+        for g in self.guilds:
+            ch = g.get_channel(channel_id)
+            if ch is not None:
+                return ch
+        return None
+
+    def get_guild(self, guild_id: int):
+        return discord.utils.get(self.guilds, id=guild_id)
+
+    def add_view(self, view, **kwargs):
+        pass
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
@@ -0,0 +1,396 @@
+# bench/run.py
+"""
+Offline micro-benchmarks for the bot's hot paths.
+
+    python -m bench.run                       # full run, writes bench/results.json
+    python -m bench.run --quick               # fewer iterations, skips 100k orders
+    python -m bench.run --out bench/baseline.json
+    python -m bench.run --compare bench/baseline.json
+
+No network or token is needed: Discord objects are replaced by bench/fakes.py and
+the order store is pointed at a temporary directory.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from bench.fakes import FakeBot, FakeGuild, FakeInteraction, FakeMember, FakeMessage
+from utils import settings
+from utils.dispatcher import MessageDispatcher
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT = os.path.join(HERE, "results.json")
+
+ORDER_SIZES = (10, 1_000, 100_000)
+# Iterations per order op by store size (each op re-reads the whole file today).
+ORDER_ITERS = {10: 300, 1_000: 60, 100_000: 3}
+MEMORY_ITERS = 200
+
+
+# ===== MEASUREMENT =====
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(pct / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+async def measure(name: str, op: Callable[[int], Awaitable[None]], iterations: int, memory_iterations: Optional[int] = None) -> dict:
+    """Time `iterations` calls of op(i), then re-run a shorter pass under tracemalloc for peak memory."""
+    samples: List[float] = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter_ns()
+        await op(i)
+        samples.append((time.perf_counter_ns() - t0) / 1e6)
+    elapsed = time.perf_counter() - start
+
+    mem_iters = min(iterations, memory_iterations if memory_iterations is not None else MEMORY_ITERS)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for i in range(mem_iters):
+        await op(iterations + i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples.sort()
+    result = {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(samples, 50), 4),
+        "p99_ms": round(_percentile(samples, 99), 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+    # sys.__stdout__: some cases silence stdout around measure() to hide cog prints.
+    print(f"{name:<40} {result['ops_per_sec']:>12.1f} ops/s  p50 {result['p50_ms']:>9.4f} ms  "
+          f"p99 {result['p99_ms']:>9.4f} ms  peak {result['peak_kib']:>9.1f} KiB", file=sys.__stdout__)
+    return result
+
+
+# ===== FIXTURES =====
+def _make_world():
+    guild = FakeGuild(name="Bench Guild")
+    logs = guild.add_text_channel("logs")
+    welcome = guild.add_text_channel("welcome")
+    general = guild.add_text_channel("general")
+    guild.add_category("Tickets")
+
+    # Settings for this process only; neither config.py nor data/settings.json is touched.
+    settings.install(settings.compile_settings({
+        "allowed_guilds": [guild.id],
+        "roles": {"super": "Owner", "admin": "Admin+ Perms", "staff": "Staff Perms Role"},
+        "guilds": {str(guild.id): {
+            "log_channels": {"GENERAL": logs.id, "BOT": logs.id, "WELCOME": welcome.id},
+            "roles": {"AUTO": "Member"},
+        }},
+    }, "bench"))
+
+    staff_role = discord.utils.get(guild.roles, name="Staff Perms Role")
+    staff = FakeMember(guild, "staffer", roles=[guild.default_role, staff_role])
+    user = FakeMember(guild, "customer", roles=[guild.default_role])
+    bot = FakeBot([guild], dispatcher=MessageDispatcher())
+    return bot, guild, general, staff, user
+
+
+def _extract_predicate(level: str):
+    from utils.checks import perm_level
+
+    async def _cmd(interaction):  # pragma: no cover - never invoked
+        pass
+
+    perm_level(level)(_cmd)
+    return _cmd.__discord_app_commands_checks__[-1]
+
+
+async def _drain(bot):
+    # Let dispatcher workers flush so queued sends don't leak into the next case.
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        depths = bot.dispatcher.metrics()["queued"]
+        if not any(depths.values()):
+            return
+        await asyncio.sleep(0.001)
+
+
+# ===== CASES =====
+async def bench_checks(results: dict, iters: int):
+    bot, guild, general, staff, user = _make_world()
+    for level in ("any", "staff", "admin"):
+        pred = _extract_predicate(level)
+        inter = FakeInteraction(staff if level != "admin" else user, general)
+
+        async def op(i, pred=pred, inter=inter):
+            try:
+                await pred(inter)
+            except discord.app_commands.CheckFailure:
+                pass
+
+        results[f"checks.perm_level[{level}]"] = await measure(f"checks.perm_level[{level}]", op, iters)
+
+
+async def bench_logging(results: dict, iters: int):
+    from cogs.logging_cog import LoggingCog
+
+    bot, guild, general, staff, user = _make_world()
+    cog = LoggingCog(bot)
+    msg = FakeMessage(general, author=user, content="hello " * 40)
+    edited = FakeMessage(general, author=user, content="hello " * 41)
+    leave = discord.RawMemberRemoveEvent({"guild_id": guild.id, "user": {}}, user)
+
+    cases = {
+        "logging.on_message_delete": lambda i: cog.on_message_delete(msg),
+        "logging.on_message_edit": lambda i: cog.on_message_edit(msg, edited),
+        "logging.on_member_join": lambda i: cog.on_member_join(user),
+        # Name kept for comparison with older baselines; the listener is the raw event now.
+        "logging.on_member_remove": lambda i: cog.on_raw_member_remove(leave),
+    }
+    for name, op in cases.items():
+        results[name] = await measure(name, op, iters)
+        await _drain(bot)
+
+
+async def bench_autoroles(results: dict, iters: int):
+    from cogs.autoroles import AutoRoles
+
+    bot, guild, general, staff, user = _make_world()
+    cog = AutoRoles(bot)
+
+    async def op(i):
+        member = FakeMember(guild, f"joiner{i}", roles=[guild.default_role])
+        await cog.on_member_join(member)
+
+    # on_member_join prints per join; keep that off the benchmark console.
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["autoroles.on_member_join"] = await measure("autoroles.on_member_join", op, iters)
+
+
+def _seed_orders(orders, n: int):
+    items = [
+        orders.Order(
+            id=i + 1,
+            user_id=random.randrange(1, 5_000),
+            ticket_channel_id=random.randrange(1, 10**18),
+            title=f"Commission {i + 1}: website redesign",
+            status=random.choice(("open", "in_progress", "completed", "cancelled")),
+            budget="$50 – $200",
+            deadline="Nov 30",
+            notes="Please match the existing brand colours. " * 3,
+        ).to_dict()
+        for i in range(n)
+    ]
+    orders._safe_save(items)
+
+
+async def bench_orders(results: dict, sizes, iters_scale: float):
+    from cogs import orders
+
+    for size in sizes:
+        _seed_orders(orders, size)
+        iters = max(1, int(ORDER_ITERS[size] * iters_scale))
+        mem_iters = max(1, iters // 3)
+
+        async def op_get(i, size=size):
+            orders.get_order(random.randint(1, size))
+
+        async def op_save(i, size=size):
+            o = orders.get_order(random.randint(1, size))
+            o.notes = f"touched {i}"
+            orders.save_order(o)
+
+        async def op_list(i):
+            orders.list_orders()
+
+        async def op_create(i):
+            orders.create_order_from_ticket(1, 2, f"Bench order {i}", "$10", "Dec 1", "notes")
+
+        async def op_search(i, size=size):
+            orders.search_orders(f"commission {random.randint(1, size)} webs", status="open")
+
+        ops = (("get", op_get), ("save", op_save), ("list", op_list), ("create", op_create), ("search", op_search))
+        for op_name, op in ops:
+            name = f"orders.{op_name}@{size}"
+            results[name] = await measure(name, op, iters, memory_iterations=mem_iters)
+
+
+async def bench_tickets(results: dict, iters: int):
+    from cogs import orders, tickets
+
+    bot, guild, general, staff, user = _make_world()
+    # Commission tickets also create an order; measure against a 1k store, not whatever orders left behind.
+    _seed_orders(orders, 1_000)
+
+    async def op_support(i):
+        await tickets.create_ticket_from_modal(
+            FakeInteraction(user, general, client=bot), kind="Support",
+            fields={"Topic": "Login broken", "Details": "It says 403 when I log in."},
+        )
+
+    async def op_commission(i):
+        await tickets.create_ticket_from_modal(
+            FakeInteraction(user, general, client=bot), kind="Commission",
+            fields={"Title": "Website", "Budget": "$100", "Deadline": "Nov 30", "Notes": "Thanks!"},
+            commission=True,
+        )
+
+    results["tickets.create[support]"] = await measure("tickets.create[support]", op_support, iters)
+    results["tickets.create[commission]"] = await measure("tickets.create[commission]", op_commission, max(1, iters // 5))
+
+
+def _loop_batch(loop_factory, n_tasks: int) -> None:
+    """Run n_tasks trivial tasks to completion on a fresh loop (in a worker thread)."""
+    async def tick():
+        await asyncio.sleep(0)
+
+    async def batch():
+        await asyncio.gather(*(tick() for _ in range(n_tasks)))
+
+    loop = loop_factory()
+    try:
+        loop.run_until_complete(batch())
+    finally:
+        loop.close()
+
+
+async def bench_runtime(results: dict, iters: int):
+    """Loop throughput (asyncio vs uvloop) and store write cost (indent json vs compact json vs orjson)."""
+    loops = {"asyncio": asyncio.new_event_loop}
+    try:
+        import uvloop
+        loops["uvloop"] = uvloop.new_event_loop
+    except ImportError:
+        print("uvloop not installed; skipping runtime.loop[uvloop]", file=sys.__stdout__)
+
+    for name, factory in loops.items():
+        async def op(i, factory=factory):
+            await asyncio.to_thread(_loop_batch, factory, 10_000)
+
+        results[f"runtime.loop[{name}] x10k tasks"] = await measure(
+            f"runtime.loop[{name}] x10k tasks", op, max(3, iters // 100), memory_iterations=1
+        )
+
+    encoders = {
+        "json-indent": lambda items: json.dumps(items, indent=2, ensure_ascii=False).encode("utf-8"),
+        "json-compact": lambda items: json.dumps(items, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+    }
+    try:
+        import orjson
+        encoders["orjson"] = lambda items: orjson.dumps(items)
+    except ImportError:
+        print("orjson not installed; skipping store.write[orjson]", file=sys.__stdout__)
+
+    from cogs import orders
+    tmp = tempfile.mkdtemp(prefix="hububba-bench-write-")
+    try:
+        for size in (1_000, 100_000):
+            _seed_orders(orders, size)
+            items = orders._safe_load()
+            path = os.path.join(tmp, "orders.json")
+            for enc_name, enc in encoders.items():
+                async def op(i, enc=enc):
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(enc(items))
+                    os.replace(path + ".tmp", path)
+
+                n = max(3, int(ORDER_ITERS[size] * (iters / 2_000)))
+                results[f"store.write[{enc_name}]@{size}"] = await measure(
+                    f"store.write[{enc_name}]@{size}", op, n, memory_iterations=1
+                )
+            print(f"{'store.file_size@' + str(size):<40} indent {len(encoders['json-indent'](items)) / 1024:>10.1f} KiB  "
+                  f"compact {len(encoders['json-compact'](items)) / 1024:>10.1f} KiB", file=sys.__stdout__)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ===== COMPARISON =====
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    print(f"\nCompared with {baseline_path}:")
+    print(f"{'case':<40} {'ops/s Δ':>10} {'p99 Δ':>10} {'peak Δ':>10}")
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<40} {'(new)':>10}")
+            continue
+
+        def pct(a, b):
+            return f"{(a - b) / b * 100:+.1f}%" if b else "n/a"
+
+        print(f"{name:<40} {pct(cur['ops_per_sec'], base['ops_per_sec']):>10} "
+              f"{pct(cur['p99_ms'], base['p99_ms']):>10} {pct(cur['peak_kib'], base['peak_kib']):>10}")
+
+
+# ===== ENTRY =====
+async def run(args) -> dict:
+    from cogs import orders
+
+    scale = 0.2 if args.quick else 1.0
+    iters = max(10, int(2_000 * scale))
+    sizes = ORDER_SIZES[:-1] if args.quick else ORDER_SIZES
+
+    tmp = tempfile.mkdtemp(prefix="hububba-bench-")
+    orders.DATA_DIR = tmp
+    orders.ORDERS_PATH = os.path.join(tmp, "orders.json")
+    random.seed(1234)
+
+    results: Dict[str, dict] = {}
+    only = set(args.only or ())
+    try:
+        if not only or "checks" in only:
+            await bench_checks(results, iters)
+        if not only or "logging" in only:
+            await bench_logging(results, iters)
+        if not only or "autoroles" in only:
+            await bench_autoroles(results, iters)
+        if not only or "orders" in only:
+            await bench_orders(results, sizes, scale)
+        if not only or "tickets" in only:
+            await bench_tickets(results, max(10, iters // 10))
+        if not only or "runtime" in only:
+            await bench_runtime(results, iters)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline hot-path benchmarks")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="where to write the JSON report")
+    parser.add_argument("--compare", help="baseline JSON to diff against")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations; skip the 100k order store")
+    parser.add_argument("--only", nargs="*", choices=("checks", "logging", "autoroles", "orders", "tickets", "runtime"))
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "discord_py": discord.__version__,
+        "quick": bool(args.quick),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
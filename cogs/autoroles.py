@@ -1,6 +1,6 @@
 import discord
 from discord.ext import commands
-import config
+from utils import settings
 
 
 class AutoRoles(commands.Cog):
@@ -15,19 +15,19 @@ class AutoRoles(commands.Cog):
         guild_id = member.guild.id
 
         # Get guild-specific role config
-        guild_roles = config.ROLE_MAP.get(guild_id)
-        if not guild_roles:
+        auto = settings.current().role(guild_id, "AUTO")
+        if auto is None:
             return  # no config for this guild
 
         role_to_assign = None
 
         # Hububba’s Coding World uses role name
-        if "AUTO" in guild_roles and isinstance(guild_roles["AUTO"], str):
-            role_to_assign = discord.utils.get(member.guild.roles, name=guild_roles["AUTO"])
+        if isinstance(auto, str):
+            role_to_assign = discord.utils.get(member.guild.roles, name=auto)
 
         # Project Infinite uses role ID
-        elif "AUTO" in guild_roles and isinstance(guild_roles["AUTO"], int):
-            role_to_assign = member.guild.get_role(guild_roles["AUTO"])
+        else:
+            role_to_assign = member.guild.get_role(auto)
 
         if role_to_assign:
             try:
@@ -50,15 +50,15 @@ class AutoRoles(commands.Cog):
         member = member or ctx.author
         guild_id = ctx.guild.id
 
-        guild_roles = config.ROLE_MAP.get(guild_id)
-        if not guild_roles:
+        auto = settings.current().role(guild_id, "AUTO")
+        if auto is None:
             return await ctx.send("⚠️ No autorole configured for this server.")
 
         role_to_assign = None
-        if isinstance(guild_roles["AUTO"], str):
-            role_to_assign = discord.utils.get(ctx.guild.roles, name=guild_roles["AUTO"])
+        if isinstance(auto, str):
+            role_to_assign = discord.utils.get(ctx.guild.roles, name=auto)
         else:
-            role_to_assign = ctx.guild.get_role(guild_roles["AUTO"])
+            role_to_assign = ctx.guild.get_role(auto)
 
         if not role_to_assign:
             return await ctx.send("⚠️ Could not find the autorole in this server.")
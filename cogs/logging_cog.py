@@ -1,46 +1,134 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
+import time
 import traceback
-import config
+from utils import audit, errors, settings
+from utils.checks import in_allowed_guilds, perm_level
+from utils.dispatcher import dispatch, AUDIT
+
+AUDIT_KINDS = (
+    "message_delete", "message_edit", "member_join", "member_leave", "command", "command_error",
+    "kick", "ban", "timeout", "untimeout", "purge", "lock", "unlock",
+)
+AUDIT_PAGE_SIZE = 10
+
+
+def _format_event(e: dict) -> str:
+    who = []
+    if e["actor_id"]:
+        who.append(f"by <@{e['actor_id']}>")
+    if e["target_id"]:
+        who.append(f"→ <@{e['target_id']}>")
+    if e["channel_id"]:
+        who.append(f"in <#{e['channel_id']}>")
+    line = f"`#{e['id']}` <t:{int(e['ts'])}:f> **{e['kind']}** {' '.join(who)}"
+    if e["content"]:
+        snippet = discord.utils.escape_markdown(e["content"].replace("\n", " "))[:120]
+        line += f"\n> {snippet}"
+    return line
+
+
+class AuditPager(discord.ui.View):
+    """Older/Newer buttons over an /auditsearch result (keyset paging on event id)."""
+
+    def __init__(self, archive, owner_id: int, filters: dict, rows: list):
+        super().__init__(timeout=300)
+        self.archive = archive
+        self.owner_id = owner_id
+        self.filters = filters
+        self.rows = rows
+        self.page = 1
+        self._sync_buttons(has_older=len(rows) == AUDIT_PAGE_SIZE)
+
+    def render(self) -> str:
+        if not self.rows:
+            return "No audit events match."
+        body = "\n".join(_format_event(e) for e in self.rows)
+        return f"**Audit search** · page {self.page}\n{body}"[:2000]
+
+    def _sync_buttons(self, has_older: bool):
+        self.newer.disabled = self.page <= 1
+        self.older.disabled = not has_older
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def _show(self, interaction: discord.Interaction, rows: list, page: int, has_older: bool):
+        if rows:
+            self.rows, self.page = rows, page
+        self._sync_buttons(has_older)
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows = await self.archive.search(**self.filters, after_id=self.rows[0]["id"], limit=AUDIT_PAGE_SIZE)
+        await self._show(interaction, rows, max(1, self.page - 1), has_older=True)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows = await self.archive.search(**self.filters, before_id=self.rows[-1]["id"], limit=AUDIT_PAGE_SIZE)
+        await self._show(interaction, rows, self.page + 1, has_older=len(rows) == AUDIT_PAGE_SIZE)
 
 
 class LoggingCog(commands.Cog):
+    # One worker: log entries must reach the channels in the order the events happened.
+    event_workers = 1
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        tracker = getattr(bot, "errors", None)
+        if tracker is not None:
+            tracker.set_reporter(self._post_error_report)
+
+    def cog_unload(self):
+        tracker = getattr(self.bot, "errors", None)
+        if tracker is not None:
+            tracker.set_reporter(None)
+
+    def _post_error_report(self, report: errors.ErrorReport):
+        """Fingerprinted error (first occurrence or windowed ×N summary) → BOT log channel."""
+        guild_id = report.stat.guild_id
+        chan = self.get_channel(guild_id, "BOT") if guild_id else None
+        if chan:
+            dispatch(self.bot, chan, report.render()[:2000], priority=AUDIT)
 
     def get_channel(self, guild_id: int, key: str) -> discord.TextChannel | None:
-        guild_config = config.LOG_CHANNELS.get(guild_id)
-        if not guild_config:
-            return None
-        chan_id = guild_config.get(key)
-        return self.bot.get_channel(chan_id)
+        chan_id = settings.current().log_channel(guild_id, key)
+        return self.bot.get_channel(chan_id) if chan_id else None
 
     # 🗑️ Message deletion
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         if not message.guild or message.author.bot:
             return
+        audit.record(self.bot, message.guild.id, "message_delete", target_id=message.author.id,
+                     channel_id=message.channel.id, content=message.content)
         chan = self.get_channel(message.guild.id, "GENERAL")
         if not chan:
             return
         author = f"{message.author} ({message.author.id})"
         content = message.content[:1500] if message.content else "*no content*"
-        await chan.send(f"🗑️ **Message Deleted** in {message.channel.mention} by {author}\n>>> {content}")
+        dispatch(self.bot, chan, f"🗑️ **Message Deleted** in {message.channel.mention} by {author}\n>>> {content}", priority=AUDIT)
 
     # ✏️ Message edit
     @commands.Cog.listener()
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
         if not before.guild or before.author.bot or before.content == after.content:
             return
+        audit.record(self.bot, before.guild.id, "message_edit", target_id=before.author.id,
+                     channel_id=before.channel.id, content=f"{before.content}\n→ {after.content}")
         chan = self.get_channel(before.guild.id, "GENERAL")
         if not chan:
             return
         author = f"{before.author} ({before.author.id})"
         b = before.content[:800] if before.content else "*no content*"
         a = after.content[:800] if after.content else "*no content*"
-        await chan.send(
+        dispatch(
+            self.bot, chan,
             f"✏️ **Message Edited** in {before.channel.mention} by {author}\n"
-            f"**Before:**\n>>> {b}\n**After:**\n>>> {a}"
+            f"**Before:**\n>>> {b}\n**After:**\n>>> {a}",
+            priority=AUDIT,
         )
 
     # ✅ Slash command usage
@@ -48,40 +136,85 @@ class LoggingCog(commands.Cog):
     async def on_app_command_completion(self, interaction: discord.Interaction, command: discord.app_commands.Command):
         if not interaction.guild:
             return
+        audit.record(self.bot, interaction.guild.id, "command", actor_id=interaction.user.id,
+                     channel_id=interaction.channel_id, content=f"/{command.qualified_name}")
         chan = self.get_channel(interaction.guild.id, "BOT")
         if not chan:
             return
         user = interaction.user
         where = interaction.channel.mention if interaction.channel else "DM"
-        await chan.send(f"✅ **Command**: `/{command.name}` by {user.mention} in {where}")
+        dispatch(self.bot, chan, f"✅ **Command**: `/{command.name}` by {user.mention} in {where}", priority=AUDIT)
 
     # ❌ Command error fallback
     @commands.Cog.listener()
     async def on_command_error(self, ctx: commands.Context, error: Exception):
         if not ctx.guild:
             return
-        chan = self.get_channel(ctx.guild.id, "BOT")
-        if not chan:
-            return
         tb = "".join(traceback.format_exception(type(error), error, error.__traceback__))
-        await chan.send(f"❌ **Command Error** in {ctx.channel.mention if ctx.channel else 'DM'}: ```py\n{tb[:1900]}\n```")
+        audit.record(self.bot, ctx.guild.id, "command_error", actor_id=ctx.author.id,
+                     channel_id=ctx.channel.id if ctx.channel else None, content=tb[-4000:])
+        # Posted to the BOT channel by _post_error_report, once per fingerprint per window.
+        errors.capture(self.bot, error, where=f"!{ctx.command.qualified_name if ctx.command else '?'}", guild_id=ctx.guild.id)
 
     # 👋 Member join
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
+        audit.record(self.bot, member.guild.id, "member_join", target_id=member.id, content=str(member))
         gl = self.get_channel(member.guild.id, "GENERAL")
         if gl:
-            await gl.send(f"➕ **Member Joined**: {member.mention} (`{member}` | `{member.id}`)")
+            dispatch(self.bot, gl, f"➕ **Member Joined**: {member.mention} (`{member}` | `{member.id}`)", priority=AUDIT)
         wc = self.get_channel(member.guild.id, "WELCOME")
         if wc:
-            await wc.send(f"👋 Welcome to the server, {member.mention}! Glad to have you here.")
+            dispatch(self.bot, wc, f"👋 Welcome to the server, {member.mention}! Glad to have you here.", priority=AUDIT)
 
-    # 👋 Member leave
+    # 👋 Member leave (raw: member_remove only fires for cached members, and the lean cache holds few)
     @commands.Cog.listener()
-    async def on_member_remove(self, member: discord.Member):
-        gl = self.get_channel(member.guild.id, "GENERAL")
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        user = payload.user
+        audit.record(self.bot, payload.guild_id, "member_leave", target_id=user.id, content=str(user))
+        gl = self.get_channel(payload.guild_id, "GENERAL")
         if gl:
-            await gl.send(f"➖ **Member Left**: `{member}` (`{member.id}`)")
+            dispatch(self.bot, gl, f"➖ **Member Left**: `{user}` (`{user.id}`)", priority=AUDIT)
+
+    # 🔎 Audit archive search
+    @app_commands.command(name="auditsearch", description="Search the local audit archive.")
+    @app_commands.describe(
+        kind="Event type",
+        user="Member involved (as actor or target)",
+        channel="Channel the event happened in",
+        days="Only the last N days",
+        text="Text contained in the event (message content, reason, ...)"
+    )
+    @app_commands.choices(kind=[app_commands.Choice(name=k, value=k) for k in AUDIT_KINDS])
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def auditsearch(
+        self,
+        interaction: discord.Interaction,
+        kind: app_commands.Choice[str] | None = None,
+        user: discord.User | None = None,
+        channel: discord.TextChannel | None = None,
+        days: app_commands.Range[int, 1, 3650] | None = None,
+        text: str | None = None,
+    ):
+        archive = getattr(self.bot, "audit", None)
+        if archive is None:
+            await interaction.response.send_message("The audit archive is not enabled.", ephemeral=True)
+            return
+        filters = {
+            "guild_id": interaction.guild_id,
+            "kind": kind.value if kind else None,
+            "user_id": user.id if user else None,
+            "channel_id": channel.id if channel else None,
+            "since": time.time() - days * 86400 if days else None,
+            "text": text,
+        }
+        rows = await archive.search(**filters, limit=AUDIT_PAGE_SIZE)
+        view = AuditPager(archive, interaction.user.id, filters, rows)
+        await interaction.response.send_message(
+            view.render(), view=view if rows else discord.utils.MISSING, ephemeral=True,
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
 
 
 async def setup(bot: commands.Bot):
@@ -1,26 +1,105 @@
+import asyncio
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import timedelta
+from typing import Optional
 
-import config
+from utils import audit, errors, settings
 from utils.checks import in_allowed_guilds, perm_level
+from utils.dispatcher import dispatch, MODERATION
+from utils.lockdown import LockdownManager
+from utils.perf import timed_defer
+
+
+# Actions that open a numbered case (purges don't target anyone).
+CASE_ACTIONS = {"kick", "ban", "tempban", "unban", "timeout", "untimeout", "lock", "unlock",
+                "lockdown", "lockdown_end"}
+MODLOG_PAGE_SIZE = 10
+
+
+def _format_case(c: dict) -> str:
+    line = f"**#{c['case_no']}** · `{c['action']}` · <t:{int(c['created_at'])}:d>"
+    if c["moderator_id"]:
+        line += f" by <@{c['moderator_id']}>"
+    if c["channel_id"]:
+        line += f" in <#{c['channel_id']}>"
+    if c["duration"]:
+        line += f" · {c['duration']}"
+    if c["reason"]:
+        line += f" — {discord.utils.escape_markdown(c['reason'][:150])}"
+    if c["updated_at"]:
+        line += " *(edited)*"
+    return line
+
+
+class ModlogPager(discord.ui.View):
+    """Older/Newer buttons over a /modlog result (keyset paging on case number)."""
+
+    def __init__(self, store, owner_id: int, guild_id: int, user: discord.abc.User, total: int, rows: list):
+        super().__init__(timeout=300)
+        self.store = store
+        self.owner_id = owner_id
+        self.guild_id = guild_id
+        self.user = user
+        self.total = total
+        self.rows = rows
+        self.page = 1
+        self._sync_buttons(has_older=len(rows) == MODLOG_PAGE_SIZE)
+
+    def render(self) -> str:
+        if not self.rows:
+            return f"No cases for {self.user.mention}."
+        pages = max(1, -(-self.total // MODLOG_PAGE_SIZE))
+        body = "\n".join(_format_case(c) for c in self.rows)
+        return f"**Mod log for {self.user}** · {self.total} case(s) · page {self.page}/{pages}\n{body}"[:2000]
+
+    def _sync_buttons(self, has_older: bool):
+        self.newer.disabled = self.page <= 1
+        self.older.disabled = not has_older
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def _show(self, interaction: discord.Interaction, rows: list, page: int, has_older: bool):
+        if rows:
+            self.rows, self.page = rows, page
+        self._sync_buttons(has_older)
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows = await self.store.history(self.guild_id, self.user.id, after_case=self.rows[0]["case_no"], limit=MODLOG_PAGE_SIZE)
+        await self._show(interaction, rows, max(1, self.page - 1), has_older=True)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rows = await self.store.history(self.guild_id, self.user.id, before_case=self.rows[-1]["case_no"], limit=MODLOG_PAGE_SIZE)
+        await self._show(interaction, rows, self.page + 1, has_older=len(rows) == MODLOG_PAGE_SIZE)
 
 
 class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.scheduler = getattr(bot, "scheduler", None)
+        if self.scheduler is not None:
+            self.scheduler.register("unban", self._expire_tempban)
+            self.scheduler.register("unlock", self._expire_lock)
+            self.scheduler.register("lockdown_end", self._expire_lockdown)
+        self.lockdown = LockdownManager()
 
     # STAFF: Kick
     @app_commands.command(name="kick", description="Kick a user with optional reason.")
     @in_allowed_guilds()
     @perm_level("staff")
     async def kick(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
-        await interaction.response.defer(ephemeral=True)
+        await timed_defer(interaction, ephemeral=True)
         try:
             await member.kick(reason=reason)
             await interaction.followup.send(f"👢 Kicked {member} — {reason}", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"👢 **Kick**: {member.mention} by {interaction.user.mention}\nReason: {reason}")
+            await self._log_general(interaction.guild.id, f"👢 **Kick**: {member.mention} by {interaction.user.mention}\nReason: {reason}",
+                                    kind="kick", actor=interaction.user, target_id=member.id, detail=reason, reason=reason)
         except Exception as e:
             await interaction.followup.send(f"Kick failed: {e}", ephemeral=True)
 
@@ -29,7 +108,7 @@ class Moderation(commands.Cog):
     @in_allowed_guilds()
     @perm_level("staff")
     async def purge(self, interaction: discord.Interaction, amount: app_commands.Range[int, 1, 1000]):
-        await interaction.response.defer(ephemeral=True)
+        await timed_defer(interaction, ephemeral=True)
         try:
             chan = interaction.channel
             if not isinstance(chan, discord.TextChannel):
@@ -37,7 +116,8 @@ class Moderation(commands.Cog):
                 return
             deleted = await chan.purge(limit=amount, reason=f"Purged by {interaction.user}")
             await interaction.followup.send(f"🧹 Deleted {len(deleted)} messages.", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"🧹 **Purge**: {interaction.user.mention} deleted {len(deleted)} in {chan.mention}")
+            await self._log_general(interaction.guild.id, f"🧹 **Purge**: {interaction.user.mention} deleted {len(deleted)} in {chan.mention}",
+                                    kind="purge", actor=interaction.user, channel_id=chan.id, detail=f"{len(deleted)} messages")
         except Exception as e:
             await interaction.followup.send(f"Purge failed: {e}", ephemeral=True)
 
@@ -46,12 +126,14 @@ class Moderation(commands.Cog):
     @in_allowed_guilds()
     @perm_level("staff")
     async def timeout(self, interaction: discord.Interaction, member: discord.Member, minutes: app_commands.Range[int, 1, 10080], reason: str = "No reason provided"):
-        await interaction.response.defer(ephemeral=True)
+        await timed_defer(interaction, ephemeral=True)
         try:
             dur = timedelta(minutes=minutes)
             await member.timeout(dur, reason=reason)
             await interaction.followup.send(f"⏳ Timed out {member} for {minutes} minutes — {reason}", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"⏳ **Timeout**: {member.mention} for {minutes}m by {interaction.user.mention}\nReason: {reason}")
+            await self._log_general(interaction.guild.id, f"⏳ **Timeout**: {member.mention} for {minutes}m by {interaction.user.mention}\nReason: {reason}",
+                                    kind="timeout", actor=interaction.user, target_id=member.id, detail=f"{minutes}m — {reason}",
+                                    reason=reason, duration=f"{minutes}m")
         except Exception as e:
             await interaction.followup.send(f"Timeout failed: {e}", ephemeral=True)
 
@@ -60,20 +142,23 @@ class Moderation(commands.Cog):
     @in_allowed_guilds()
     @perm_level("staff")
     async def untimeout(self, interaction: discord.Interaction, member: discord.Member):
-        await interaction.response.defer(ephemeral=True)
+        await timed_defer(interaction, ephemeral=True)
         try:
             await member.timeout(None)
             await interaction.followup.send(f"✅ Removed timeout for {member}", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"✅ **Un-timeout**: {member.mention} by {interaction.user.mention}")
+            await self._log_general(interaction.guild.id, f"✅ **Un-timeout**: {member.mention} by {interaction.user.mention}",
+                                    kind="untimeout", actor=interaction.user, target_id=member.id)
         except Exception as e:
             await interaction.followup.send(f"Untimeout failed: {e}", ephemeral=True)
 
     # ADMIN: Lock
     @app_commands.command(name="lock", description="Lock the current channel (deny @everyone sending).")
+    @app_commands.describe(minutes="Unlock automatically after this many minutes (default: stay locked)")
     @in_allowed_guilds()
     @perm_level("admin")
-    async def lock(self, interaction: discord.Interaction, reason: str = "Channel locked"):
-        await interaction.response.defer(ephemeral=True)
+    async def lock(self, interaction: discord.Interaction, reason: str = "Channel locked",
+                   minutes: Optional[app_commands.Range[int, 1, 10080]] = None):
+        await timed_defer(interaction, ephemeral=True)
         chan = interaction.channel
         if not isinstance(chan, discord.TextChannel):
             await interaction.followup.send("This command must be used in a text channel.", ephemeral=True)
@@ -83,8 +168,19 @@ class Moderation(commands.Cog):
             overwrites = chan.overwrites_for(everyone)
             overwrites.send_messages = False
             await chan.set_permissions(everyone, overwrite=overwrites, reason=reason)
-            await interaction.followup.send(f"🔒 Locked {chan.mention}.", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"🔒 **Lock**: {chan.mention} by {interaction.user.mention}\nReason: {reason}")
+            until = ""
+            if minutes and self.scheduler is not None:
+                due = time.time() + minutes * 60
+                self.scheduler.schedule("unlock", due, {"guild_id": interaction.guild.id, "channel_id": chan.id},
+                                        key=f"unlock:{chan.id}")
+                until = f" until <t:{int(due)}:t>"
+            elif self.scheduler is not None:
+                self.scheduler.cancel_key(f"unlock:{chan.id}")  # an open-ended lock replaces a timed one
+            await interaction.followup.send(f"🔒 Locked {chan.mention}{until}.", ephemeral=True)
+            await self._log_general(interaction.guild.id, f"🔒 **Lock**: {chan.mention} by {interaction.user.mention}{until}\nReason: {reason}",
+                                    kind="lock", actor=interaction.user, channel_id=chan.id,
+                                    detail=f"{minutes}m — {reason}" if minutes else reason,
+                                    reason=reason, duration=f"{minutes}m" if minutes else None)
         except Exception as e:
             await interaction.followup.send(f"Lock failed: {e}", ephemeral=True)
 
@@ -93,7 +189,7 @@ class Moderation(commands.Cog):
     @in_allowed_guilds()
     @perm_level("admin")
     async def unlock(self, interaction: discord.Interaction, reason: str = "Channel unlocked"):
-        await interaction.response.defer(ephemeral=True)
+        await timed_defer(interaction, ephemeral=True)
         chan = interaction.channel
         if not isinstance(chan, discord.TextChannel):
             await interaction.followup.send("This command must be used in a text channel.", ephemeral=True)
@@ -103,35 +199,218 @@ class Moderation(commands.Cog):
             overwrites = chan.overwrites_for(everyone)
             overwrites.send_messages = None
             await chan.set_permissions(everyone, overwrite=overwrites, reason=reason)
+            if self.scheduler is not None:
+                self.scheduler.cancel_key(f"unlock:{chan.id}")
             await interaction.followup.send(f"🔓 Unlocked {chan.mention}.", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"🔓 **Unlock**: {chan.mention} by {interaction.user.mention}\nReason: {reason}")
+            await self._log_general(interaction.guild.id, f"🔓 **Unlock**: {chan.mention} by {interaction.user.mention}\nReason: {reason}",
+                                    kind="unlock", actor=interaction.user, channel_id=chan.id, detail=reason, reason=reason)
         except Exception as e:
             await interaction.followup.send(f"Unlock failed: {e}", ephemeral=True)
 
+    # ADMIN: Lockdown
+    @app_commands.command(name="lockdown", description="Lock every text channel (deny @everyone sending) until /lockdown_end.")
+    @app_commands.describe(minutes="End the lockdown automatically after this many minutes (default: until /lockdown_end)")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def lockdown_start(self, interaction: discord.Interaction, reason: str = "Server lockdown",
+                             minutes: Optional[app_commands.Range[int, 1, 10080]] = None):
+        await timed_defer(interaction, ephemeral=True)
+        guild = interaction.guild
+        try:
+            locked, skipped, failures = await self.lockdown.start(guild, by=interaction.user.id, reason=reason)
+        except RuntimeError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        until = ""
+        if minutes and self.scheduler is not None:
+            due = time.time() + minutes * 60
+            self.scheduler.schedule("lockdown_end", due, {"guild_id": guild.id}, key=f"lockdown:{guild.id}")
+            until = f" until <t:{int(due)}:t>"
+        summary = f"🚨 Locked **{locked}** channel(s){until}" + (f" · {skipped} were already locked" if skipped else "")
+        await interaction.followup.send(self._with_failures(summary, failures), ephemeral=True)
+        await self._log_general(guild.id, f"🚨 **Lockdown**: {locked} channel(s) by {interaction.user.mention}{until}\nReason: {reason}",
+                                kind="lockdown", actor=interaction.user, detail=f"{locked} channels — {reason}",
+                                reason=reason, duration=f"{minutes}m" if minutes else None)
+
+    # ADMIN: End lockdown
+    @app_commands.command(name="lockdown_end", description="End the lockdown and restore every channel's previous permissions.")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def lockdown_end(self, interaction: discord.Interaction, reason: str = "Lockdown lifted"):
+        await timed_defer(interaction, ephemeral=True)
+        try:
+            restored, gone, failures = await self.lockdown.end(interaction.guild, reason=reason)
+        except RuntimeError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        if self.scheduler is not None and not failures:
+            self.scheduler.cancel_key(f"lockdown:{interaction.guild.id}")
+        summary = f"✅ Restored **{restored}** channel(s)" + (f" · {gone} no longer exist" if gone else "")
+        if failures:
+            summary += "\nRun /lockdown_end again to retry the rest."
+        await interaction.followup.send(self._with_failures(summary, failures), ephemeral=True)
+        await self._log_general(interaction.guild.id, f"✅ **Lockdown ended**: {restored} channel(s) restored by {interaction.user.mention}\nReason: {reason}",
+                                kind="lockdown_end", actor=interaction.user, detail=f"{restored} channels — {reason}", reason=reason)
+
+    @staticmethod
+    def _with_failures(summary: str, failures: list) -> str:
+        if not failures:
+            return summary
+        lines = [summary, f"⚠️ {len(failures)} channel(s) failed:"] + [f"• {f}" for f in failures[:10]]
+        if len(failures) > 10:
+            lines.append(f"…and {len(failures) - 10} more")
+        return "\n".join(lines)[:2000]
+
     # ADMIN: Ban
     @app_commands.command(name="ban", description="Ban a user with optional reason.")
     @in_allowed_guilds()
     @perm_level("admin")
     async def ban(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
-        await interaction.response.defer(ephemeral=True)
+        await timed_defer(interaction, ephemeral=True)
         try:
             await member.ban(reason=reason, delete_message_days=0)
+            if self.scheduler is not None:
+                self.scheduler.cancel_key(f"unban:{interaction.guild.id}:{member.id}")  # now permanent
             await interaction.followup.send(f"🔨 Banned {member} — {reason}", ephemeral=True)
-            await self._log_general(interaction.guild.id, f"🔨 **Ban**: {member.mention} by {interaction.user.mention}\nReason: {reason}")
+            await self._log_general(interaction.guild.id, f"🔨 **Ban**: {member.mention} by {interaction.user.mention}\nReason: {reason}",
+                                    kind="ban", actor=interaction.user, target_id=member.id, detail=reason, reason=reason)
         except Exception as e:
             await interaction.followup.send(f"Ban failed: {e}", ephemeral=True)
 
+    # ADMIN: Temporary ban
+    @app_commands.command(name="tempban", description="Ban a user for N hours (1-8760), then unban automatically.")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def tempban(self, interaction: discord.Interaction, member: discord.Member, hours: app_commands.Range[int, 1, 8760], reason: str = "No reason provided"):
+        await timed_defer(interaction, ephemeral=True)
+        if self.scheduler is None:
+            await interaction.followup.send("Scheduling is not enabled; use /ban instead.", ephemeral=True)
+            return
+        try:
+            await member.ban(reason=f"{reason} (temporary, {hours}h)", delete_message_days=0)
+            due = time.time() + hours * 3600
+            self.scheduler.schedule("unban", due, {"guild_id": interaction.guild.id, "user_id": member.id, "reason": reason},
+                                    key=f"unban:{interaction.guild.id}:{member.id}")
+            await interaction.followup.send(f"🔨 Banned {member} until <t:{int(due)}:f> — {reason}", ephemeral=True)
+            await self._log_general(interaction.guild.id, f"🔨 **Tempban**: {member.mention} for {hours}h by {interaction.user.mention} (until <t:{int(due)}:f>)\nReason: {reason}",
+                                    kind="tempban", actor=interaction.user, target_id=member.id, detail=f"{hours}h — {reason}",
+                                    reason=reason, duration=f"{hours}h")
+        except Exception as e:
+            await interaction.followup.send(f"Tempban failed: {e}", ephemeral=True)
+
+    # STAFF: Case history
+    @app_commands.command(name="modlog", description="Show a member's moderation cases.")
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def modlog(self, interaction: discord.Interaction, user: discord.User):
+        store = getattr(self.bot, "modcases", None)
+        if store is None:
+            await interaction.response.send_message("The case database is not enabled.", ephemeral=True)
+            return
+        await timed_defer(interaction, ephemeral=True)
+        rows, total = await asyncio.gather(
+            store.history(interaction.guild.id, user.id, limit=MODLOG_PAGE_SIZE),
+            store.count(interaction.guild.id, user.id),
+        )
+        view = ModlogPager(store, interaction.user.id, interaction.guild.id, user, total, rows)
+        await interaction.followup.send(view.render(), view=view if rows else discord.utils.MISSING, ephemeral=True,
+                                        allowed_mentions=discord.AllowedMentions.none())
+
+    # STAFF: View / edit a case
+    @app_commands.command(name="case", description="Show a moderation case, or update its reason.")
+    @app_commands.describe(number="Case number", reason="New reason (leave empty to just view the case)")
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def case(self, interaction: discord.Interaction, number: int, reason: Optional[str] = None):
+        store = getattr(self.bot, "modcases", None)
+        if store is None:
+            await interaction.response.send_message("The case database is not enabled.", ephemeral=True)
+            return
+        await timed_defer(interaction, ephemeral=True)
+        guild_id = interaction.guild.id
+        if reason is None:
+            c = await store.get(guild_id, number)
+        else:
+            c = await store.update_reason(guild_id, number, reason, interaction.user.id)
+        if c is None:
+            await interaction.followup.send(f"Case #{number} not found.", ephemeral=True)
+            return
+        target = f"<@{c['target_id']}>" if c["target_id"] else (f"<#{c['channel_id']}>" if c["channel_id"] else "—")
+        await interaction.followup.send(f"{'✏️ Updated ' if reason is not None else ''}{_format_case(c)}\nTarget: {target}",
+                                        ephemeral=True, allowed_mentions=discord.AllowedMentions.none())
+        if reason is not None:
+            audit.record(self.bot, guild_id, "case_edit", actor_id=interaction.user.id, target_id=c["target_id"],
+                         content=f"#{number}: {reason}")
+            chan_id = settings.current().log_channel(guild_id, "GENERAL")
+            log_channel = self.bot.get_channel(chan_id) if chan_id else None
+            if isinstance(log_channel, discord.TextChannel):
+                dispatch(self.bot, log_channel, f"✏️ **Case #{number}** reason updated by {interaction.user.mention}: {reason}",
+                         priority=MODERATION)
+
+    # ==========================
+    # SCHEDULED EXPIRIES
+    # ==========================
+    async def _expire_tempban(self, job):
+        guild = self.bot.get_guild(job.payload["guild_id"])
+        if guild is None:
+            return
+        user_id = job.payload["user_id"]
+        try:
+            await guild.unban(discord.Object(id=user_id), reason="Temporary ban expired")
+        except discord.NotFound:
+            return  # already unbanned by hand
+        await self._log_general(guild.id, f"⌛ **Tempban expired**: <@{user_id}> unbanned\nOriginal reason: {job.payload.get('reason', '')}",
+                                kind="unban", target_id=user_id, detail="tempban expired", reason="Temporary ban expired")
+
+    async def _expire_lock(self, job):
+        chan = self.bot.get_channel(job.payload["channel_id"])
+        if not isinstance(chan, discord.TextChannel):
+            return
+        if self.lockdown.forget_send_deny(chan.guild.id, chan.id):
+            # Stay locked for the lockdown; /lockdown_end will restore the channel unlocked.
+            await self._log_general(chan.guild.id, f"⌛ **Lock expired** during lockdown: {chan.mention} will unlock when it ends",
+                                    kind="unlock", channel_id=chan.id, detail="timed lock expired (lockdown)", reason="Timed lock expired")
+            return
+        everyone = chan.guild.default_role
+        overwrites = chan.overwrites_for(everyone)
+        overwrites.send_messages = None
+        await chan.set_permissions(everyone, overwrite=overwrites, reason="Timed lock expired")
+        await self._log_general(chan.guild.id, f"⌛ **Lock expired**: {chan.mention} unlocked",
+                                kind="unlock", channel_id=chan.id, detail="timed lock expired", reason="Timed lock expired")
+
+    async def _expire_lockdown(self, job):
+        guild = self.bot.get_guild(job.payload["guild_id"])
+        if guild is None or self.lockdown.active(guild.id) is None:
+            return
+        restored, gone, failures = await self.lockdown.end(guild, reason="Timed lockdown expired")
+        await self._log_general(guild.id, f"⌛ **Lockdown expired**: {restored} channel(s) restored"
+                                + (f" · {len(failures)} failed, run /lockdown_end to retry" if failures else ""),
+                                kind="lockdown_end", detail=f"{restored} channels — timed lockdown expired", reason="Timed lockdown expired")
+
     # ==========================
     # LOGGING HANDLER
     # ==========================
-    async def _log_general(self, guild_id: int, message: str):
-        log_channel = None
-        guild_logs = config.LOG_CHANNELS.get(guild_id)
-        if guild_logs:
-            log_channel = self.bot.get_channel(guild_logs.get("GENERAL"))
+    async def _log_general(self, guild_id: int, message: str, *, kind: str = "moderation", actor=None,
+                           target_id: int | None = None, channel_id: int | None = None, detail: str | None = None,
+                           reason: str | None = None, duration: str | None = None):
+        audit.record(self.bot, guild_id, kind, actor_id=actor.id if actor else None, target_id=target_id,
+                     channel_id=channel_id, content=detail)
+        store = getattr(self.bot, "modcases", None)
+        if store is not None and kind in CASE_ACTIONS:
+            # Scheduled expiries have no human actor; they're filed under the bot.
+            moderator = actor or self.bot.user
+            try:
+                case = await store.open_case(guild_id, kind, target_id=target_id, channel_id=channel_id,
+                                             moderator_id=moderator.id if moderator else None,
+                                             reason=reason if reason is not None else detail, duration=duration)
+                message = f"**Case #{case['case_no']}** · {message}"
+            except Exception as e:
+                errors.capture(self.bot, e, where="modcases.open_case", guild_id=guild_id)
+        chan_id = settings.current().log_channel(guild_id, "GENERAL")
+        log_channel = self.bot.get_channel(chan_id) if chan_id else None
 
         if isinstance(log_channel, discord.TextChannel):
-            await log_channel.send(message)
+            dispatch(self.bot, log_channel, message, priority=MODERATION)
         else:
             print(f"[WARN] No GENERAL log channel found for guild {guild_id}")
 
@@ -1,44 +1,61 @@
 # cogs/orders.py
-import json
+import asyncio
+import csv
+import gzip
+import heapq
+import logging
 import os
-from dataclasses import dataclass, asdict
-from typing import List, Optional
+import re
+import tempfile
+import time
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+import aiohttp
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
+
+import config
+from utils import fastjson, paypal
+from utils.checks import in_allowed_guilds, perm_level
+from utils.dispatcher import dispatch, AUDIT
+from utils.paginator import PAGE_SIZE, Paginator
+from utils.perf import timer
+from utils.textindex import InvertedIndex
+
+logger = logging.getLogger("bot")
 
 DATA_DIR = "data"
 ORDERS_PATH = os.path.join(DATA_DIR, "orders.json")
+# Compact on disk by default; set PRETTY_JSON_STORES = True in config.py for hand-editable files.
+PRETTY_JSON = getattr(config, "PRETTY_JSON_STORES", False)
 
 def _ensure_store():
     os.makedirs(DATA_DIR, exist_ok=True)
     if not os.path.exists(ORDERS_PATH):
-        with open(ORDERS_PATH, "w", encoding="utf-8") as f:
-            json.dump([], f)
+        fastjson.write_file(ORDERS_PATH, [])
 
 def _safe_load() -> List[dict]:
     _ensure_store()
     try:
-        with open(ORDERS_PATH, "r", encoding="utf-8") as f:
-            raw = f.read().strip()
-            if not raw:
-                return []
-            return json.loads(raw)
+        return fastjson.read_file(ORDERS_PATH, default=[])
     except Exception:
         return []
 
 def _safe_save(items: List[dict]):
     os.makedirs(DATA_DIR, exist_ok=True)
-    tmp = ORDERS_PATH + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(items, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, ORDERS_PATH)
+    fastjson.write_file(ORDERS_PATH, items, pretty=PRETTY_JSON)
 
 def _next_order_id(items: List[dict]) -> int:
     if not items:
         return 1
     return max(int(x.get("id", 0)) for x in items) + 1
 
+ORDER_STATUSES = ("open", "in_progress", "completed", "cancelled")
+# Fields covered by /order_search.
+SEARCH_FIELDS = ("title", "notes", "budget", "deadline")
+
 @dataclass
 class Order:
     id: int
@@ -49,10 +66,190 @@ class Order:
     budget: Optional[str] = None
     deadline: Optional[str] = None
     notes: Optional[str] = None
+    invoice_id: Optional[str] = None
+    invoice_url: Optional[str] = None
+    payment_status: Optional[str] = None  # PayPal invoice status (SENT, PAID, ...)
+    created_at: Optional[str] = None      # ISO 8601 UTC
+    completed_at: Optional[str] = None    # set when status first becomes "completed"
+    reminded_deadline: Optional[str] = None  # the deadline text whose at-deadline reminder was sent
 
     def to_dict(self):
         return asdict(self)
 
+def _utcnow_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def _stats_path() -> str:
+    return os.path.join(os.path.dirname(ORDERS_PATH) or ".", "order_stats.json")
+
+# ===== ANALYTICS =====
+class _OrderStats:
+    """
+    Aggregates over all orders: counts by status, per-user counts by status and
+    daily created/completed buckets.
+
+    Each order's contribution depends only on its own fields, so an update is
+    "subtract the old version, add the new one" with no scan of the store.
+    """
+
+    def __init__(self):
+        self.by_status: Dict[str, int] = {}
+        self.per_user: Dict[int, Dict[str, int]] = {}
+        self.daily: Dict[str, Dict[str, int]] = {}  # "YYYY-MM-DD" -> {"created": n, "completed": n}
+
+    @staticmethod
+    def _bump(d: Dict, key, n: int):
+        v = d.get(key, 0) + n
+        if v:
+            d[key] = v
+        else:
+            d.pop(key, None)
+
+    def _apply(self, o: dict, sign: int):
+        status = o.get("status") or ""
+        self._bump(self.by_status, status, sign)
+        uid = int(o.get("user_id") or 0)
+        user = self.per_user.setdefault(uid, {})
+        self._bump(user, status, sign)
+        if not user:
+            del self.per_user[uid]
+        created = o.get("created_at")
+        if created:
+            day = self.daily.setdefault(created[:10], {})
+            self._bump(day, "created", sign)
+            if not day:
+                del self.daily[created[:10]]
+        completed = o.get("completed_at")
+        if completed and status == "completed":
+            day = self.daily.setdefault(completed[:10], {})
+            self._bump(day, "completed", sign)
+            if not day:
+                del self.daily[completed[:10]]
+
+    def add(self, o: dict):
+        self._apply(o, 1)
+
+    def remove(self, o: dict):
+        self._apply(o, -1)
+
+    def user_totals(self, uid: int) -> Dict[str, int]:
+        return dict(self.per_user.get(uid, {}))
+
+    def top_users(self, n: int = 5) -> List[Tuple[int, int]]:
+        return heapq.nlargest(n, ((uid, sum(c.values())) for uid, c in self.per_user.items()), key=lambda x: x[1])
+
+    def to_dict(self) -> dict:
+        return {"by_status": self.by_status, "per_user": self.per_user, "daily": self.daily}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "_OrderStats":
+        stats = cls()
+        stats.by_status = dict(d.get("by_status", {}))
+        stats.per_user = {int(k): dict(v) for k, v in d.get("per_user", {}).items()}
+        stats.daily = {k: dict(v) for k, v in d.get("daily", {}).items()}
+        return stats
+
+# ===== IN-MEMORY STORE =====
+class _OrderCache:
+    """
+    orders.json held in memory with id/status/user lookups and a full-text index.
+
+    The file is still the source of truth: every write persists it, and if the
+    file changes underneath us (hand edit, restore) the cache rebuilds on next use.
+    """
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.stamp: Optional[tuple] = None
+        self.items: List[dict] = []
+        self.pos: Dict[int, int] = {}
+        self.by_status: Dict[str, Set[int]] = {}
+        self.by_user: Dict[int, Set[int]] = {}
+        self.index = InvertedIndex()
+        self.stats = _OrderStats()
+        self.next_id = 1
+
+    @staticmethod
+    def _stat() -> Optional[tuple]:
+        try:
+            st = os.stat(ORDERS_PATH)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def ensure_fresh(self):
+        if self.path == ORDERS_PATH and self.stamp is not None and self.stamp == self._stat():
+            return
+        self._rebuild(_safe_load())
+        self.path = ORDERS_PATH
+        self.stamp = self._stat()
+
+    def _rebuild(self, items: List[dict]):
+        self.items = items
+        self.pos = {}
+        self.by_status = {}
+        self.by_user = {}
+        self.index.clear()
+        for i, o in enumerate(items):
+            oid = int(o.get("id", 0))
+            self.pos[oid] = i
+            self._index(oid, o)
+        self.next_id = _next_order_id(items)
+        self.stats = self._load_stats()
+
+    def _load_stats(self) -> _OrderStats:
+        # The sidecar is only trusted if it was written together with this exact orders.json.
+        try:
+            saved = fastjson.read_file(_stats_path(), default={}) or {}
+            if saved.get("orders_stamp") == list(self._stat() or ()):
+                return _OrderStats.from_dict(saved)
+        except Exception:
+            pass
+        stats = _OrderStats()
+        for o in self.items:
+            stats.add(o)
+        return stats
+
+    def _index(self, oid: int, o: dict):
+        self.by_status.setdefault(o.get("status") or "", set()).add(oid)
+        self.by_user.setdefault(int(o.get("user_id") or 0), set()).add(oid)
+        self.index.add(oid, (o.get(f) for f in SEARCH_FIELDS))
+
+    def _unindex(self, oid: int, o: dict):
+        self.by_status.get(o.get("status") or "", set()).discard(oid)
+        self.by_user.get(int(o.get("user_id") or 0), set()).discard(oid)
+        self.index.remove(oid)
+
+    def upsert(self, d: dict):
+        oid = int(d["id"])
+        i = self.pos.get(oid)
+        if i is None:
+            self.pos[oid] = len(self.items)
+            self.items.append(d)
+        else:
+            self._unindex(oid, self.items[i])
+            self.stats.remove(self.items[i])
+            self.items[i] = d
+        self._index(oid, d)
+        self.stats.add(d)
+        self.next_id = max(self.next_id, oid + 1)
+
+    def get(self, oid: int) -> Optional[dict]:
+        i = self.pos.get(oid)
+        return self.items[i] if i is not None else None
+
+    def persist(self):
+        _safe_save(self.items)
+        self.stamp = self._stat()
+        fastjson.write_file(_stats_path(), {"orders_stamp": list(self.stamp or ()), **self.stats.to_dict()})
+
+_cache = _OrderCache()
+
+def _store() -> _OrderCache:
+    _ensure_store()
+    _cache.ensure_fresh()
+    return _cache
+
 def create_order_from_ticket(
     user_id: int,
     ticket_channel_id: int,
@@ -61,8 +258,8 @@ def create_order_from_ticket(
     deadline: Optional[str],
     notes: Optional[str],
 ) -> Order:
-    items = _safe_load()
-    oid = _next_order_id(items)
+    store = _store()
+    oid = store.next_id
     order = Order(
         id=oid,
         user_id=user_id,
@@ -72,50 +269,377 @@ def create_order_from_ticket(
         budget=budget,
         deadline=deadline,
         notes=notes,
+        created_at=_utcnow_iso(),
     )
-    items.append(order.to_dict())
-    _safe_save(items)
+    store.upsert(order.to_dict())
+    store.persist()
     return order
 
 def list_orders() -> List[Order]:
-    return [Order(**o) for o in _safe_load()]
+    return [Order(**o) for o in _store().items]
 
 def get_order(oid: int) -> Optional[Order]:
-    for o in _safe_load():
-        if int(o.get("id", 0)) == oid:
-            return Order(**o)
-    return None
+    o = _store().get(oid)
+    return Order(**o) if o is not None else None
 
 def save_order(order: Order):
-    items = _safe_load()
-    for i, o in enumerate(items):
-        if int(o.get("id", 0)) == order.id:
-            items[i] = order.to_dict()
-            break
+    store = _store()
+    if order.status == "completed":
+        order.completed_at = order.completed_at or _utcnow_iso()
+    else:
+        order.completed_at = None
+    store.upsert(order.to_dict())
+    store.persist()
+
+def search_orders(
+    query: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    limit: int = 20,
+) -> Tuple[List[Order], int]:
+    """
+    Full-text search over title/notes/budget/deadline, combinable with status/user filters.
+    Returns (newest matches up to `limit`, total match count).
+    """
+    store = _store()
+    candidates: Optional[Set[int]] = None
+    if query and query.strip():
+        candidates = store.index.search(query)
+    if status:
+        s = store.by_status.get(status, set())
+        candidates = set(s) if candidates is None else candidates & s
+    if user_id:
+        u = store.by_user.get(user_id, set())
+        candidates = set(u) if candidates is None else candidates & u
+    if candidates is None:
+        candidates = set(store.pos)
+    newest = heapq.nlargest(limit, candidates)
+    return [Order(**store.get(oid)) for oid in newest], len(candidates)
+
+def order_stats() -> _OrderStats:
+    return _store().stats
+
+# ===== EXPORT / IMPORT =====
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_FIELDS = tuple(f.name for f in fields(Order))
+# Orders serialised/validated per hop to the worker thread; bounds memory for any store size.
+EXPORT_CHUNK = 500
+IMPORT_BATCH = 500
+MAX_IMPORT_ERRORS = 10
+INT_FIELDS = {"id", "user_id", "ticket_channel_id"}
+
+def _parse_day(text: Optional[str], field: str) -> Optional[str]:
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text.strip(), "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise ValueError(f"{field} must be YYYY-MM-DD, got {text!r}")
+
+def _write_chunk(out, fmt: str, rows: List[dict]):
+    if fmt == "csv":
+        w = csv.DictWriter(out, EXPORT_FIELDS, extrasaction="ignore")
+        w.writerows({k: ("" if o.get(k) is None else o.get(k)) for k in EXPORT_FIELDS} for o in rows)
     else:
-        items.append(order.to_dict())
-    _safe_save(items)
+        out.writelines(fastjson.dumps({k: o.get(k) for k in EXPORT_FIELDS}).decode("utf-8") + "\n" for o in rows)
+
+async def export_orders_stream(fmt: str = "csv", status: Optional[str] = None,
+                               since: Optional[str] = None, until: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Write matching orders to a gzipped temp file (caller deletes it). `since`/`until` are
+    inclusive YYYY-MM-DD bounds on created_at. Returns (path, rows written).
+
+    Rows are filtered on the loop and serialised EXPORT_CHUNK at a time on a worker
+    thread straight into the gzip stream, so only one chunk is ever materialised.
+    """
+    since, until = _parse_day(since, "since"), _parse_day(until, "until")
+    store = _store()
+    items = store.items  # a rebuild swaps the list; keep walking the one we started with
+    fd, path = tempfile.mkstemp(prefix="orders-", suffix=f".{fmt}.gz")
+    os.close(fd)
+    written = 0
+    out = gzip.open(path, "wt", encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            await asyncio.to_thread(csv.writer(out).writerow, EXPORT_FIELDS)
+        for start in range(0, len(items), EXPORT_CHUNK):
+            chunk = []
+            for o in items[start:start + EXPORT_CHUNK]:
+                day = (o.get("created_at") or "")[:10]
+                if status and o.get("status") != status:
+                    continue
+                if (since and (not day or day < since)) or (until and (not day or day > until)):
+                    continue
+                chunk.append(o)
+            if chunk:
+                await asyncio.to_thread(_write_chunk, out, fmt, chunk)
+                written += len(chunk)
+    finally:
+        await asyncio.to_thread(out.close)
+    return path, written
+
+def _validate_row(raw: dict) -> dict:
+    """Import row -> order dict, or ValueError naming the bad field."""
+    if not isinstance(raw, dict):
+        raise ValueError("expected an object")
+    unknown = set(raw) - set(EXPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(sorted(unknown))}")
+    d = {k: (None if raw.get(k) in ("", None) else raw.get(k)) for k in EXPORT_FIELDS}
+    for k in INT_FIELDS:
+        if d[k] is not None:
+            try:
+                d[k] = int(d[k])
+            except (TypeError, ValueError):
+                raise ValueError(f"{k} must be an integer, got {d[k]!r}")
+    if not d["user_id"]:
+        raise ValueError("user_id is required")
+    if not d["title"] or not str(d["title"]).strip():
+        raise ValueError("title is required")
+    d["status"] = d["status"] or "open"
+    if d["status"] not in ORDER_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(ORDER_STATUSES)}, got {d['status']!r}")
+    for k in ("created_at", "completed_at"):
+        if d[k] is not None:
+            try:
+                ts = datetime.fromisoformat(str(d[k]).replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError(f"{k} must be an ISO 8601 timestamp, got {d[k]!r}")
+            d[k] = (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).isoformat(timespec="seconds")
+    d["created_at"] = d["created_at"] or _utcnow_iso()
+    if d["status"] == "completed":
+        d["completed_at"] = d["completed_at"] or d["created_at"]
+    else:
+        d["completed_at"] = None
+    for k in ("title", "budget", "deadline", "notes", "invoice_id", "invoice_url", "payment_status", "reminded_deadline"):
+        if d[k] is not None:
+            d[k] = str(d[k])
+    return d
+
+def _open_import(path: str):
+    """Text stream over a CSV/JSONL file, gzipped or not; returns (stream, format)."""
+    with open(path, "rb") as f:
+        gz = f.read(2) == b"\x1f\x8b"
+    stream = gzip.open(path, "rt", encoding="utf-8-sig", newline="") if gz else open(path, "r", encoding="utf-8-sig", newline="")
+    # Sniff: JSONL lines start with "{", anything else is treated as CSV with a header row.
+    first = ""
+    while not first:
+        line = stream.readline()
+        if not line:
+            break
+        first = line.strip()
+    stream.seek(0)
+    return stream, "jsonl" if first.startswith("{") else "csv"
+
+def _read_batch(rows, fmt: str, start_line: int) -> Tuple[List[Tuple[int, dict]], List[str], int, bool]:
+    """Next IMPORT_BATCH rows: ([(line, order)], errors, next line number, exhausted)."""
+    good, bad = [], []
+    line_no = start_line
+    for _ in range(IMPORT_BATCH):
+        try:
+            raw = next(rows)
+        except StopIteration:
+            return good, bad, line_no, True
+        line_no += 1
+        if fmt == "jsonl":
+            if not raw.strip():
+                continue
+            try:
+                raw = fastjson.loads(raw)
+            except ValueError as e:
+                bad.append(f"line {line_no}: invalid JSON ({e})")
+                continue
+        try:
+            good.append((line_no, _validate_row(raw)))
+        except ValueError as e:
+            bad.append(f"line {line_no}: {e}")
+    return good, bad, line_no, False
+
+async def import_orders_file(path: str) -> dict:
+    """
+    Validate and insert orders from a CSV/JSONL(.gz) file, IMPORT_BATCH rows at a time.
+
+    Rows keep their id unless it is already taken (then they are skipped as duplicates);
+    rows without an id get the next free one. The store is persisted once at the end.
+    """
+    stream, fmt = await asyncio.to_thread(_open_import, path)
+    report = {"format": fmt, "inserted": 0, "duplicates": 0, "invalid": 0, "errors": [], "ids": []}
+    try:
+        rows = csv.DictReader(stream) if fmt == "csv" else iter(stream)
+        line_no = 1 if fmt == "csv" else 0  # CSV data starts after the header
+        store = _store()
+        done = False
+        while not done:
+            good, bad, line_no, done = await asyncio.to_thread(_read_batch, rows, fmt, line_no)
+            report["invalid"] += len(bad)
+            report["errors"].extend(bad[:MAX_IMPORT_ERRORS - len(report["errors"])])
+            for _, d in good:
+                if d["id"] is None:
+                    d["id"] = store.next_id
+                elif store.get(d["id"]) is not None:
+                    report["duplicates"] += 1
+                    continue
+                store.upsert(d)
+                report["inserted"] += 1
+                if d["status"] in ("open", "in_progress"):
+                    report["ids"].append(d["id"])
+    finally:
+        await asyncio.to_thread(stream.close)
+    if report["inserted"]:
+        store.persist()
+    return report
+
+def orders_awaiting_payment() -> List[Order]:
+    """Invoiced orders that are still active and whose invoice isn't settled yet."""
+    store = _store()
+    out = []
+    for status in ("open", "in_progress"):
+        for oid in store.by_status.get(status, ()):
+            o = store.get(oid)
+            if o.get("invoice_id") and o.get("payment_status") not in paypal.FINAL_STATUSES:
+                out.append(Order(**o))
+    return out
+
+def apply_payment_statuses(statuses: Dict[str, str]) -> List[Order]:
+    """Record fresh invoice statuses (invoice id -> status); returns the orders that changed."""
+    store = _store()
+    by_invoice = {o["invoice_id"]: o for o in store.items if o.get("invoice_id") in statuses}
+    changed = []
+    for invoice_id, status in statuses.items():
+        o = by_invoice.get(invoice_id)
+        if o is not None and o.get("payment_status") != status:
+            o["payment_status"] = status
+            changed.append(Order(**o))
+    if changed:
+        store.persist()
+    return changed
+
+# How often invoiced orders are checked against PayPal.
+PAYPAL_SYNC_MINUTES = getattr(config, "PAYPAL_SYNC_MINUTES", 10)
+
+# ===== DEADLINES =====
+# Reminders posted in the ticket channel this many hours before a parseable deadline (and at the deadline).
+DEADLINE_REMINDER_HOURS = getattr(config, "ORDER_DEADLINE_REMINDER_HOURS", 24)
+_DEADLINE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y")
+_DEADLINE_FORMATS_NO_YEAR = ("%m/%d", "%B %d", "%b %d", "%d %B", "%d %b")
+_ORDINAL = re.compile(r"(\d)(st|nd|rd|th)\b", re.IGNORECASE)
+
+def parse_deadline(text: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Best-effort parse of the free-text deadline ("Nov 30", "2025-11-30", "11/30") as the
+    end of that day, UTC. Dates without a year are the first such date on or after `now`
+    (callers pass the order's creation time, so the answer doesn't drift). None if unparseable.
+    """
+    if not text:
+        return None
+    now = now or datetime.now(timezone.utc)
+    cleaned = " ".join(_ORDINAL.sub(r"\1", text.replace(",", " ")).split())
+    for fmt in _DEADLINE_FORMATS + _DEADLINE_FORMATS_NO_YEAR:
+        try:
+            day = datetime.strptime(cleaned, fmt)
+        except ValueError:
+            continue
+        if fmt in _DEADLINE_FORMATS_NO_YEAR:
+            day = day.replace(year=now.year)
+            if day.date() < now.date():
+                day = day.replace(year=now.year + 1)
+        return day.replace(hour=23, minute=59, tzinfo=timezone.utc)
+    return None
+
+def _order_deadline(o: Order) -> Optional[datetime]:
+    created = None
+    if o.created_at:
+        try:
+            created = datetime.fromisoformat(o.created_at)
+        except ValueError:
+            pass
+    return parse_deadline(o.deadline, now=created)
 
 class OrdersCog(commands.Cog, name="Orders"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.paypal = paypal.PayPalClient()
+        if paypal.configured():
+            self.sync_payments.start()
+        self.scheduler = getattr(bot, "scheduler", None)
+        if self.scheduler is not None:
+            self.scheduler.register("order_deadline", self._deadline_reminder)
+            # Orders created before reminders existed (or while the scheduler file was lost).
+            # One save at the end: every save rewrites the whole job file.
+            backfilled = 0
+            for o in list_orders():
+                if (o.status in ("open", "in_progress") and o.reminded_deadline != o.deadline
+                        and not self.scheduler.get_key(f"order_deadline:{o.id}:due")):
+                    self.schedule_deadline(o, save=False)
+                    backfilled += 1
+            if backfilled:
+                self.scheduler.save()
+
+    async def cog_unload(self):
+        self.sync_payments.cancel()
+        await self.paypal.close()
+
+    # ===== DEADLINE REMINDERS =====
+    def schedule_deadline(self, o: Order, *, save: bool = True):
+        """(Re)schedule the before-deadline and at-deadline reminders for an order."""
+        if self.scheduler is None:
+            return
+        for stage in ("soon", "due"):
+            self.scheduler.cancel_key(f"order_deadline:{o.id}:{stage}", save=False)
+        due = _order_deadline(o)
+        if due is not None and o.status in ("open", "in_progress") and o.ticket_channel_id:
+            now = time.time()
+            soon = due.timestamp() - DEADLINE_REMINDER_HOURS * 3600
+            for stage, at in (("soon", soon), ("due", due.timestamp())):
+                if at > now:
+                    self.scheduler.schedule("order_deadline", at, {"order_id": o.id, "stage": stage, "deadline": o.deadline},
+                                            key=f"order_deadline:{o.id}:{stage}", save=False)
+        if save:
+            self.scheduler.save()
+
+    async def _deadline_reminder(self, job):
+        o = get_order(job.payload["order_id"])
+        # Skip reminders for finished orders or a deadline that has since been edited.
+        if o is None or o.status not in ("open", "in_progress") or o.deadline != job.payload["deadline"]:
+            return
+        chan = self.bot.get_channel(o.ticket_channel_id) if o.ticket_channel_id else None
+        if not isinstance(chan, discord.TextChannel):
+            return
+        due = _order_deadline(o)
+        when = f"<t:{int(due.timestamp())}:R>" if due else o.deadline
+        if job.payload["stage"] == "soon":
+            text = f"⏰ Order **#{o.id}** ({discord.utils.escape_markdown(o.title)}) is due {when}."
+        else:
+            text = f"⏰ Order **#{o.id}** ({discord.utils.escape_markdown(o.title)}) has reached its deadline ({discord.utils.escape_markdown(o.deadline)})."
+            # The restart backfill skips orders whose reminders for this deadline are done.
+            o.reminded_deadline = o.deadline
+            save_order(o)
+        dispatch(self.bot, chan, text, priority=AUDIT)
 
     # /order list
     @app_commands.command(name="order_list", description="List all orders.")
     @app_commands.guild_only()
     async def order_list(self, interaction: discord.Interaction):
-        items = list_orders()
-        if not items:
-            await interaction.response.send_message("No orders yet.", ephemeral=True)
-            return
-        chunks = []
-        for o in items:
-            line = f"**#{o.id}** — **{discord.utils.escape_markdown(o.title)}** · {o.status}"
-            if o.ticket_channel_id:
-                line += f" · <#{o.ticket_channel_id}>"
-            chunks.append(line)
-        msg = "\n".join(chunks)
-        await interaction.response.send_message(msg, ephemeral=True)
+        items = _store().items  # only the page on screen is formatted
+
+        def line(o: dict) -> str:
+            out = f"**#{o['id']}** — **{discord.utils.escape_markdown(str(o.get('title') or '')[:80])}** · {o.get('status')}"
+            if o.get("ticket_channel_id"):
+                out += f" · <#{o['ticket_channel_id']}>"
+            return out
+
+        async def fetch(page: int):
+            start = page * PAGE_SIZE
+            return [line(o) for o in items[start:start + PAGE_SIZE]], start + PAGE_SIZE < len(items)
+
+        async def export():
+            for o in items:
+                yield f"#{o['id']}\t{o.get('status')}\t{o.get('user_id')}\t{o.get('title') or ''}"
+
+        view = Paginator(interaction.user.id, f"Orders ({len(items)})", fetch,
+                         total_pages=max(1, -(-len(items) // PAGE_SIZE)), export=export,
+                         export_name="orders.tsv", empty="No orders yet.")
+        await view.start(interaction)
 
     # /order manage
     @app_commands.command(name="order_manage", description="Edit an existing order.")
@@ -148,8 +672,258 @@ class OrdersCog(commands.Cog, name="Orders"):
         if deadline is not None: o.deadline = deadline
         if notes is not None: o.notes = notes
         save_order(o)
+        if deadline is not None or status is not None:
+            self.schedule_deadline(o)
         await interaction.response.send_message(f"Updated order **#{o.id}**.", ephemeral=True)
 
+    # /order search
+    @app_commands.command(name="order_search", description="Search orders by title, notes, budget or deadline.")
+    @app_commands.describe(
+        query="Words to look for (last word also matches as a prefix)",
+        status="Only orders with this status",
+        user="Only orders from this member",
+        limit="Max results to show (default 15)"
+    )
+    @app_commands.choices(status=[app_commands.Choice(name=s, value=s) for s in ORDER_STATUSES])
+    @app_commands.guild_only()
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def order_search(
+        self,
+        interaction: discord.Interaction,
+        query: Optional[str] = None,
+        status: Optional[app_commands.Choice[str]] = None,
+        user: Optional[discord.Member] = None,
+        limit: app_commands.Range[int, 1, 50] = 15,
+    ):
+        t0 = time.perf_counter()
+        results, total = search_orders(
+            query=query,
+            status=status.value if status else None,
+            user_id=user.id if user else None,
+            limit=limit,
+        )
+        took_ms = (time.perf_counter() - t0) * 1000
+        if not results:
+            await interaction.response.send_message(f"No matching orders. ({took_ms:.1f} ms)", ephemeral=True)
+            return
+        lines = []
+        for o in results:
+            line = f"**#{o.id}** — **{discord.utils.escape_markdown(o.title)}** · {o.status} · <@{o.user_id}>"
+            if o.ticket_channel_id:
+                line += f" · <#{o.ticket_channel_id}>"
+            lines.append(line)
+        header = f"🔎 {total} match{'es' if total != 1 else ''}, showing newest {len(results)} · {took_ms:.1f} ms"
+        msg = header + "\n" + "\n".join(lines)
+        await interaction.response.send_message(msg[:2000], ephemeral=True)
+
+    # /order stats
+    @app_commands.command(name="order_stats", description="Order volume by status, customer and day.")
+    @app_commands.describe(
+        user="Show totals for one member instead of the top customers",
+        days="How many days of created/completed history to show (default 14)"
+    )
+    @app_commands.guild_only()
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def order_stats(
+        self,
+        interaction: discord.Interaction,
+        user: Optional[discord.Member] = None,
+        days: app_commands.Range[int, 1, 60] = 14,
+    ):
+        stats = order_stats()
+        total = sum(stats.by_status.values())
+        embed = discord.Embed(title="📊 Order Stats", color=getattr(config, "BRAND_COLOR", 0x9B59B6))
+        by_status = " · ".join(f"{s}: **{stats.by_status.get(s, 0)}**" for s in ORDER_STATUSES)
+        embed.add_field(name=f"Orders ({total})", value=by_status, inline=False)
+
+        if user is not None:
+            counts = stats.user_totals(user.id)
+            value = " · ".join(f"{s}: **{n}**" for s, n in sorted(counts.items())) or "No orders."
+            embed.add_field(name=f"{user.display_name} ({sum(counts.values())})", value=value, inline=False)
+        else:
+            top = stats.top_users(5)
+            value = "\n".join(f"<@{uid}> — **{n}**" for uid, n in top) or "No orders."
+            embed.add_field(name="Top customers", value=value, inline=False)
+
+        today = datetime.now(timezone.utc).date()
+        rows = []
+        for i in range(days - 1, -1, -1):
+            day = (today - timedelta(days=i)).isoformat()
+            bucket = stats.daily.get(day, {})
+            rows.append(f"{day}  +{bucket.get('created', 0):<4} ✓{bucket.get('completed', 0)}")
+        embed.add_field(name=f"Last {days} days (created / completed)", value="```\n" + "\n".join(rows) + "\n```", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # /order export
+    @app_commands.command(name="order_export", description="Export orders as a gzipped CSV or JSONL file.")
+    @app_commands.describe(
+        format="csv (spreadsheets) or jsonl (one JSON order per line)",
+        status="Only orders with this status",
+        since="Created on or after (YYYY-MM-DD)",
+        until="Created on or before (YYYY-MM-DD)"
+    )
+    @app_commands.choices(
+        format=[app_commands.Choice(name=f, value=f) for f in EXPORT_FORMATS],
+        status=[app_commands.Choice(name=s, value=s) for s in ORDER_STATUSES],
+    )
+    @app_commands.guild_only()
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def order_export(
+        self,
+        interaction: discord.Interaction,
+        format: str = "csv",
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            path, count = await export_orders_stream(format, status, since, until)
+        except ValueError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        try:
+            size = os.path.getsize(path)
+            if size > interaction.guild.filesize_limit:
+                await interaction.followup.send(
+                    f"❌ The export is {size / 1e6:.1f} MB, over this server's upload limit. Narrow it with status/since/until.",
+                    ephemeral=True,
+                )
+                return
+            name = f"orders-{datetime.now(timezone.utc):%Y%m%d-%H%M}.{format}.gz"
+            await interaction.followup.send(f"📦 Exported **{count}** order(s).", file=discord.File(path, filename=name), ephemeral=True)
+        finally:
+            os.remove(path)
+
+    # /order import
+    @app_commands.command(name="order_import", description="Import orders from a CSV or JSONL file (optionally .gz).")
+    @app_commands.describe(file="CSV with a header row, or JSONL; same columns as /order_export")
+    @app_commands.guild_only()
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def order_import(self, interaction: discord.Interaction, file: discord.Attachment):
+        max_bytes = getattr(config, "ORDER_IMPORT_MAX_MB", 50) * 1024 * 1024
+        if file.size > max_bytes:
+            await interaction.response.send_message(f"❌ File is larger than {max_bytes // (1024 * 1024)} MB.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        fd, path = tempfile.mkstemp(prefix="orders-import-")
+        try:
+            # Stream the upload to disk rather than holding it in memory.
+            with os.fdopen(fd, "wb") as f:
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+                    async with session.get(file.url) as resp:
+                        resp.raise_for_status()
+                        async for chunk in resp.content.iter_chunked(64 * 1024):
+                            f.write(chunk)
+            async with timer(self.bot, "task:order_import"):
+                report = await import_orders_file(path)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await interaction.followup.send(f"❌ Couldn't download the file: `{e}`", ephemeral=True)
+            return
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            await interaction.followup.send(f"❌ Couldn't read the file: `{e}`", ephemeral=True)
+            return
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        for oid in report["ids"]:
+            o = get_order(oid)
+            if o is not None:
+                self.schedule_deadline(o)
+        lines = [f"📥 Imported **{report['inserted']}** order(s) from {report['format'].upper()} · "
+                 f"{report['duplicates']} duplicate id(s) skipped · {report['invalid']} invalid row(s)"]
+        lines += [f"• {discord.utils.escape_markdown(e)}" for e in report["errors"]]
+        if report["invalid"] > len(report["errors"]):
+            lines.append(f"…and {report['invalid'] - len(report['errors'])} more")
+        await interaction.followup.send("\n".join(lines)[:2000], ephemeral=True)
+
+    # /order invoice
+    @app_commands.command(name="order_invoice", description="Create a PayPal invoice for an order.")
+    @app_commands.describe(
+        id="Order ID number",
+        amount="Amount to bill, e.g. 120.00",
+        currency="ISO currency code (default from config)",
+        note="Note shown on the invoice (defaults to the order notes)"
+    )
+    @app_commands.guild_only()
+    @in_allowed_guilds()
+    @perm_level("staff")
+    async def order_invoice(
+        self,
+        interaction: discord.Interaction,
+        id: int,
+        amount: str,
+        currency: Optional[str] = None,
+        note: Optional[str] = None,
+    ):
+        if not paypal.configured():
+            await interaction.response.send_message("PayPal isn't configured (PAYPAL_CLIENT_ID / PAYPAL_SECRET).", ephemeral=True)
+            return
+        o = get_order(id)
+        if not o:
+            await interaction.response.send_message(f"Order #{id} not found.", ephemeral=True)
+            return
+        if o.invoice_id:
+            await interaction.response.send_message(
+                f"Order **#{o.id}** already has invoice `{o.invoice_id}` ({o.payment_status or 'unknown'}).", ephemeral=True
+            )
+            return
+        try:
+            value = f"{float(amount.replace(',', '').lstrip('$€£')):.2f}"
+        except ValueError:
+            await interaction.response.send_message(f"`{amount}` isn't a valid amount.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            invoice = await self.paypal.create_invoice(o, value, (currency or paypal.CURRENCY).upper(), note)
+        except (paypal.PayPalError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await interaction.followup.send(f"❌ Couldn't create the invoice: `{e}`", ephemeral=True)
+            return
+
+        # Re-read: the order may have been edited while PayPal was answering.
+        o = get_order(id) or o
+        o.invoice_id = invoice["id"]
+        o.invoice_url = invoice["url"]
+        o.payment_status = "SENT"
+        save_order(o)
+        link = f"\n{invoice['url']}" if invoice["url"] else ""
+        await interaction.followup.send(f"🧾 Invoice `{o.invoice_id}` created for order **#{o.id}** ({value}).{link}", ephemeral=True)
+
+    # ===== PAYMENT SYNC =====
+    @tasks.loop(minutes=PAYPAL_SYNC_MINUTES)
+    async def sync_payments(self):
+        async with timer(self.bot, "task:sync_payments"):
+            await self._sync_once()
+
+    async def _sync_once(self) -> List[Order]:
+        pending = orders_awaiting_payment()
+        if not pending:
+            return []
+        try:
+            statuses = await self.paypal.fetch_statuses(o.invoice_id for o in pending)
+        except (paypal.PayPalError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"PayPal sync failed: {e}")
+            return []
+        changed = apply_payment_statuses(statuses)
+        for o in changed:
+            if o.payment_status in ("PAID", "MARKED_AS_PAID") and o.ticket_channel_id:
+                chan = self.bot.get_channel(o.ticket_channel_id)
+                if isinstance(chan, discord.TextChannel):
+                    dispatch(self.bot, chan, f"💸 Payment received for order **#{o.id}**.", priority=AUDIT)
+        if changed:
+            logger.info(f"PayPal sync: {len(changed)} of {len(pending)} invoiced orders changed status")
+        return changed
+
+    @sync_payments.before_loop
+    async def before_sync(self):
+        await self.bot.wait_until_ready()
+
 async def setup(bot: commands.Bot):
     cog = OrdersCog(bot)
     await bot.add_cog(cog)
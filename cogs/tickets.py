@@ -1,11 +1,18 @@
 # cogs/tickets.py
-import json
 import os
 import asyncio
+import gzip
+import logging
+import time
 import discord
 from discord import ui, app_commands
-from discord.ext import commands
-from typing import Optional
+from discord.ext import commands, tasks
+from typing import Dict, List, Optional, Set
+
+from utils import audit, fastjson, member_cache
+from utils.checks import perm_level
+from utils.perf import timed_defer, timer
+from utils.ratelimit import TokenBuckets, take_all
 
 try:
     import config
@@ -18,8 +25,38 @@ except Exception:
         CLOSED_TICKETS_CATEGORY_ID = 0
         BOT_LOGS_CHANNEL_ID = 0
 
+logger = logging.getLogger("bot")
+
 DATA_DIR = "data"
 PANEL_META = os.path.join(DATA_DIR, "ticket_panel.json")
+POOL_META = os.path.join(DATA_DIR, "ticket_pool.json")
+ARCHIVE_META = os.path.join(DATA_DIR, "ticket_archive.json")
+INDEX_META = os.path.join(DATA_DIR, "ticket_index.json")
+TRANSCRIPTS_DIR = os.path.join(DATA_DIR, "transcripts")
+
+# Hidden, pre-created channels kept ready per guild so opening a ticket is a single edit.
+POOL_SIZE = getattr(config, "TICKET_POOL_SIZE", 3)
+# Minimum gap between pool channel creations (Discord allows a handful of channel creates per 10s per guild).
+POOL_REFILL_SECONDS = getattr(config, "TICKET_POOL_REFILL_SECONDS", 2.0)
+POOL_MAX_BACKOFF = 300.0
+SPARE_PREFIX = "ticket-spare"
+
+# Discord hard limits.
+CATEGORY_CHANNEL_LIMIT = 50
+GUILD_CHANNEL_LIMIT = 500
+# Closed tickets are deleted (after their transcript is saved) this long after closing.
+ARCHIVE_RETENTION_DAYS = getattr(config, "TICKET_ARCHIVE_RETENTION_DAYS", 14)
+# Below this many free guild channel slots the sweeper also deletes the oldest closed tickets early.
+MIN_CHANNEL_HEADROOM = getattr(config, "TICKET_MIN_CHANNEL_HEADROOM", 25)
+# Transcripts/deletions running at once during a sweep.
+SWEEP_CONCURRENCY = getattr(config, "TICKET_SWEEP_CONCURRENCY", 3)
+SWEEP_MINUTES = 10
+
+# Ticket opens allowed per user and per guild (token buckets: burst, then a steady refill).
+USER_TICKET_BURST = getattr(config, "TICKET_USER_BURST", 2)
+USER_TICKETS_PER_HOUR = getattr(config, "TICKET_USER_PER_HOUR", 4)
+GUILD_TICKET_BURST = getattr(config, "TICKET_GUILD_BURST", 10)
+GUILD_TICKETS_PER_MINUTE = getattr(config, "TICKET_GUILD_PER_MINUTE", 10)
 
 def _ensure_data():
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -29,40 +66,414 @@ def _load_panel_state():
     if not os.path.exists(PANEL_META):
         return {}
     try:
-        with open(PANEL_META, "r", encoding="utf-8") as f:
-            raw = f.read().strip()
-            return json.loads(raw) if raw else {}
+        return fastjson.read_file(PANEL_META, default={})
     except Exception:
         return {}
 
 def _save_panel_state(d: dict):
     _ensure_data()
-    tmp = PANEL_META + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(d, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, PANEL_META)
+    fastjson.write_file(PANEL_META, d, pretty=getattr(config, "PRETTY_JSON_STORES", False))
 
 def _get_staff_role(guild: discord.Guild) -> Optional[discord.Role]:
     rid = getattr(config, "STAFF_ROLE_ID", 0) or 0
     return guild.get_role(rid) if rid else None
 
-def _get_or_make_category(guild: discord.Guild, category_id: int, name: str) -> discord.CategoryChannel:
+def _find_category(guild: discord.Guild, category_id: int, name: str) -> Optional[discord.CategoryChannel]:
     cat = guild.get_channel(category_id) if category_id else None
     if isinstance(cat, discord.CategoryChannel):
         return cat
-    # fallback: find by name or create
+    # fallback: find by name
     for c in guild.categories:
         if c.name.lower() == name.lower():
             return c
+    return None
+
+async def _get_or_make_category(guild: discord.Guild, category_id: int, name: str) -> discord.CategoryChannel:
+    cat = _find_category(guild, category_id, name)
+    if cat is not None:
+        return cat
     overwrites = {
         guild.default_role: discord.PermissionOverwrite(read_messages=False, send_messages=False, view_channel=False)
     }
-    return asyncio.get_event_loop().run_until_complete(guild.create_category(name=name, overwrites=overwrites))
+    return await guild.create_category(name=name, overwrites=overwrites)
+
+def _open_category(guild: discord.Guild) -> Optional[discord.CategoryChannel]:
+    return _find_category(guild, getattr(config, "TICKETS_CATEGORY_ID", 0) or 0, "Tickets")
+
+# ===== CHANNEL POOL =====
+def _load_pool_state() -> Dict[str, List[int]]:
+    _ensure_data()
+    try:
+        return fastjson.read_file(POOL_META, default={}) or {}
+    except Exception:
+        return {}
+
+class TicketChannelPool:
+    """
+    Per-guild stock of hidden, pre-created ticket channels.
+
+    claim() hands out a spare immediately (no API call); the caller renames it and
+    applies the ticket's overwrites in one edit. Refills run in the background, one
+    create at a time and at least POOL_REFILL_SECONDS apart, stretching the gap when
+    a create was slow (i.e. rate-limited) and backing off on errors. Spare ids are
+    saved to data/ticket_pool.json so a restart reuses them instead of leaking channels.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, interval: float = POOL_REFILL_SECONDS):
+        self.size = size
+        self.interval = interval
+        self._spares: Dict[int, List[discord.TextChannel]] = {}
+        self._refills: Dict[int, asyncio.Task] = {}
+        self._saved = _load_pool_state()
+        self.claimed = 0
+        self.misses = 0
+        self.created = 0
+        self.failures = 0
+
+    def _spares_for(self, guild: discord.Guild) -> List[discord.TextChannel]:
+        spares = self._spares.get(guild.id)
+        if spares is None:
+            # First touch since startup: pick up spares created by a previous run.
+            spares = self._spares[guild.id] = []
+            for cid in self._saved.get(str(guild.id), []):
+                ch = guild.get_channel(int(cid))
+                if isinstance(ch, discord.TextChannel):
+                    spares.append(ch)
+        return spares
+
+    def available(self, guild: discord.Guild) -> int:
+        return len(self._spares_for(guild))
+
+    def claim(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        """Take a spare (oldest first) and kick off a refill. None when the pool is empty."""
+        spares = self._spares_for(guild)
+        channel = spares.pop(0) if spares else None
+        if channel is None:
+            self.misses += 1
+        else:
+            self.claimed += 1
+            self._persist()
+        self.ensure_refill(guild)
+        return channel
+
+    def ensure_refill(self, guild: discord.Guild):
+        if self.size <= 0 or self.available(guild) >= self.size:
+            return
+        task = self._refills.get(guild.id)
+        if task is None or task.done():
+            self._refills[guild.id] = asyncio.get_running_loop().create_task(self._refill(guild))
+
+    async def _refill(self, guild: discord.Guild):
+        spares = self._spares_for(guild)
+        delay = self.interval
+        while len(spares) < self.size:
+            t0 = time.monotonic()
+            try:
+                category = await _get_or_make_category(guild, getattr(config, "TICKETS_CATEGORY_ID", 0) or 0, "Tickets")
+                channel = await guild.create_text_channel(
+                    name=f"{SPARE_PREFIX}-{self.created % 1000:03d}",
+                    category=category,
+                    overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+                    reason="Ticket channel pool",
+                )
+            except discord.Forbidden:
+                logger.warning(f"🎫 Ticket pool disabled for {guild.name}: missing Manage Channels")
+                return
+            except (discord.HTTPException, asyncio.TimeoutError) as e:
+                self.failures += 1
+                delay = min(delay * 2, POOL_MAX_BACKOFF)
+                logger.warning(f"🎫 Ticket pool refill failed in {guild.name} ({e}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                continue
+            spares.append(channel)
+            self.created += 1
+            self._persist()
+            delay = self.interval
+            # A create that took long was most likely held by the rate limiter; wait as long again.
+            await asyncio.sleep(max(self.interval, time.monotonic() - t0))
+
+    def _persist(self):
+        for gid, spares in self._spares.items():
+            self._saved[str(gid)] = [c.id for c in spares]
+        _ensure_data()
+        fastjson.write_file(POOL_META, self._saved, pretty=getattr(config, "PRETTY_JSON_STORES", False))
+
+    def close(self):
+        for task in self._refills.values():
+            task.cancel()
+
+    def snapshot(self) -> dict:
+        return {
+            "spares": {gid: len(s) for gid, s in self._spares.items()},
+            "claimed": self.claimed,
+            "misses": self.misses,
+            "created": self.created,
+            "failures": self.failures,
+        }
+
+# ===== OPEN TICKET INDEX =====
+class OpenTicketIndex:
+    """
+    (guild, opener, kind) -> open ticket channel, so a second open of the same kind
+    goes to the existing ticket. Saved to data/ticket_index.json; entries whose channel
+    is gone are dropped on lookup. `pending` covers the window while a ticket's channel
+    is still being set up, so a double submit can't create two.
+    """
+
+    def __init__(self):
+        self._open: Dict[str, int] = self._load()
+        self._by_channel: Dict[int, str] = {cid: key for key, cid in self._open.items()}
+        self._pending: Set[str] = set()
+        self.deduped = 0
+
+    @staticmethod
+    def key(guild_id: int, user_id: int, kind: str) -> str:
+        return f"{guild_id}:{user_id}:{kind.lower()}"
+
+    @staticmethod
+    def _load() -> Dict[str, int]:
+        _ensure_data()
+        try:
+            return fastjson.read_file(INDEX_META, default={}) or {}
+        except Exception:
+            return {}
+
+    def _save(self):
+        _ensure_data()
+        fastjson.write_file(INDEX_META, self._open, pretty=getattr(config, "PRETTY_JSON_STORES", False))
+
+    def get(self, guild: discord.Guild, user_id: int, kind: str) -> Optional[discord.TextChannel]:
+        key = self.key(guild.id, user_id, kind)
+        cid = self._open.get(key)
+        if cid is None:
+            return None
+        channel = guild.get_channel(cid)
+        if not isinstance(channel, discord.TextChannel):
+            self.remove_channel(cid)
+            return None
+        return channel
+
+    def pending(self, guild_id: int, user_id: int, kind: str) -> bool:
+        return self.key(guild_id, user_id, kind) in self._pending
+
+    def reserve(self, guild_id: int, user_id: int, kind: str):
+        self._pending.add(self.key(guild_id, user_id, kind))
+
+    def release(self, guild_id: int, user_id: int, kind: str):
+        self._pending.discard(self.key(guild_id, user_id, kind))
+
+    def add(self, guild_id: int, user_id: int, kind: str, channel_id: int):
+        key = self.key(guild_id, user_id, kind)
+        self._pending.discard(key)
+        self._open[key] = channel_id
+        self._by_channel[channel_id] = key
+        self._save()
+
+    def opener(self, channel_id: int) -> Optional[int]:
+        key = self._by_channel.get(channel_id)
+        return int(key.split(":")[1]) if key else None
+
+    def remove_channel(self, channel_id: int) -> bool:
+        key = self._by_channel.pop(channel_id, None)
+        if key is None:
+            return False
+        self._open.pop(key, None)
+        self._save()
+        return True
+
+    def snapshot(self) -> dict:
+        return {"open": len(self._open), "pending": len(self._pending), "deduped": self.deduped}
+
+# ===== ARCHIVE =====
+class TicketArchive:
+    """
+    Where closed tickets go, and when they leave.
+
+    Closed channels fill "Closed Tickets", then "Closed Tickets 2", 3, … (50 channels
+    per category). Each archived channel is recorded in data/ticket_archive.json with
+    a delete-after time; sweep() saves a gzipped transcript and only then deletes the
+    channel, a few at a time. When the guild nears Discord's 500-channel cap the oldest
+    closed tickets go early, and emptied overflow categories are removed.
+    """
+
+    def __init__(self, retention_days: float = ARCHIVE_RETENTION_DAYS, concurrency: int = SWEEP_CONCURRENCY):
+        self.retention = retention_days * 86400
+        self._sem = asyncio.Semaphore(concurrency)
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._records: Dict[str, dict] = self._load()
+        self.deleted = 0
+        self.transcripts = 0
+        self.failures = 0
+        self.last_sweep: Optional[float] = None
+
+    # ----- storage -----
+    @staticmethod
+    def _load() -> Dict[str, dict]:
+        _ensure_data()
+        try:
+            return (fastjson.read_file(ARCHIVE_META, default={}) or {}).get("channels", {})
+        except Exception:
+            return {}
+
+    def _save(self):
+        _ensure_data()
+        fastjson.write_file(ARCHIVE_META, {"channels": self._records}, pretty=getattr(config, "PRETTY_JSON_STORES", False))
+
+    def records(self, guild_id: int) -> List[dict]:
+        return sorted((r for r in self._records.values() if r["guild_id"] == guild_id), key=lambda r: r["closed_at"])
+
+    # ----- shards -----
+    @staticmethod
+    def _shard_name(index: int) -> str:
+        return "Closed Tickets" if index == 1 else f"Closed Tickets {index}"
+
+    def shards(self, guild: discord.Guild) -> List[discord.CategoryChannel]:
+        first = _find_category(guild, getattr(config, "CLOSED_TICKETS_CATEGORY_ID", 0) or 0, self._shard_name(1))
+        out = [first] if first else []
+        index = 2
+        while True:
+            cat = _find_category(guild, 0, self._shard_name(index))
+            if cat is None:
+                return out
+            out.append(cat)
+            index += 1
+
+    def _occupancy(self, cat: discord.CategoryChannel) -> int:
+        # The guild cache only learns about a move from the gateway; count our own moves too.
+        ours = sum(1 for r in self._records.values() if r.get("category_id") == cat.id)
+        return max(len(cat.channels), ours)
+
+    async def _shard_with_room(self, guild: discord.Guild) -> discord.CategoryChannel:
+        shards = self.shards(guild)
+        for cat in shards:
+            if self._occupancy(cat) < CATEGORY_CHANNEL_LIMIT:
+                return cat
+        configured_id = 0 if shards else getattr(config, "CLOSED_TICKETS_CATEGORY_ID", 0) or 0
+        return await _get_or_make_category(guild, configured_id, self._shard_name(len(shards) + 1))
+
+    # ----- close -----
+    async def archive(self, channel: discord.TextChannel, closed_by: discord.abc.User, reason: str):
+        """Lock the channel, move it into a shard with room and schedule its deletion."""
+        guild = channel.guild
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:  # shard choice + move must not interleave, or two closes overfill one category
+            cat = await self._shard_with_room(guild)
+            overwrites = channel.overwrites
+            # remove opener send permission
+            for target in list(overwrites):
+                if isinstance(target, discord.Member):
+                    overwrites[target] = discord.PermissionOverwrite(view_channel=True, send_messages=False, read_message_history=True)
+            await channel.edit(category=cat, overwrites=overwrites, reason=f"Closed by {closed_by} — {reason}")
+            now = time.time()
+            self._records[str(channel.id)] = {
+                "channel_id": channel.id,
+                "guild_id": guild.id,
+                "category_id": cat.id,
+                "name": channel.name,
+                "closed_by": closed_by.id,
+                "reason": reason,
+                "closed_at": now,
+                "delete_after": now + self.retention,
+                "transcript": None,
+            }
+            self._save()
+        return cat
+
+    # ----- sweep -----
+    def headroom(self, guild: discord.Guild) -> int:
+        return GUILD_CHANNEL_LIMIT - len(guild.channels)
+
+    def _due(self, guild: discord.Guild, now: float) -> List[dict]:
+        records = self.records(guild.id)
+        due = [r for r in records if r["delete_after"] <= now]
+        short = MIN_CHANNEL_HEADROOM - self.headroom(guild) - len(due)
+        if short > 0:
+            # Close to the guild cap: let the oldest closed tickets go before their retention is up.
+            due += [r for r in records if r["delete_after"] > now][:short]
+        return due
+
+    async def sweep(self, bot: commands.Bot) -> int:
+        """Transcript + delete every due archived channel. Returns how many were deleted."""
+        now = time.time()
+        self.last_sweep = now
+        done = 0
+        for guild in bot.guilds:
+            due = self._due(guild, now)
+            if not due:
+                continue
+            results = await asyncio.gather(*(self._retire(bot, guild, r) for r in due))
+            done += sum(results)
+            await self._drop_empty_shards(guild)
+        if done:
+            self._save()
+        return done
+
+    async def _retire(self, bot: commands.Bot, guild: discord.Guild, record: dict) -> bool:
+        async with self._sem:
+            channel = guild.get_channel(record["channel_id"])
+            if not isinstance(channel, discord.TextChannel):
+                self._records.pop(str(record["channel_id"]), None)  # deleted by hand
+                return False
+            try:
+                if not record.get("transcript"):
+                    record["transcript"] = await self._write_transcript(channel, record)
+                    self.transcripts += 1
+                    self._save()
+                await channel.delete(reason=f"Closed ticket past retention (transcript {record['transcript']})")
+            except (discord.HTTPException, OSError) as e:
+                self.failures += 1
+                logger.warning(f"🎫 Couldn't retire closed ticket #{channel.name} in {guild.name}: {e}")
+                return False
+            self._records.pop(str(record["channel_id"]), None)
+            self.deleted += 1
+            audit.record(bot, guild.id, "ticket_deleted", actor_id=record.get("closed_by"),
+                         channel_id=channel.id, content=f"#{record['name']} · transcript {record['transcript']}")
+            return True
+
+    @staticmethod
+    async def _write_transcript(channel: discord.TextChannel, record: dict) -> str:
+        lines = [f"# #{channel.name} ({channel.id}) — closed <@{record['closed_by']}>: {record['reason']}"]
+        async for m in channel.history(limit=None, oldest_first=True):
+            text = m.content or ""
+            text += "".join(f"\n  [embed] {e.title or ''} {e.description or ''}".rstrip() for e in m.embeds)
+            text += "".join(f"\n  [file] {a.url}" for a in m.attachments)
+            lines.append(f"[{m.created_at:%Y-%m-%d %H:%M:%S}] {m.author} ({m.author.id}): {text}")
+        path = os.path.join(TRANSCRIPTS_DIR, str(channel.guild.id), f"{channel.id}-{channel.name}.txt.gz")
+
+        def write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+        await asyncio.to_thread(write)
+        return path
+
+    async def _drop_empty_shards(self, guild: discord.Guild):
+        for cat in self.shards(guild)[1:]:  # the first shard is kept
+            if not cat.channels and not any(r.get("category_id") == cat.id for r in self._records.values()):
+                try:
+                    await cat.delete(reason="Empty closed-ticket overflow category")
+                except discord.HTTPException:
+                    pass
+
+    # ----- budget -----
+    def budget(self, guild: discord.Guild) -> dict:
+        records = self.records(guild.id)
+        open_cat = _open_category(guild)
+        return {
+            "channels": len(guild.channels),
+            "headroom": self.headroom(guild),
+            "open": len(open_cat.channels) if open_cat else None,
+            "shards": [(cat.name, self._occupancy(cat)) for cat in self.shards(guild)],
+            "archived": len(records),
+            "next_delete": records[0]["delete_after"] if records else None,
+        }
 
 class TicketCategorySelect(ui.Select):
     def __init__(self):
         super().__init__(
             placeholder="Select a ticket type…",
+            custom_id="ticket_category_select",  # required for the persistent panel view
             min_values=1,
             max_values=1,
             options=[
@@ -74,6 +485,12 @@ class TicketCategorySelect(ui.Select):
 
     async def callback(self, interaction: discord.Interaction):
         value = self.values[0]
+        # Turn duplicates/throttled users away before they fill in the form (nothing is spent here).
+        cog = interaction.client.get_cog("Tickets")
+        refusal = cog.admit(interaction.guild, interaction.user, value, spend=False) if cog is not None else None
+        if refusal:
+            await interaction.response.send_message(refusal, ephemeral=True)
+            return
         if value == "commission":
             modal = CommissionModal()
         elif value == "bug":
@@ -140,6 +557,34 @@ class TicketControls(ui.View):
             return
         await interaction.response.send_modal(CloseReasonModal())
 
+def _is_open_ticket(cog, channel: discord.TextChannel) -> bool:
+    """Indexed tickets, or (for tickets opened before the index) channels in the open Tickets category."""
+    if cog is not None and cog.index.opener(channel.id) is not None:
+        return True
+    category = _open_category(channel.guild)
+    return category is not None and channel.category_id == category.id and not channel.name.startswith(SPARE_PREFIX)
+
+async def _ticket_opener_id(bot, cog, channel: discord.TextChannel) -> Optional[int]:
+    opener = cog.index.opener(channel.id) if cog is not None else None
+    if opener is not None:
+        return opener
+    # Unindexed ticket: the opener is the one member given their own overwrite at creation.
+    # Under the lean member cache that member usually isn't cached (the overwrite target is a bare Object).
+    for target, ow in channel.overwrites.items():
+        if isinstance(target, discord.Role) or getattr(target, "type", None) is discord.Role or not ow.view_channel:
+            continue
+        if not isinstance(target, discord.Member):
+            target = await member_cache.get_or_fetch_member(bot, channel.guild, target.id)
+        if target is not None and not target.bot:
+            return target.id
+    return None
+
+async def _can_close(bot, cog, member: discord.Member, channel: discord.TextChannel) -> bool:
+    staff = _get_staff_role(channel.guild)
+    if (staff and staff in member.roles) or member.guild_permissions.manage_channels:
+        return True
+    return member.id == await _ticket_opener_id(bot, cog, channel)
+
 class CloseReasonModal(ui.Modal, title="Close Ticket"):
     reason = ui.TextInput(label="Reason", required=False, max_length=300)
 
@@ -154,14 +599,24 @@ async def create_ticket_from_modal(
 ):
     guild = interaction.guild
     assert guild is not None
-    # categories
-    open_cat = _get_or_make_category(
-        guild,
-        getattr(config, "TICKETS_CATEGORY_ID", 0) or 0,
-        "Tickets"
-    )
+    cog = interaction.client.get_cog("Tickets")
+    if cog is not None:
+        refusal = cog.admit(guild, interaction.user, kind, spend=True)
+        if refusal:
+            await interaction.response.send_message(refusal, ephemeral=True)
+            return
+    try:
+        await _open_ticket(interaction, cog, kind, fields, commission)
+    finally:
+        if cog is not None:
+            cog.index.release(guild.id, interaction.user.id, kind)
+
+async def _open_ticket(interaction: discord.Interaction, cog, kind: str, fields: dict, commission: bool):
+    guild = interaction.guild
+    # ack first: the channel work below can outlast Discord's 3s deadline under load
+    await timed_defer(interaction, ephemeral=True, thinking=True)
 
-    # create private channel for user + staff
+    # private channel for user + staff
     staff = _get_staff_role(guild)
     overwrites = {
         guild.default_role: discord.PermissionOverwrite(view_channel=False),
@@ -170,12 +625,28 @@ async def create_ticket_from_modal(
     if staff:
         overwrites[staff] = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True, manage_channels=True)
 
-    channel = await guild.create_text_channel(
-        name=f"{kind.lower()}-{interaction.user.name[:18]}",
-        category=open_cat,
-        overwrites=overwrites,
-        reason=f"{kind} ticket opened by {interaction.user}",
-    )
+    name = f"{kind.lower()}-{interaction.user.name[:18]}"
+    reason = f"{kind} ticket opened by {interaction.user}"
+
+    # claim a pre-created channel when one is ready; create one inline otherwise
+    channel = None
+    pool: Optional[TicketChannelPool] = getattr(cog, "pool", None)
+    while pool is not None and channel is None:
+        spare = pool.claim(guild)
+        if spare is None:
+            break
+        try:
+            channel = await spare.edit(name=name, overwrites=overwrites, reason=reason) or spare
+        except discord.NotFound:
+            continue  # spare was deleted by hand; try the next one
+    if channel is None:
+        open_cat = await _get_or_make_category(guild, getattr(config, "TICKETS_CATEGORY_ID", 0) or 0, "Tickets")
+        channel = await guild.create_text_channel(
+            name=name,
+            category=open_cat,
+            overwrites=overwrites,
+            reason=reason,
+        )
 
     # embed summary
     embed = discord.Embed(
@@ -185,11 +656,14 @@ async def create_ticket_from_modal(
     )
     embed.add_field(name="Opened by", value=f"{interaction.user.mention} (`{interaction.user.id}`)", inline=False)
 
+    if cog is not None:
+        cog.index.add(guild.id, interaction.user.id, kind, channel.id)
+
     view = TicketControls(opener_id=interaction.user.id)
     msg = await channel.send(embed=embed, view=view)
 
     # link back to user
-    await interaction.response.send_message(f"Created {kind} ticket: {channel.mention}", ephemeral=True)
+    await interaction.followup.send(f"Created {kind} ticket: {channel.mention}", ephemeral=True)
 
     # auto-create order for commission
     if commission:
@@ -203,6 +677,9 @@ async def create_ticket_from_modal(
                 deadline=fields.get("Deadline"),
                 notes=fields.get("Notes"),
             )
+            orders_cog = interaction.client.get_cog("Orders")
+            if orders_cog is not None:
+                orders_cog.schedule_deadline(order)
             await channel.send(f"🧾 Auto-created **Order #{order.id}** linked to this ticket.")
         except Exception as e:
             await channel.send(f"⚠️ Failed to auto-create order: `{e}`")
@@ -210,41 +687,131 @@ async def create_ticket_from_modal(
 async def close_ticket(interaction: discord.Interaction, reason: str):
     guild = interaction.guild
     channel = interaction.channel
-    if not guild or not isinstance(channel, discord.TextChannel):
+    cog = interaction.client.get_cog("Tickets")
+    # Archived channels get deleted later; never let anything but an open ticket get here.
+    if not guild or not isinstance(channel, discord.TextChannel) or not _is_open_ticket(cog, channel):
         await interaction.response.send_message("This isn't a ticket channel.", ephemeral=True)
         return
+    if not await _can_close(interaction.client, cog, interaction.user, channel):
+        await interaction.response.send_message("You can't close this ticket.", ephemeral=True)
+        return
 
-    # move to closed category (or create it)
-    closed_cat = _get_or_make_category(
-        guild,
-        getattr(config, "CLOSED_TICKETS_CATEGORY_ID", 0) or 0,
-        "Closed Tickets"
-    )
+    await interaction.response.send_message("Ticket closed. Moving channel…", ephemeral=True)
 
-    # lock and move
+    # lock and move into an archive category with room
+    archive: Optional[TicketArchive] = getattr(cog, "archive", None)
+    if cog is not None:
+        cog.index.remove_channel(channel.id)
     try:
-        overwrites = channel.overwrites
-        # remove opener send permission
-        for target, perms in list(overwrites.items()):
-            if isinstance(target, discord.Member):
-                overwrites[target] = discord.PermissionOverwrite(view_channel=True, send_messages=False, read_message_history=True)
-        await channel.edit(category=closed_cat, overwrites=overwrites, reason=f"Closed by {interaction.user} — {reason}")
-    except Exception:
-        pass
+        if archive is not None:
+            await archive.archive(channel, interaction.user, reason)
+    except Exception as e:
+        logger.warning(f"🎫 Couldn't archive #{channel.name}: {e}")
 
-    await interaction.response.send_message("Ticket closed. Moving channel…", ephemeral=True)
     await channel.send(f"🔒 Ticket closed by {interaction.user.mention}\n**Reason:** {discord.utils.escape_markdown(reason)}")
 
 class Tickets(commands.Cog, name="Tickets"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.pool = TicketChannelPool()
+        self.archive = TicketArchive()
+        self.index = OpenTicketIndex()
+        self.user_buckets = TokenBuckets(USER_TICKETS_PER_HOUR / 3600, USER_TICKET_BURST)
+        self.guild_buckets = TokenBuckets(GUILD_TICKETS_PER_MINUTE / 60, GUILD_TICKET_BURST)
+
+    def admit(self, guild: discord.Guild, user: discord.abc.User, kind: str, *, spend: bool) -> Optional[str]:
+        """
+        None if `user` may open a `kind` ticket now, else the reason to show them.
+        With spend=True the rate-limit tokens are taken and the open is reserved
+        (the caller releases it with index.release()).
+        """
+        existing = self.index.get(guild, user.id, kind)
+        if existing is not None:
+            self.index.deduped += 1
+            return f"You already have an open {kind.lower()} ticket: {existing.mention}"
+        if self.index.pending(guild.id, user.id, kind):
+            return "Your ticket is already being created — hang on a moment."
+        checks = [(self.user_buckets, (guild.id, user.id)), (self.guild_buckets, guild.id)]
+        if spend:
+            wait = take_all(checks)
+        else:
+            wait = max(b.retry_after(k) for b, k in checks)
+        if wait > 0:
+            if self.user_buckets.retry_after((guild.id, user.id)) > 0:
+                return f"⏳ You're opening tickets too quickly. Try again <t:{int(time.time() + wait) + 1}:R>."
+            return f"⏳ A lot of tickets are being opened right now. Try again <t:{int(time.time() + wait) + 1}:R>."
+        if spend:
+            self.index.reserve(guild.id, user.id, kind)
+        return None
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self.index.remove_channel(channel.id)
 
     # persistent view on startup
     async def cog_load(self):
         self.bot.add_view(TicketPanelView())
+        if self.pool.size > 0:
+            self.warm_pool.start()
+        self.sweep_archive.start()
         if hasattr(self.bot, "logger"):
             self.bot.logger.info("✅ Loaded Tickets Cog")
 
+    async def cog_unload(self):
+        self.warm_pool.cancel()
+        self.sweep_archive.cancel()
+        self.pool.close()
+
+    # keep the channel pool topped up in every guild that has a Tickets category
+    @tasks.loop(minutes=5)
+    async def warm_pool(self):
+        async with timer(self.bot, "task:warm_ticket_pool"):
+            for guild in self.bot.guilds:
+                if _open_category(guild) is not None:
+                    self.pool.ensure_refill(guild)
+
+    @warm_pool.before_loop
+    async def before_warm_pool(self):
+        await self.bot.wait_until_ready()
+
+    # transcript + delete closed tickets past retention (or early, when the guild is near the channel cap)
+    @tasks.loop(minutes=SWEEP_MINUTES)
+    async def sweep_archive(self):
+        async with timer(self.bot, "task:sweep_ticket_archive"):
+            deleted = await self.archive.sweep(self.bot)
+        if deleted:
+            logger.info(f"🎫 Deleted {deleted} closed ticket channel(s) (transcripts in {TRANSCRIPTS_DIR})")
+
+    @sweep_archive.before_loop
+    async def before_sweep_archive(self):
+        await self.bot.wait_until_ready()
+
+    # /ticket_budget — channel headroom vs Discord's limits
+    @app_commands.command(name="ticket_budget", description="Show channel-limit headroom for tickets.")
+    @app_commands.guild_only()
+    @perm_level("staff")
+    async def ticket_budget(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        b = self.archive.budget(guild)
+        warn = " ⚠️" if b["headroom"] < MIN_CHANNEL_HEADROOM else ""
+        lines = [
+            f"**Guild channels:** {b['channels']}/{GUILD_CHANNEL_LIMIT} · **headroom** {b['headroom']}{warn}",
+            f"**Open tickets category:** {b['open'] if b['open'] is not None else 'n/a'}/{CATEGORY_CHANNEL_LIMIT} "
+            f"(incl. {self.pool.available(guild)} pooled spares)",
+        ]
+        for name, used in b["shards"] or [("Closed Tickets", 0)]:
+            lines.append(f"**{name}:** {used}/{CATEGORY_CHANNEL_LIMIT}")
+        lines.append(f"**Closed, awaiting deletion:** {b['archived']} · retention {ARCHIVE_RETENTION_DAYS}d")
+        ix = self.index.snapshot()
+        lines.append(f"**Open tickets indexed:** {ix['open']} · {ix['deduped']} duplicate opens redirected · "
+                     f"{self.user_buckets.limited + self.guild_buckets.limited} throttled")
+        if b["next_delete"]:
+            lines.append(f"**Next deletion:** <t:{int(b['next_delete'])}:R>")
+        if self.archive.last_sweep:
+            lines.append(f"Last sweep <t:{int(self.archive.last_sweep)}:R> · {self.archive.deleted} deleted · "
+                         f"{self.archive.failures} failed")
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
     # /ticketpanel — idempotent
     @app_commands.command(name="ticketpanel", description="Send/refresh the ticket panel (staff only).")
     @app_commands.guild_only()
@@ -287,13 +854,14 @@ class Tickets(commands.Cog, name="Tickets"):
     @app_commands.command(name="close", description="Close the current ticket.")
     @app_commands.guild_only()
     async def close(self, interaction: discord.Interaction):
-        # only staff or opener can close — we enforce via the modal handler too, but guard here as well
-        staff = _get_staff_role(interaction.guild)
-        if staff and staff not in interaction.user.roles:
-            # allow opener user as fallback: check channel topic opener id marker
-            ch = interaction.channel
-            if isinstance(ch, discord.TextChannel):
-                pass  # we allow the modal but will enforce in the view; simplest UX: just show modal
+        # only staff or the opener, and only inside an open ticket (close_ticket checks again on submit)
+        ch = interaction.channel
+        if not isinstance(ch, discord.TextChannel) or not _is_open_ticket(self, ch):
+            await interaction.response.send_message("This isn't a ticket channel.", ephemeral=True)
+            return
+        if not await _can_close(self.bot, self, interaction.user, ch):
+            await interaction.response.send_message("You can't close this ticket.", ephemeral=True)
+            return
         await interaction.response.send_modal(CloseReasonModal())
 
 async def setup(bot: commands.Bot):
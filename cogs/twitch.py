@@ -2,70 +2,128 @@
 import aiohttp
 import discord
 from discord.ext import commands, tasks
-import time
 
 import config
+from utils import settings
+from utils.dispatcher import dispatch, ANNOUNCEMENT, AUDIT, HEARTBEAT
+from utils.perf import timer
+from utils.tokens import TokenError, TokenManager
+from utils.ttlcache import TTLCache
 
 TWITCH_TOKEN_URL = "https://id.twitch.tv/oauth2/token"
 TWITCH_STREAMS_URL = "https://api.twitch.tv/helix/streams"
+TWITCH_USERS_URL = "https://api.twitch.tv/helix/users"
+TWITCH_GAMES_URL = "https://api.twitch.tv/helix/games"
 TWITCH_PURPLE = 0x9146FF  # Twitch brand purple
 
+# Profile images and game names/box art rarely change; cache them instead of asking every poll.
+HELIX_METADATA_TTL = getattr(config, "TWITCH_METADATA_TTL", 6 * 3600)
+HELIX_MAX_IDS = 100  # Helix accepts up to 100 id= params per /users or /games request
+
 HEARTBEAT_EVERY_POLLS = 5  # send a lightweight "searching..." heartbeat every N polls to Bot Logs
 
 class TwitchCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._session: aiohttp.ClientSession | None = None
-        self._app_access_token: str | None = None
-        self._token_expiry: float = 0.0
-        self._was_live = False
+        self.tokens = TokenManager("twitch", self._fetch_app_access_token)
+        # Carried over from the last run so a restart mid-stream doesn't announce it again.
+        warmstate = self._warmstate()
+        warm = warmstate.section("twitch", {}) if warmstate else {}
+        self._was_live = bool(warm.get("was_live", False))
+        self._live_started_at: str | None = warm.get("started_at")
         self._warned_missing_creds = False
         self._poll_counter = 0
+        self._users: TTLCache[dict] = TTLCache(HELIX_METADATA_TTL, maxsize=512)
+        self._games: TTLCache[dict] = TTLCache(HELIX_METADATA_TTL, maxsize=2048)
+        self.helix_requests = 0
+        if warmstate:
+            warmstate.register("twitch", self._warm_section)
         self.poll_twitch.start()
 
     def cog_unload(self):
         self.poll_twitch.cancel()
+        self.tokens.close()
+        if self._warmstate():
+            self._warmstate().unregister("twitch")
+
+    def _warmstate(self):
+        return getattr(self.bot, "warmstate", None)
+
+    def _warm_section(self) -> dict:
+        return {"was_live": self._was_live, "started_at": self._live_started_at}
 
     async def _ensure_session(self):
         if self._session is None or self._session.closed:
             self._session = aiohttp.ClientSession()
 
-    async def _log_bot(self, message: str):
-        """Log to the Bot Logs channel."""
-        chan = self.bot.get_channel(config.BOT_LOGS_CHANNEL_ID)
+    async def _log_bot(self, message: str, priority: int = AUDIT, coalesce_key: str | None = None):
+        """Log to the Bot Logs channel (queued through the dispatcher)."""
+        chan_id = settings.current().bot_logs_channel_id
+        chan = self.bot.get_channel(chan_id) if chan_id else None
         if isinstance(chan, discord.TextChannel):
-            await chan.send(message)
-
-    async def _get_app_access_token(self) -> str | None:
-        # Return cached if still valid
-        if self._app_access_token and time.time() < self._token_expiry - 60:
-            return self._app_access_token
-
-        cid = (getattr(config, "TWITCH_CLIENT_ID", "") or "").strip()
-        secret = (getattr(config, "TWITCH_CLIENT_SECRET", "") or "").strip()
-        if not cid or not secret:
-            return None
+            dispatch(self.bot, chan, message, priority=priority, coalesce_key=coalesce_key)
 
+    async def _fetch_app_access_token(self) -> tuple[str, float]:
+        """Raw client-credentials call; TokenManager handles caching, single-flight and retries."""
         await self._ensure_session()
-        await self._log_bot("🔐 Refreshing Twitch app access token…")
         async with self._session.post(
             TWITCH_TOKEN_URL,
-            params={"client_id": cid, "client_secret": secret, "grant_type": "client_credentials"},
+            params={
+                "client_id": config.TWITCH_CLIENT_ID.strip(),
+                "client_secret": config.TWITCH_CLIENT_SECRET.strip(),
+                "grant_type": "client_credentials",
+            },
         ) as resp:
             if resp.status != 200:
-                await self._log_bot(f"❌ Token request failed (HTTP {resp.status}).")
-                return None
+                raise RuntimeError(f"HTTP {resp.status}")
             data = await resp.json()
-            self._app_access_token = data.get("access_token")
-            self._token_expiry = time.time() + data.get("expires_in", 0)
-            await self._log_bot("✅ Token acquired.")
-            return self._app_access_token
+        return data["access_token"], data.get("expires_in", 0)
+
+    async def _get_app_access_token(self) -> str | None:
+        cid = (getattr(config, "TWITCH_CLIENT_ID", "") or "").strip()
+        secret = (getattr(config, "TWITCH_CLIENT_SECRET", "") or "").strip()
+        if not cid or not secret:
+            return None
+        try:
+            return await self.tokens.get()
+        except TokenError as e:
+            await self._log_bot(f"❌ {e}")
+            return None
+
+    async def _helix_lookup(self, url: str, cache: TTLCache, ids: list[str]) -> dict[str, dict | None]:
+        """
+        Resolve Helix ids through `cache`; only ids not cached (or expired) are fetched,
+        HELIX_MAX_IDS per request. Unknown ids are cached as None so they aren't retried every poll.
+        """
+        ids = [i for i in ids if i]
+        missing = cache.missing(ids)
+        if missing:
+            token = await self._get_app_access_token()
+            if token:
+                await self._ensure_session()
+                headers = {"Client-ID": config.TWITCH_CLIENT_ID, "Authorization": f"Bearer {token}"}
+                for start in range(0, len(missing), HELIX_MAX_IDS):
+                    batch = missing[start:start + HELIX_MAX_IDS]
+                    self.helix_requests += 1
+                    async with self._session.get(url, headers=headers, params=[("id", i) for i in batch]) as resp:
+                        if resp.status != 200:
+                            if resp.status == 401:
+                                self.tokens.invalidate()
+                            await self._log_bot(f"❌ Helix lookup failed (HTTP {resp.status}).")
+                            break
+                        payload = await resp.json()
+                    found = {row.get("id"): row for row in payload.get("data", [])}
+                    for i in batch:
+                        cache.set(i, found.get(i))
+        return {i: cache.get(i) for i in ids}
 
     async def _is_live(self) -> tuple[bool, dict]:
         """
-        Returns (is_live, data). If live, data includes: title, game_name, thumbnail_url.
+        Returns (is_live, data). If live, data includes: title, game_name, thumbnail_url,
+        plus (from the metadata cache) user_name, profile_image_url and box_art_url.
         """
-        username = (getattr(config, "TWITCH_USERNAME", "") or "").lower().strip()
+        username = settings.current().twitch_username
         if not username:
             return (False, {})
 
@@ -81,6 +139,8 @@ class TwitchCog(commands.Cog):
         params = {"user_login": username}
         async with self._session.get(TWITCH_STREAMS_URL, headers=headers, params=params) as resp:
             if resp.status != 200:
+                if resp.status == 401:
+                    self.tokens.invalidate()  # revoked early; next poll fetches a new one
                 await self._log_bot(f"❌ Helix /streams failed (HTTP {resp.status}).")
                 return (False, {})
             payload = await resp.json()
@@ -88,24 +148,35 @@ class TwitchCog(commands.Cog):
             if not streams:
                 return (False, {})
             s = streams[0]
-            data = {
-                "title": s.get("title", ""),
-                "game_name": s.get("game_name", "") or s.get("game_id", ""),
-                "thumbnail_url": s.get("thumbnail_url", ""),  # contains {width}x{height}
-            }
-            return (True, data)
+        # Only resolved while live, and cached for HELIX_METADATA_TTL: normally zero extra requests per poll.
+        user = (await self._helix_lookup(TWITCH_USERS_URL, self._users, [s.get("user_id", "")])).get(s.get("user_id", ""))
+        game = (await self._helix_lookup(TWITCH_GAMES_URL, self._games, [s.get("game_id", "")])).get(s.get("game_id", ""))
+        data = {
+            "title": s.get("title", ""),
+            "game_name": s.get("game_name", "") or (game or {}).get("name", ""),
+            "thumbnail_url": s.get("thumbnail_url", ""),  # contains {width}x{height}
+            "user_name": s.get("user_name", "") or (user or {}).get("display_name", ""),
+            "profile_image_url": (user or {}).get("profile_image_url", ""),
+            "box_art_url": (game or {}).get("box_art_url", ""),  # contains {width}x{height}
+            "started_at": s.get("started_at", ""),
+        }
+        return (True, data)
 
     @tasks.loop(seconds=getattr(config, "TWITCH_POLL_SECONDS", 60))
     async def poll_twitch(self):
+        async with timer(self.bot, "task:poll_twitch"):
+            await self._poll_once()
+
+    async def _poll_once(self):
         # Heartbeat (throttled) so you can see it's actively searching
         self._poll_counter += 1
         if self._poll_counter % HEARTBEAT_EVERY_POLLS == 1:  # 1, 6, 11, …
-            await self._log_bot("🔎 Polling Twitch for live status…")
+            await self._log_bot("🔎 Polling Twitch for live status…", priority=HEARTBEAT, coalesce_key="twitch_poll")
 
         # If creds are missing, warn once and keep looping (so it self-heals after you add creds)
-        if not (getattr(config, "TWITCH_CLIENT_ID", "") and getattr(config, "TWITCH_CLIENT_SECRET", "") and getattr(config, "TWITCH_USERNAME", "")):
+        if not (getattr(config, "TWITCH_CLIENT_ID", "") and getattr(config, "TWITCH_CLIENT_SECRET", "") and settings.current().twitch_username):
             if not self._warned_missing_creds:
-                await self._log_bot("⚠️ Twitch notifications disabled: set TWITCH_CLIENT_ID/SECRET/USERNAME in config.py")
+                await self._log_bot("⚠️ Twitch notifications disabled: set TWITCH_CLIENT_ID/SECRET in config.py and the Twitch username in settings")
                 self._warned_missing_creds = True
             return
 
@@ -116,20 +187,26 @@ class TwitchCog(commands.Cog):
                 await self._log_bot(f"🟣 Processing: LIVE detected — title='{data.get('title','')}', game='{data.get('game_name','')}'.")
             else:
                 if self._poll_counter % HEARTBEAT_EVERY_POLLS == 1:
-                    await self._log_bot("🟡 Processing: still offline.")
+                    await self._log_bot("🟡 Processing: still offline.", priority=HEARTBEAT, coalesce_key="twitch_status")
 
-            # Post when it goes offline → live (and on first detection after startup)
-            if is_live and not self._was_live:
+            # Post when it goes offline → live, or when a different stream started while we were down
+            started_at = data.get("started_at") or None
+            new_stream = bool(started_at and self._live_started_at and started_at != self._live_started_at)
+            if is_live and (not self._was_live or new_stream):
                 await self._log_bot("📣 Announcing go-live…")
                 await self._announce_live(data)
                 await self._log_bot("✅ Go-live announcement sent.")
+            changed = is_live != self._was_live or new_stream
             self._was_live = is_live
+            self._live_started_at = started_at if is_live else None
+            if changed and self._warmstate():
+                self._warmstate().save()
 
         except Exception as e:
             await self._log_bot(f"❌ Twitch poll error: `{e}`")
 
     async def _announce_live(self, data: dict):
-        username = config.TWITCH_USERNAME.lower()
+        username = settings.current().twitch_username
         url = f"https://www.twitch.tv/{username}"
 
         title = data.get("title") or "Streaming on Twitch!"
@@ -138,6 +215,10 @@ class TwitchCog(commands.Cog):
         # Replace {width}x{height} with actual size to get a preview image.
         if "{width}" in thumb and "{height}" in thumb:
             thumb = thumb.replace("{width}", "1280").replace("{height}", "720")
+        # Discord caches embed images by URL; a per-stream query string avoids showing an old preview.
+        if thumb and data.get("started_at"):
+            thumb += f"?t={int(discord.utils.parse_time(data['started_at']).timestamp())}"
+        box_art = (data.get("box_art_url") or "").replace("{width}", "144").replace("{height}", "192")
 
         embed = discord.Embed(
             title="🔴 LIVE NOW",
@@ -147,29 +228,38 @@ class TwitchCog(commands.Cog):
         embed.add_field(name="Game", value=game, inline=True)
         embed.add_field(name="Watch", value=f"[twitch.tv/{username}]({url})", inline=True)
         embed.set_image(url=thumb)
+        if data.get("profile_image_url"):
+            embed.set_author(name=data.get("user_name") or username, url=url, icon_url=data["profile_image_url"])
+        if box_art:
+            embed.set_thumbnail(url=box_art)
         embed.set_footer(text="Twitch", icon_url="https://static.twitchcdn.net/assets/favicon-32-e29e246c157142c94346.png")
 
-        ann = self.bot.get_channel(config.ANNOUNCEMENT_CHANNEL_ID)
+        ann_id = settings.current().announcement_channel_id
+        ann = self.bot.get_channel(ann_id) if ann_id else None
         if not isinstance(ann, discord.TextChannel):
             await self._log_bot("❌ Announcement channel not found or not a text channel.")
             return
 
         # Role ping: "Stream Notis"
-        role_name = getattr(config, "STREAM_NOTIS_ROLE_NAME", "Stream Notis")
+        role_name = settings.current().stream_role_name
         role = discord.utils.get(ann.guild.roles, name=role_name)
         content = role.mention if role else None
         if role is None:
             await self._log_bot(f"⚠️ Role '{role_name}' not found; sending announcement without a ping.")
 
-        await ann.send(
+        # Highest priority: jumps ahead of anything queued for this channel.
+        await dispatch(
+            self.bot, ann,
             content=content,
             embed=embed,
-            allowed_mentions=discord.AllowedMentions(roles=True)
+            allowed_mentions=discord.AllowedMentions(roles=True),
+            priority=ANNOUNCEMENT,
         )
 
-        gl = self.bot.get_channel(config.GENERAL_LOGS_CHANNEL_ID)
+        gl_id = settings.current().general_logs_channel_id
+        gl = self.bot.get_channel(gl_id) if gl_id else None
         if isinstance(gl, discord.TextChannel):
-            await gl.send("📺 Detected **live** on Twitch (offline → live).")
+            dispatch(self.bot, gl, "📺 Detected **live** on Twitch (offline → live).", priority=AUDIT)
 
     @poll_twitch.before_loop
     async def before_poll(self):
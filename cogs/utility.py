@@ -1,10 +1,16 @@
 # cogs/utility.py
+import time
+
 import discord
 from discord.ext import commands
 from discord import app_commands
 
 import config
 from utils.checks import in_allowed_guilds, perm_level
+from utils import errors, settings
+from utils.paginator import Paginator, aiter_lines, list_source
+from utils.perf import format_table
+from utils.tokens import all_metrics as token_metrics
 
 
 class Utility(commands.Cog):
@@ -23,11 +29,126 @@ class Utility(commands.Cog):
     @in_allowed_guilds()
     @perm_level("admin")
     async def roleids(self, interaction: discord.Interaction):
-        roles = sorted(interaction.guild.roles, key=lambda r: r.position, reverse=True)
-        lines = [f"`{r.id}` — {r.name}" for r in roles if r.name != "@everyone"]
-        content = "Role IDs:\n" + "\n".join(lines) if lines else "No roles found."
+        roles = [r for r in sorted(interaction.guild.roles, key=lambda r: r.position, reverse=True) if not r.is_default()]
+        fetch, pages = list_source([f"`{r.id}` — {discord.utils.escape_markdown(r.name)}" for r in roles])
+        view = Paginator(interaction.user.id, f"Role IDs ({len(roles)})", fetch, total_pages=pages,
+                         export=lambda: aiter_lines(f"{r.id}\t{r.name}" for r in roles),
+                         export_name=f"roles-{interaction.guild.id}.tsv", empty="No roles found.")
+        await view.start(interaction)
+
+    # ADMIN: handler latency percentiles
+    @app_commands.command(name="perfstats", description="Show p50/p95/p99 latency per handler.")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def perfstats(self, interaction: discord.Interaction):
+        perf = getattr(self.bot, "perf", None)
+        if perf is None:
+            await interaction.response.send_message("Timing is not enabled.", ephemeral=True)
+            return
+        table = format_table(perf.snapshot())
+        header = f"**Handler latency (ms)** · slow ≥ {perf.slow_ms:.0f} ms"
+        cache = getattr(self.bot, "member_cache", None)
+        if cache is not None:
+            c = cache.snapshot()
+            header += (f"\nReady in `{c['ready_seconds']}s` · RSS `{c['rss_mb']} MiB` · "
+                       f"`{c['cached_members']}` cached members ({c['policy']})")
+        for name, t in sorted(token_metrics().items()):
+            if t["has_token"]:
+                header += (f"\n🔐 {name} token: age `{t['age_seconds']:.0f}s` · expires in `{t['expires_in_seconds']:.0f}s` · "
+                           f"`{t['refreshes']}` refreshes ({t['failures']} failed)")
+        scheduler = getattr(self.bot, "scheduler", None)
+        if scheduler is not None:
+            j = scheduler.snapshot()
+            nxt = f" · next in `{j['next_due_in']:.0f}s`" if j["next_due_in"] is not None else ""
+            header += f"\n⏰ scheduler: `{j['pending']}` pending{nxt} · {j['ran']} ran ({j['failed']} failed)"
+        warm = getattr(self.bot, "warmstate", None)
+        if warm is not None and warm.saves:
+            w = warm.snapshot()
+            header += f"\n♨️ warm state: saved `{w['saved_ago']:.0f}s` ago · {', '.join(w['sections'])}"
+        bus = getattr(self.bot, "eventbus", None)
+        if bus is not None:
+            for name, lane in sorted(bus.snapshot().items()):
+                if lane["processed"] or lane["queued"] or lane["dropped"]:
+                    header += (f"\n📬 {name}: `{lane['queued']}`/{lane['capacity']} queued (max {lane['max_queued']}) · "
+                               f"`{lane['busy']}`/{lane['workers']} busy · {lane['dropped']} dropped · "
+                               f"{lane['timeouts']} timed out")
+        # The header grows with every service; the table gets whatever is left of the 2000-char limit.
+        header = header[:1500]
+        room = 2000 - len(header) - len("\n```\n\n```")
+        if len(table) > room:
+            table = table[:room - 2].rsplit("\n", 1)[0] + "\n…"
+        content = f"{header}\n```\n{table}\n```"
         await interaction.response.send_message(content, ephemeral=True)
 
+    # ADMIN: event-loop lag + recent blocking stalls
+    @app_commands.command(name="loopstats", description="Show event-loop lag percentiles and recent stalls.")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def loopstats(self, interaction: discord.Interaction):
+        mon = getattr(self.bot, "loopmon", None)
+        if mon is None:
+            await interaction.response.send_message("Loop monitor is not running.", ephemeral=True)
+            return
+        s = mon.snapshot()
+        lines = [
+            f"**Event loop lag** ({s['samples']} samples): p50 `{s['p50_ms']} ms` · p95 `{s['p95_ms']} ms` · "
+            f"p99 `{s['p99_ms']} ms` · max `{s['max_ms']} ms`",
+            f"Stalls ≥ {s['threshold_ms']} ms: **{s['stalls']}**",
+        ]
+        for stall in reversed(mon.recent_stalls(2)):
+            lines.append(f"<t:{int(stall.started_at)}:R> — {stall.duration_ms:.0f} ms\n```py\n{stall.top_frames(4)[-700:]}```")
+        await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+    # ADMIN: most frequent error fingerprints
+    @app_commands.command(name="errors", description="Show the most frequent error fingerprints.")
+    @app_commands.describe(limit="How many fingerprints to list (default 10)")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def errors(self, interaction: discord.Interaction, limit: app_commands.Range[int, 1, 25] = 10):
+        tracker = getattr(self.bot, "errors", None)
+        if tracker is None:
+            await interaction.response.send_message("Error tracking is not enabled.", ephemeral=True)
+            return
+        top = tracker.top(limit)
+        if not top:
+            await interaction.response.send_message("No errors recorded since startup. 🎉", ephemeral=True)
+            return
+        snap = tracker.snapshot()
+        lines = [f"**Errors**: {snap['total']} total · {snap['fingerprints']} fingerprints · {snap['suppressed']} suppressed"]
+        for s in top:
+            lines.append(
+                f"`{s.fingerprint}` ×**{s.count}** · **{s.exc_type}** in `{s.where}` · last <t:{int(s.last_seen)}:R>\n"
+                f"  ↳ `{' → '.join(s.frames)[:150]}` — {discord.utils.escape_markdown(s.message[:120])}"
+            )
+        await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+    # ADMIN: reload data/settings.json without restarting
+    @app_commands.command(name="reloadconfig", description="Reload settings (guilds, log channels, roles) from disk.")
+    @app_commands.describe(write="Write the current settings to the settings file first (creates it if missing)")
+    @in_allowed_guilds()
+    @perm_level("admin")
+    async def reloadconfig(self, interaction: discord.Interaction, write: bool = False):
+        old = settings.current()
+        t0 = time.perf_counter()
+        try:
+            if write:
+                settings.write_current()
+            new = settings.reload()
+        except (settings.SettingsError, OSError) as e:
+            await interaction.response.send_message(f"❌ Settings not reloaded (previous settings still active):\n`{e}`", ephemeral=True)
+            return
+        except Exception as e:
+            errors.capture(self.bot, e, where="reloadconfig", guild_id=interaction.guild_id)
+            await interaction.response.send_message(f"❌ Settings not reloaded (previous settings still active):\n`{type(e).__name__}: {e}`", ephemeral=True)
+            return
+        ms = (time.perf_counter() - t0) * 1000
+        changed = settings.diff(old, new)
+        await interaction.response.send_message(
+            f"⚙️ Reloaded from `{new.source}` in {ms:.1f} ms — "
+            f"{'changed: ' + ', '.join(f'`{c}`' for c in changed) if changed else 'no changes'}.",
+            ephemeral=True,
+        )
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Utility(bot))
@@ -12,6 +12,56 @@ BOT_STATUS_TEXT = "Hububba Utilities ∞"
 LOG_FILE_PATH = "/home/HububbaUtils/logs/bot.log"
 LOG_MAX_BYTES = 5 * 1024 * 1024
 LOG_BACKUP_COUNT = 3
+# Local audit archive behind /auditsearch (SQLite); events older than this are pruned daily.
+AUDIT_DB_PATH = "data/audit.db"
+AUDIT_RETENTION_DAYS = 90
+# Numbered moderation cases (/modlog, /case); never pruned.
+MODCASES_DB_PATH = "data/modcases.db"
+# Each distinct error (fingerprint) is posted once per window; repeats are summarised as ×N.
+ERROR_REPORT_WINDOW_SECONDS = 300
+
+# ===== SCHEDULER =====
+# Tempban expiries, timed unlocks and order deadline reminders (survive restarts).
+SCHEDULER_PATH = "data/scheduler.json"
+
+# ===== WARM RESTART =====
+# Command-tree fingerprints and Twitch live state, saved every
+# WARMSTATE_SAVE_SECONDS and on shutdown; ignored at boot when older than WARMSTATE_MAX_AGE_SECONDS.
+WARMSTATE_PATH = "data/warmstate.json"
+WARMSTATE_SAVE_SECONDS = 300
+WARMSTATE_MAX_AGE_SECONDS = 6 * 3600
+
+# ===== LOCKDOWN =====
+# /lockdown saves every channel's @everyone overwrite here first; /lockdown_end restores them.
+LOCKDOWN_PATH = "data/lockdown.json"
+LOCKDOWN_CONCURRENCY = 5      # permission edits in flight at once
+LOCKDOWN_MIN_INTERVAL = 0.05  # seconds between edit starts (widens automatically when rate-limited)
+
+# ===== SETTINGS FILE =====
+# Guild ids, log channels, role names/maps and channel ids live in this file when it exists
+# (/reloadconfig write:True creates it from the values below); edits are picked up without a restart.
+SETTINGS_PATH = "data/settings.json"
+SETTINGS_WATCH_SECONDS = 2.0
+
+# ===== RUNTIME =====
+# Opt-in: uvloop event loop + orjson store serialization (each only if installed).
+FAST_RUNTIME = False
+# Indent JSON stores on disk (slower, bigger; handy when hand-editing data/*.json).
+PRETTY_JSON_STORES = False
+
+# ===== EVENT BUS =====
+# Each cog's listeners run on its own bounded queue + worker pool; events beyond the queue size are dropped
+# (and counted in /perfstats), and a handler running longer than the timeout is cancelled.
+EVENTBUS_WORKERS = 4
+EVENTBUS_QUEUE_SIZE = 1000
+EVENTBUS_HANDLER_TIMEOUT = 15.0
+
+# ===== MEMBER CACHE =====
+# "lean": no chunking at startup; cache members seen recently or holding staff roles, fetch others on demand.
+# "full": discord.py default (every member of every guild downloaded before ready).
+MEMBER_CACHE_POLICY = "lean"
+MEMBER_CACHE_TTL_SECONDS = 6 * 3600
+MEMBER_CACHE_FETCHED_MAX = 2048
 
 # ===== BRANDING / COLORS =====
 BRAND_COLOR = 0x9B59B6
@@ -27,6 +77,22 @@ COMMISSION_CATEGORY_NAME = "Commission Tickets"
 COMPLAINT_CATEGORY_NAME  = "Complaint Tickets"
 ARCHIVE_CATEGORY_NAME    = "Ticket Archive"
 
+# ===== TICKETS =====
+# Hidden channels pre-created per guild so a new ticket only needs one edit (0 disables the pool).
+TICKET_POOL_SIZE = 3
+TICKET_POOL_REFILL_SECONDS = 2.0
+# Closed tickets fill "Closed Tickets", "Closed Tickets 2", … and are deleted (after a transcript is saved
+# to data/transcripts/) this many days after closing — earlier when the guild nears 500 channels.
+TICKET_ARCHIVE_RETENTION_DAYS = 14
+TICKET_MIN_CHANNEL_HEADROOM = 25
+TICKET_SWEEP_CONCURRENCY = 3
+# Ticket opens: each user gets TICKET_USER_BURST at once, then TICKET_USER_PER_HOUR; the guild as a whole
+# TICKET_GUILD_BURST, then TICKET_GUILD_PER_MINUTE. A second open of the same type links the existing ticket.
+TICKET_USER_BURST = 2
+TICKET_USER_PER_HOUR = 4
+TICKET_GUILD_BURST = 10
+TICKET_GUILD_PER_MINUTE = 10
+
 # ===== FILE PATHS =====
 DATA_DIR    = "/home/HububbaUtils/data"
 ORDERS_FILE = f"{DATA_DIR}/orders.json"
@@ -37,6 +103,10 @@ PAYPAL_SECRET    = "ECOFuVgXVUSqCtEOPiGe8gPyMEXtg6w_Mr5V3OS-WivGvia2qVQJbBxs1dgE
 
 PAYPAL_OAUTH_URL   = "https://api-m.paypal.com/v1/oauth2/token"
 PAYPAL_INVOICE_URL = "https://api-m.paypal.com/v2/invoicing/invoices"
+PAYPAL_CURRENCY     = "USD"
+PAYPAL_SYNC_MINUTES = 10   # how often invoiced orders are checked for payment
+ORDER_DEADLINE_REMINDER_HOURS = 24  # reminder in the ticket this long before a (parseable) deadline
+ORDER_IMPORT_MAX_MB = 50            # largest file /order_import accepts
 
 # ===== ALLOWED GUILDS =====
 ALLOWED_GUILDS = [HUBUBBA_GUILD_ID, PROJECT_INFINITE_ID]
@@ -0,0 +1,420 @@
+# loadtest/run.py
+"""
+End-to-end load test: the real bot from main.py against loadtest/standin.py.
+
+    python -m loadtest.run                                 # all scenarios, default sizes
+    python -m loadtest.run --scenarios joins deletes --scale 5
+    python -m loadtest.run --latency-ms 120 --out loadtest/report.json
+
+No token and no Discord connection: REST calls go to the local stand-in and
+gateway traffic is synthesised as raw payloads fed to the bot's ConnectionState
+parsers (the same entry point the websocket uses). The harness records handler
+latency per event, interaction acknowledgement latency, outbound request counts
+(including 429s) and dispatcher queue backlogs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from discord.http import Route
+
+import config
+from loadtest.standin import StandIn, channel_payload, iso, message_payload, snowflake, user_payload
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ("joins", "deletes", "tickets", "purges", "twitch", "paypal")
+
+
+# ===== WORLD =====
+class World:
+    """Ids for one synthetic guild, shaped after the real config (first allowed guild)."""
+
+    def __init__(self, app_id: int, staff_count: int = 5):
+        self.guild_id = config.HUBUBBA_GUILD_ID
+        self.app_id = app_id
+        self.role_ids = {name: snowflake() for name in ("Member", "Staff Perms Role", "Admin+ Perms", "Stream Notis")}
+        self.channels = {name: snowflake() for name in ("general", "logs", "bot-logs", "welcome", "announcements")}
+        self.tickets_category = snowflake()
+        self.staff = [user_payload(snowflake(), f"staff{i}") for i in range(staff_count)]
+
+    def guild_payload(self, bot_user: dict) -> dict:
+        roles = [{"id": str(self.guild_id), "name": "@everyone", "permissions": "1024", "position": 0,
+                  "color": 0, "hoist": False, "managed": False, "mentionable": False}]
+        for i, (name, rid) in enumerate(self.role_ids.items(), start=1):
+            roles.append({"id": str(rid), "name": name, "permissions": "0", "position": i,
+                          "color": 0, "hoist": False, "managed": False, "mentionable": True})
+        channels = [channel_payload(cid, self.guild_id, name) for name, cid in self.channels.items()]
+        channels.append(channel_payload(self.tickets_category, self.guild_id, "Tickets", ctype=4))
+        members = [self.member_payload(bot_user, [])]
+        members += [self.member_payload(u, [self.role_ids["Staff Perms Role"]]) for u in self.staff]
+        return {
+            "id": str(self.guild_id), "name": "Load Test Guild", "icon": None, "owner_id": str(snowflake()),
+            "roles": roles, "channels": channels, "members": members, "threads": [], "emojis": [], "stickers": [],
+            "features": [], "member_count": len(members), "large": False, "unavailable": False,
+            "verification_level": 0, "default_message_notifications": 0, "explicit_content_filter": 0,
+            "mfa_level": 0, "premium_tier": 0, "system_channel_flags": 0, "preferred_locale": "en-US",
+            "afk_timeout": 300, "nsfw_level": 0, "premium_progress_bar_enabled": False,
+        }
+
+    @staticmethod
+    def member_payload(user: dict, roles: List[int]) -> dict:
+        return {"user": user, "roles": [str(r) for r in roles], "joined_at": iso(), "deaf": False, "mute": False,
+                "flags": 0, "nick": None}
+
+    def apply_config(self):
+        """Point the config lookups the cogs do at this world's ids (process-local overlay)."""
+        c = self.channels
+        config.LOG_CHANNELS = {self.guild_id: {"GENERAL": c["logs"], "BOT": c["bot-logs"], "WELCOME": c["welcome"]}}
+        config.ROLE_MAP = {self.guild_id: {"AUTO": "Member"}}
+        config.SUPER_ROLE_NAME = getattr(config, "SUPER_ROLE_NAME", "Owner")
+        config.ADMIN_ROLE_NAME = getattr(config, "ADMIN_ROLE_NAME", "Admin+ Perms")
+        config.STAFF_ROLE_NAME = getattr(config, "STAFF_ROLE_NAME", "Staff Perms Role")
+        config.BOT_LOGS_CHANNEL_ID = c["bot-logs"]
+        config.GENERAL_LOGS_CHANNEL_ID = c["logs"]
+        config.ANNOUNCEMENT_CHANNEL_ID = c["announcements"]
+        config.TWITCH_CLIENT_ID = "loadtest"
+        config.TWITCH_CLIENT_SECRET = "loadtest"
+        config.TWITCH_USERNAME = "hububba"
+        config.PAYPAL_CLIENT_ID = "loadtest"
+        config.PAYPAL_SECRET = "loadtest"
+
+
+# ===== RECORDING =====
+class Recorder:
+    def __init__(self):
+        self.handler_ms: Dict[str, List[float]] = defaultdict(list)
+        self.handler_errors: Dict[str, int] = defaultdict(int)
+        self.injected: Dict[int, tuple] = {}  # interaction id -> (kind, monotonic)
+        self.backlog_samples: List[dict] = []
+        self.max_backlog: Dict[str, int] = defaultdict(int)
+
+    def wrap_run_event(self, bot):
+        original = bot._run_event
+
+        async def timed(coro, event_name, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                await original(coro, event_name, *args, **kwargs)
+            finally:
+                self.handler_ms[event_name].append((time.perf_counter() - t0) * 1000)
+
+        bot._run_event = timed
+
+    async def sample_backlog(self, bot, every: float = 0.1):
+        while True:
+            dispatcher = getattr(bot, "dispatcher", None)
+            if dispatcher is not None:
+                queued = dispatcher.metrics()["queued"]
+                self.backlog_samples.append({"t": round(time.monotonic(), 3), **queued})
+                for k, v in queued.items():
+                    self.max_backlog[k] = max(self.max_backlog[k], v)
+            await asyncio.sleep(every)
+
+    @staticmethod
+    def stats(values: List[float]) -> dict:
+        if not values:
+            return {"count": 0}
+        v = sorted(values)
+
+        def pct(p):
+            return round(v[min(len(v) - 1, int(round(p / 100 * (len(v) - 1))))], 2)
+
+        return {"count": len(v), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(v[-1], 2)}
+
+
+# ===== TRAFFIC =====
+class Traffic:
+    def __init__(self, bot, world: World, recorder: Recorder, rate: float):
+        self.bot = bot
+        self.state = bot._connection
+        self.world = world
+        self.rec = recorder
+        self.rate = rate
+        self.invoiced: List[int] = []  # order ids sent through /order_invoice
+
+    def gw(self, event: str, data: dict):
+        # Same call the gateway makes for a DISPATCH frame.
+        self.state.parsers[event](data)
+
+    async def pace(self, i: int):
+        if self.rate and i % max(1, int(self.rate / 50)) == 0:
+            await asyncio.sleep(max(1, int(self.rate / 50)) / self.rate)
+
+    def interaction(self, itype: int, data: dict, user: dict, roles: List[int], kind: str) -> dict:
+        iid = snowflake()
+        self.rec.injected[iid] = (kind, time.monotonic())
+        cid = self.world.channels["general"]
+        return {
+            "id": str(iid), "application_id": str(self.world.app_id), "type": itype, "token": f"tok{iid}",
+            "version": 1, "guild_id": str(self.world.guild_id), "channel_id": str(cid),
+            "channel": channel_payload(cid, self.world.guild_id, "general"),
+            "member": {**self.world.member_payload(user, roles), "permissions": "0"},
+            "data": data, "locale": "en-US", "guild_locale": "en-US", "app_permissions": str(2**53 - 1),
+            "attachment_size_limit": 10 * 1024 * 1024,
+            "entitlements": [], "authorizing_integration_owners": {"0": str(self.world.guild_id)}, "context": 0,
+        }
+
+    async def join_storm(self, n: int):
+        for i in range(n):
+            user = user_payload(snowflake(), f"raider{i}")
+            self.gw("GUILD_MEMBER_ADD", {**self.world.member_payload(user, []), "guild_id": str(self.world.guild_id)})
+            await self.pace(i)
+
+    async def delete_flood(self, n: int):
+        cid = self.world.channels["general"]
+        author = user_payload(snowflake(), "spammer")
+        ids = []
+        for i in range(n):
+            msg = message_payload(cid, author, f"spam message {i}")
+            msg["guild_id"] = str(self.world.guild_id)
+            msg["member"] = {"roles": [], "joined_at": iso(), "deaf": False, "mute": False, "flags": 0}
+            self.gw("MESSAGE_CREATE", msg)
+            ids.append(msg["id"])
+        for i, mid in enumerate(ids):
+            self.gw("MESSAGE_DELETE", {"id": mid, "channel_id": str(cid), "guild_id": str(self.world.guild_id)})
+            await self.pace(i)
+
+    async def ticket_modals(self, n: int):
+        from cogs.tickets import CommissionModal, SupportModal
+
+        for i in range(n):
+            user = user_payload(snowflake(), f"customer{i}")
+            commission = i % 3 == 0
+            modal = CommissionModal() if commission else SupportModal()
+            # What send_modal() does on the bot side before the user submits.
+            self.state.store_view(modal)
+            # Field values in the modal's declaration order.
+            values = [f"Website {i}", "$100", "Nov 30", "pls"] if commission else [f"Help {i}", "Cannot log in"]
+            rows = [{"type": 1, "components": [{"type": 4, "custom_id": item.custom_id, "value": value}]}
+                    for item, value in zip(modal.children, values)]
+            payload = self.interaction(5, {"custom_id": modal.custom_id, "components": rows}, user, [], "ticket_modal")
+            self.gw("INTERACTION_CREATE", payload)
+            await self.pace(i)
+
+    async def purges(self, n: int, amount: int = 50):
+        staff = self.world.staff[0]
+        for i in range(n):
+            data = {"id": str(snowflake()), "name": "purge", "type": 1,
+                    "options": [{"name": "amount", "type": 4, "value": amount}]}
+            payload = self.interaction(2, data, staff, [self.world.role_ids["Staff Perms Role"]], "purge")
+            self.gw("INTERACTION_CREATE", payload)
+            await asyncio.sleep(0.05)
+
+    async def invoices(self, n: int):
+        """Commission orders invoiced through /order_invoice; the sync task then picks up payments."""
+        from cogs.orders import create_order_from_ticket
+
+        staff = self.world.staff[0]
+        for i in range(n):
+            user = user_payload(snowflake(), f"client{i}")
+            order = create_order_from_ticket(int(user["id"]), self.world.channels["general"], f"Website {i}",
+                                             "$100", "Nov 30", "pls")
+            self.invoiced.append(order.id)
+            data = {"id": str(snowflake()), "name": "order_invoice", "type": 1,
+                    "options": [{"name": "id", "type": 4, "value": order.id},
+                                {"name": "amount", "type": 3, "value": "100"}]}
+            payload = self.interaction(2, data, staff, [self.world.role_ids["Staff Perms Role"]], "order_invoice")
+            self.gw("INTERACTION_CREATE", payload)
+            await self.pace(i)
+
+
+# ===== ENTRY =====
+async def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="hububba-loadtest-")
+    os.chdir(workdir)  # cogs write data/ relative to cwd
+    config.LOG_FILE_PATH = os.path.join(workdir, "logs", "bot.log")
+
+    standin = StandIn(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, live_after_polls=2)
+    base = await standin.start()
+    Route.BASE = f"{base}/api/v10"
+
+    world = World(standin.app_id)
+    world.apply_config()
+    config.TICKET_POOL_SIZE = args.ticket_pool
+    # Every simulated opener is a distinct user; lift the guild-wide limit so the burst measures channel setup.
+    config.TICKET_GUILD_BURST = 10_000
+
+    import main  # noqa: E402 - config overlay must be in place first
+    from utils import paypal, tokens
+
+    paypal.OAUTH_URL = f"{base}/paypal/v1/oauth2/token"
+    paypal.INVOICE_URL = f"{base}/paypal/v2/invoicing/invoices"
+
+    bot = main.bot
+    rec = Recorder()
+    rec.wrap_run_event(bot)
+
+    await main.load_extensions()
+    # load_extension() executes a fresh module object, so patch the one the cog actually runs from.
+    twitch = sys.modules["cogs.twitch"]
+    twitch.TWITCH_TOKEN_URL = f"{base}/twitch/oauth2/token"
+    twitch.TWITCH_STREAMS_URL = f"{base}/twitch/helix/streams"
+    twitch.TWITCH_USERS_URL = f"{base}/twitch/helix/users"
+    twitch.TWITCH_GAMES_URL = f"{base}/twitch/helix/games"
+    await bot.login("loadtest-token")
+    bot._connection._add_guild_from_data(world.guild_payload(standin.bot_user))
+    bot.loopmon.start()
+    bot.audit.start()
+    bot._ready.set()  # releases wait_until_ready() in task loops (no gateway READY here)
+
+    tw = bot.get_cog("TwitchCog")
+    announcements = 0
+    if tw is not None:
+        tw.poll_twitch.change_interval(seconds=1)
+        announce = tw._announce_live
+
+        async def counted_announce(data):
+            nonlocal announcements
+            announcements += 1
+            await announce(data)
+
+        tw._announce_live = counted_announce
+    orders_cog = bot.get_cog("Orders")
+    if orders_cog is not None:
+        orders_cog.sync_payments.change_interval(seconds=1)
+
+    tickets_cog = bot.get_cog("Tickets")
+    if "tickets" in args.scenarios and tickets_cog is not None and args.ticket_pool > 0:
+        # Steady state: a warm pool (refills are paced, so this takes ~2s per channel).
+        guild = bot.get_guild(world.guild_id)
+        warm_until = time.monotonic() + 4 * args.ticket_pool * getattr(config, "TICKET_POOL_REFILL_SECONDS", 2.0)
+        while tickets_cog.pool.available(guild) < args.ticket_pool and time.monotonic() < warm_until:
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(rec.sample_backlog(bot))
+    traffic = Traffic(bot, world, rec, rate=args.rate)
+    scale = args.scale
+    t0 = time.monotonic()
+
+    jobs = []
+    if "joins" in args.scenarios:
+        jobs.append(traffic.join_storm(int(200 * scale)))
+    if "deletes" in args.scenarios:
+        jobs.append(traffic.delete_flood(int(200 * scale)))
+    if "tickets" in args.scenarios:
+        jobs.append(traffic.ticket_modals(int(20 * scale)))
+    if "purges" in args.scenarios:
+        jobs.append(traffic.purges(max(1, int(3 * scale))))
+    if "paypal" in args.scenarios:
+        jobs.append(traffic.invoices(int(20 * scale)))
+    await asyncio.gather(*jobs)
+    injected_for = time.monotonic() - t0
+
+    # Let handlers, the dispatcher and (if enabled) the Twitch poller settle.
+    settle_until = time.monotonic() + args.settle
+    while time.monotonic() < settle_until:
+        pending = len(rec.injected) - sum(1 for i in rec.injected if i in standin.acks)
+        # Deferred ticket opens aren't done until their "Created … ticket" followup.
+        pending += sum(1 for i, (kind, _) in rec.injected.items() if kind == "ticket_modal" and i not in standin.followups)
+        backlog = sum(bot.dispatcher.metrics()["queued"].values()) + bot.eventbus.backlog()
+        unpaid = 0
+        if "paypal" in args.scenarios:
+            from cogs.orders import get_order
+            unpaid = sum(1 for oid in traffic.invoiced if get_order(oid).payment_status != "PAID")
+        if not pending and not backlog and not unpaid and "twitch" not in args.scenarios:
+            break
+        await asyncio.sleep(0.1)
+    elapsed = time.monotonic() - t0
+
+    sampler.cancel()
+    ack_ms: Dict[str, List[float]] = defaultdict(list)
+    followup_ms: Dict[str, List[float]] = defaultdict(list)
+    unacked: Dict[str, int] = defaultdict(int)
+    for iid, (kind, at) in rec.injected.items():
+        if iid in standin.acks:
+            ack_ms[kind].append((standin.acks[iid] - at) * 1000)
+        else:
+            unacked[kind] += 1
+        if iid in standin.followups:
+            followup_ms[kind].append((standin.followups[iid] - at) * 1000)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "args": {k: v for k, v in vars(args).items() if k != "out"},
+        "injection_seconds": round(injected_for, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "handlers": {name: rec.stats(v) for name, v in sorted(rec.handler_ms.items())},
+        "interaction_ack": {kind: rec.stats(v) for kind, v in ack_ms.items()},
+        "interaction_followup": {kind: rec.stats(v) for kind, v in followup_ms.items()},
+        "interaction_unacked": dict(unacked),
+        "interaction_ack_over_3s": sum(1 for v in ack_ms.values() for x in v if x > 3000),
+        "outbound": standin.summary(),
+        "dispatcher": bot.dispatcher.metrics(),
+        "dispatcher_max_backlog": dict(rec.max_backlog),
+        "eventbus": bot.eventbus.snapshot(),
+        "perf": bot.perf.snapshot() if getattr(bot, "perf", None) else {},
+        "loop_lag": bot.loopmon.snapshot() if getattr(bot, "loopmon", None) else {},
+        "member_cache": bot.member_cache.snapshot() if getattr(bot, "member_cache", None) else {},
+        "audit": bot.audit.snapshot() if getattr(bot, "audit", None) else {},
+        "ticket_pool": tickets_cog.pool.snapshot() if tickets_cog is not None else {},
+        "ticket_admission": {"index": tickets_cog.index.snapshot(), "user_buckets": tickets_cog.user_buckets.snapshot(),
+                             "guild_buckets": tickets_cog.guild_buckets.snapshot()} if tickets_cog is not None else {},
+        "tokens": tokens.all_metrics(),
+        "twitch": {"announcements": announcements, "stream_polls": standin.stream_polls,
+                   "helix_metadata_requests": tw.helix_requests, "users_cache": tw._users.stats(),
+                   "games_cache": tw._games.stats()} if tw is not None else {},
+        "paypal": {**orders_cog.paypal.metrics(),
+                   "invoices": len(standin.invoices),
+                   "paid": sum(1 for inv in standin.invoices.values() if inv["status"] == "PAID")}
+        if orders_cog is not None else {},
+    }
+
+    await bot.eventbus.close()
+    await bot.dispatcher.close()
+    await bot.audit.close()
+    await bot.modcases.close()
+    if orders_cog is not None:
+        await orders_cog.paypal.close()
+    if tw is not None and tw._session is not None:
+        await tw._session.close()
+    await bot.close()
+    await standin.stop()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay synthetic raid-scale traffic against a local Discord stand-in")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for event counts")
+    parser.add_argument("--rate", type=float, default=200.0, help="injected events per second per scenario (0 = unpaced)")
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=60.0)
+    parser.add_argument("--ticket-pool", type=int, default=5,
+                        help="pre-created ticket channels; the tickets scenario starts once the pool is warm")
+    parser.add_argument("--settle", type=float, default=30.0, help="max seconds to wait for backlogs to drain")
+    parser.add_argument("--out", default=os.path.join(HERE, "report.json"))
+    args = parser.parse_args(argv)
+    out = os.path.abspath(args.out)
+
+    report = asyncio.run(run(args))
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"elapsed {report['elapsed_seconds']}s  requests {report['outbound']['total_requests']}  "
+          f"429s {report['outbound']['total_429']}  max backlog {report['dispatcher_max_backlog']}")
+    for name, s in report["handlers"].items():
+        if s.get("count"):
+            print(f"  handler {name:<28} n={s['count']:<6} p50 {s['p50_ms']:>8} ms  p99 {s['p99_ms']:>8} ms")
+    for kind, s in report["interaction_ack"].items():
+        print(f"  ack     {kind:<28} n={s['count']:<6} p50 {s['p50_ms']:>8} ms  p99 {s['p99_ms']:>8} ms")
+    for kind, s in report["interaction_followup"].items():
+        print(f"  done    {kind:<28} n={s['count']:<6} p50 {s['p50_ms']:>8} ms  p99 {s['p99_ms']:>8} ms")
+    if report["interaction_unacked"]:
+        print(f"  unacked: {report['interaction_unacked']}")
+    if report["paypal"].get("invoices"):
+        print(f"  paypal  {report['paypal']}")
+    print(f"Wrote {out}")
+    # The stand-in goes live once and stays live: anything but one announcement is a bug (or a too-short run).
+    if "twitch" in args.scenarios and report["twitch"].get("announcements") != 1:
+        sys.exit(f"twitch: expected exactly 1 go-live announcement, got {report['twitch'].get('announcements')} "
+                 f"over {report['twitch'].get('stream_polls')} polls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+# loadtest/standin.py
+"""
+Local stand-in for the parts of Discord's REST API (plus Twitch Helix and PayPal
+Invoicing) the bot uses.
+
+Responses are shaped like the real payloads so discord.py can parse them, every
+request is counted per route, latency is injected, and each route bucket enforces
+a fixed-window limit that answers with a realistic 429 (Retry-After +
+X-RateLimit-* headers) once exhausted.
+"""
+import asyncio
+import datetime
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+DISCORD_EPOCH = 1420070400000
+
+
+def snowflake(ts: Optional[float] = None) -> int:
+    """Snowflake carrying `ts` (seconds) so created_at/bulk-delete age checks behave."""
+    ms = int((ts if ts is not None else time.time()) * 1000)
+    return ((ms - DISCORD_EPOCH) << 22) | random.getrandbits(22)
+
+
+def iso(ts: Optional[float] = None) -> str:
+    return datetime.datetime.fromtimestamp(ts or time.time(), tz=datetime.timezone.utc).isoformat()
+
+
+def user_payload(uid: int, name: str, bot: bool = False) -> dict:
+    return {"id": str(uid), "username": name, "discriminator": "0", "global_name": None, "avatar": None, "bot": bot}
+
+
+def message_payload(channel_id: int, author: dict, content: str = "", mid: Optional[int] = None) -> dict:
+    return {
+        "id": str(mid or snowflake()),
+        "channel_id": str(channel_id),
+        "author": author,
+        "content": content,
+        "timestamp": iso(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
+
+
+def channel_payload(cid: int, guild_id: int, name: str, parent_id: Optional[int] = None, ctype: int = 0, overwrites=None) -> dict:
+    return {
+        "id": str(cid),
+        "type": ctype,
+        "guild_id": str(guild_id),
+        "name": name,
+        "position": 0,
+        "permission_overwrites": overwrites or [],
+        "parent_id": str(parent_id) if parent_id else None,
+        "nsfw": False,
+        "topic": None,
+        "rate_limit_per_user": 0,
+    }
+
+
+def json_response(data, status: int = 200, headers: Optional[dict] = None) -> web.Response:
+    # Discord sends a bare "application/json" and discord.py compares the header verbatim.
+    hdrs = dict(headers or {})
+    hdrs["Content-Type"] = "application/json"
+    return web.Response(body=json.dumps(data).encode("utf-8"), status=status, headers=hdrs)
+
+
+class Bucket:
+    """Fixed-window limiter mirroring Discord's per-route buckets."""
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.window_start = 0.0
+        self.used = 0
+
+    def take(self) -> Tuple[bool, int, float]:
+        now = time.monotonic()
+        if now - self.window_start >= self.per:
+            self.window_start = now
+            self.used = 0
+        reset_after = max(0.0, self.per - (now - self.window_start))
+        if self.used >= self.limit:
+            return False, 0, reset_after
+        self.used += 1
+        return True, self.limit - self.used, reset_after
+
+
+# (method, path regex, bucket key template, limit, per seconds)
+# Limits follow Discord's published/observed defaults for these routes.
+ROUTES: List[Tuple[str, str, str, int, float]] = [
+    ("GET", r"/users/@me", "users/@me", 50, 1.0),
+    ("GET", r"/oauth2/applications/@me", "applications/@me", 50, 1.0),
+    ("POST", r"/channels/(?P<channel>\d+)/messages", "messages:{channel}", 5, 5.0),
+    ("GET", r"/channels/(?P<channel>\d+)/messages", "history:{channel}", 50, 1.0),
+    ("POST", r"/channels/(?P<channel>\d+)/messages/bulk-delete", "bulk:{channel}", 1, 1.0),
+    ("DELETE", r"/channels/(?P<channel>\d+)/messages/(?P<message>\d+)", "delete:{channel}", 5, 1.0),
+    ("PATCH", r"/channels/(?P<channel>\d+)", "channel-edit:{channel}", 2, 600.0),
+    ("PUT", r"/channels/(?P<channel>\d+)/permissions/(?P<target>\d+)", "perms:{channel}", 10, 10.0),
+    ("DELETE", r"/channels/(?P<channel>\d+)", "channel-delete:{channel}", 5, 5.0),
+    ("PUT", r"/guilds/(?P<guild>\d+)/members/(?P<user>\d+)/roles/(?P<role>\d+)", "roles:{guild}", 10, 10.0),
+    ("POST", r"/guilds/(?P<guild>\d+)/channels", "create-channel:{guild}", 5, 10.0),
+    ("PUT", r"/applications/(?P<app>\d+)/guilds/(?P<guild>\d+)/commands", "sync:{guild}", 2, 60.0),
+    ("POST", r"/interactions/(?P<interaction>\d+)/(?P<token>[^/]+)/callback", "callback:{interaction}", 1, 1.0),
+    ("POST", r"/webhooks/(?P<app>\d+)/(?P<token>[^/]+)", "webhook:{token}", 5, 2.0),
+    ("PATCH", r"/webhooks/(?P<app>\d+)/(?P<token>[^/]+)/messages/(?P<message>[^/]+)", "webhook:{token}", 5, 2.0),
+]
+_COMPILED = [(m, re.compile(f"^{p}$"), k, lim, per) for m, p, k, lim, per in ROUTES]
+
+
+class StandIn:
+    """
+    aiohttp app serving /api/v10/* (Discord), /twitch/* (Twitch OAuth + Helix) and
+    /paypal/* (PayPal OAuth + Invoicing v2).
+
+    latency_ms / jitter_ms shape response times; live_after_polls flips the Twitch
+    stream to live after N /streams requests; sent PayPal invoices are marked PAID
+    after paid_after seconds and OAuth tokens expire after paypal_token_ttl seconds.
+    """
+
+    def __init__(self, latency_ms: float = 40.0, jitter_ms: float = 60.0, app_id: int = 0, bot_user: Optional[dict] = None,
+                 live_after_polls: int = 3, paid_after: float = 2.0, paypal_token_ttl: int = 32400):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.app_id = app_id or snowflake()
+        self.bot_user = bot_user or user_payload(self.app_id, "Hububba Utils", bot=True)
+        self.live_after_polls = live_after_polls
+
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.rate_limited: Dict[str, int] = defaultdict(int)
+        self.buckets: Dict[str, Bucket] = {}
+        self.acks: Dict[int, float] = {}  # interaction id -> monotonic ack time
+        self.followups: Dict[int, float] = {}  # interaction id -> monotonic time of the first followup
+        self.stream_polls = 0
+        self.stream_started_at: Optional[str] = None  # fixed for one live session, like Helix
+        self.paid_after = paid_after
+        self.paypal_token_ttl = paypal_token_ttl
+        self.invoices: Dict[str, dict] = {}
+        self.invoice_sent_at: Dict[str, float] = {}
+        self.paypal_tokens = 0
+        self.on_request: Optional[Callable[[str], None]] = None
+
+        self.app = web.Application()
+        self.app.router.add_route("*", "/api/v10/{tail:.*}", self._discord)
+        self.app.router.add_route("*", "/twitch/{tail:.*}", self._twitch)
+        self.app.router.add_route("*", "/paypal/{tail:.*}", self._paypal)
+        self._runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    # ===== LIFECYCLE =====
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return f"http://{host}:{self.port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    # ===== HELPERS =====
+    async def _latency(self):
+        delay = self.latency_ms + random.expovariate(1.0 / self.jitter_ms) if self.jitter_ms else self.latency_ms
+        await asyncio.sleep(delay / 1000.0)
+
+    def _rate_limit(self, bucket_key: str, limit: int, per: float) -> Tuple[Optional[web.Response], dict]:
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self.buckets[bucket_key] = Bucket(limit, per)
+        ok, remaining, reset_after = bucket.take()
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Bucket": bucket_key.split(":")[0],
+        }
+        if ok:
+            return None, headers
+        headers.update({"Retry-After": f"{reset_after:.3f}", "X-RateLimit-Scope": "user"})
+        body = {"message": "You are being rate limited.", "retry_after": round(reset_after, 3), "global": False}
+        return json_response(body, status=429, headers=headers), headers
+
+    # ===== DISCORD =====
+    async def _discord(self, request: web.Request) -> web.StreamResponse:
+        path = "/" + request.match_info["tail"]
+        method = request.method
+        for m, rx, key_tpl, limit, per in _COMPILED:
+            match = rx.match(path)
+            if m != method or not match:
+                continue
+            route = f"{method} {rx.pattern[1:-1]}"
+            self.requests[route] += 1
+            if self.on_request:
+                self.on_request(route)
+            limited, headers = self._rate_limit(key_tpl.format(**match.groupdict()), limit, per)
+            await self._latency()
+            if limited is not None:
+                self.rate_limited[route] += 1
+                return limited
+            return await self._handle(method, path, match.groupdict(), request, headers)
+
+        self.requests[f"{method} (unmapped) {path}"] += 1
+        await self._latency()
+        return json_response({})
+
+    async def _handle(self, method: str, path: str, groups: dict, request: web.Request, headers: dict) -> web.StreamResponse:
+        body = await self._read_json(request)
+
+        if path == "/users/@me":
+            return json_response(self.bot_user, headers=headers)
+        if path == "/oauth2/applications/@me":
+            return json_response(self._app_info(), headers=headers)
+
+        if "interaction" in groups:
+            self.acks[int(groups["interaction"])] = time.monotonic()
+            return json_response(
+                {"interaction": {"id": groups["interaction"], "type": body.get("type", 4)}}, headers=headers
+            )
+
+        if "channel" in groups:
+            cid = int(groups["channel"])
+            if method == "POST" and path.endswith("/messages"):
+                return json_response(message_payload(cid, self.bot_user, body.get("content") or ""), headers=headers)
+            if method == "GET" and path.endswith("/messages"):
+                limit = int(request.query.get("limit", 50))
+                before = request.query.get("before")
+                # Hand back a page of recent messages (bulk-deletable) until 'before' runs out.
+                now = time.time()
+                if before and int(before) >> 22 < (int(now * 1000) - DISCORD_EPOCH - 3_600_000):
+                    return json_response([], headers=headers)
+                author = user_payload(snowflake(), "chatter")
+                msgs = [message_payload(cid, author, "spam", snowflake(now - 1 - i)) for i in range(limit)]
+                return json_response(msgs, headers=headers)
+            if method == "PATCH" and "message" not in groups:
+                guild_id = int(body.get("guild_id") or 0)
+                return json_response(
+                    channel_payload(cid, guild_id, body.get("name") or "channel", body.get("parent_id")), headers=headers
+                )
+            return web.Response(status=204, headers=headers)
+
+        if "guild" in groups and path.endswith("/channels") and method == "POST":
+            gid = int(groups["guild"])
+            return json_response(
+                channel_payload(snowflake(), gid, body.get("name", "channel"), body.get("parent_id"),
+                                body.get("type", 0), body.get("permission_overwrites")),
+                headers=headers,
+            )
+
+        if "app" in groups and path.endswith("/commands"):
+            return json_response([], headers=headers)
+
+        if "token" in groups:  # followup / original edit
+            if method == "POST" and groups["token"].startswith("tok"):
+                self.followups.setdefault(int(groups["token"][3:]), time.monotonic())
+            return json_response(message_payload(0, self.bot_user, body.get("content") or ""), headers=headers)
+
+        return web.Response(status=204, headers=headers)
+
+    @staticmethod
+    async def _read_json(request: web.Request) -> dict:
+        if not request.can_read_body:
+            return {}
+        if request.content_type == "multipart/form-data":
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == "payload_json":
+                    return await part.json() or {}
+            return {}
+        try:
+            data = await request.json()
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _app_info(self) -> dict:
+        return {
+            "id": str(self.app_id),
+            "name": self.bot_user["username"],
+            "description": "",
+            "icon": None,
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "owner": user_payload(snowflake(), "owner"),
+            "verify_key": "0" * 64,
+            "flags": 0,
+            "interactions_endpoint_url": None,
+        }
+
+    # ===== TWITCH =====
+    async def _twitch(self, request: web.Request) -> web.StreamResponse:
+        path = "/" + request.match_info["tail"]
+        route = f"{request.method} twitch{path}"
+        self.requests[route] += 1
+        limited, headers = self._rate_limit("twitch", 800, 60.0)
+        await self._latency()
+        if limited is not None:
+            self.rate_limited[route] += 1
+            return json_response({"error": "Too Many Requests", "status": 429}, status=429,
+                                     headers={"Ratelimit-Reset": str(int(time.time()) + 1)})
+
+        if path == "/oauth2/token":
+            return json_response({"access_token": "standin-token", "expires_in": 3600, "token_type": "bearer"})
+        if path == "/helix/streams":
+            self.stream_polls += 1
+            if self.stream_polls <= self.live_after_polls:
+                self.stream_started_at = None
+                return json_response({"data": []})
+            if self.stream_started_at is None:
+                self.stream_started_at = iso()
+            login = request.query.get("user_login", "streamer")
+            return json_response({"data": [{
+                "id": "1", "user_id": "4242", "user_login": login, "user_name": login,
+                "game_id": "509658", "game_name": "", "type": "live", "title": "Load test stream",
+                "viewer_count": 7, "started_at": self.stream_started_at,
+                "thumbnail_url": "https://static-cdn.jtvnw.net/previews-ttv/live_user_x-{width}x{height}.jpg",
+            }]})
+        if path == "/helix/users":
+            return json_response({"data": [{
+                "id": uid, "login": f"user{uid}", "display_name": f"User{uid}", "type": "", "broadcaster_type": "",
+                "profile_image_url": f"https://static-cdn.jtvnw.net/jtv_user_pictures/{uid}-profile_image-300x300.png",
+            } for uid in request.query.getall("id", [])]})
+        if path == "/helix/games":
+            return json_response({"data": [{
+                "id": gid, "name": f"Game {gid}",
+                "box_art_url": f"https://static-cdn.jtvnw.net/ttv-boxart/{gid}-{{width}}x{{height}}.jpg",
+            } for gid in request.query.getall("id", [])]})
+        return json_response({"data": []})
+
+    # ===== PAYPAL =====
+    def _invoice_view(self, invoice_id: str) -> dict:
+        inv = self.invoices[invoice_id]
+        sent = self.invoice_sent_at.get(invoice_id)
+        if sent is not None and inv["status"] == "SENT" and time.monotonic() - sent >= self.paid_after:
+            inv["status"] = "PAID"
+        return inv
+
+    async def _paypal(self, request: web.Request) -> web.StreamResponse:
+        path = "/" + request.match_info["tail"]
+        method = request.method
+        route = f"{method} paypal{re.sub(r'/INV2-[A-Z0-9-]+', '/{id}', path)}"
+        self.requests[route] += 1
+        # PayPal doesn't publish limits; a generous shared window still exercises the client's 429 handling.
+        limited, headers = self._rate_limit("paypal", 50, 1.0)
+        await self._latency()
+        if limited is not None:
+            self.rate_limited[route] += 1
+            return json_response({"name": "RATE_LIMIT_REACHED"}, status=429, headers={"Retry-After": "1"})
+
+        if path == "/v1/oauth2/token":
+            self.paypal_tokens += 1
+            return json_response({"access_token": f"standin-paypal-{self.paypal_tokens}", "token_type": "Bearer",
+                                  "expires_in": self.paypal_token_ttl})
+        if not request.headers.get("Authorization", "").startswith("Bearer standin-paypal-"):
+            return json_response({"name": "AUTHENTICATION_FAILURE"}, status=401)
+
+        base = "/v2/invoicing/invoices"
+        if path == base and method == "POST":
+            body = await self._read_json(request)
+            invoice_id = f"INV2-{random.getrandbits(40):010X}"
+            self.invoices[invoice_id] = {
+                "id": invoice_id, "status": "DRAFT", "detail": {**body.get("detail", {}), "metadata": {
+                    "recipient_view_url": f"https://www.paypal.com/invoice/p/#{invoice_id}"}},
+                "items": body.get("items", []),
+            }
+            return json_response(self.invoices[invoice_id], status=201)
+        if path == base and method == "GET":
+            page = int(request.query.get("page", 1))
+            size = int(request.query.get("page_size", 20))
+            ids = list(self.invoices)
+            chunk = ids[(page - 1) * size: page * size]
+            return json_response({
+                "items": [self._invoice_view(i) for i in chunk],
+                "total_items": len(ids),
+                "total_pages": max(1, -(-len(ids) // size)),
+            })
+        match = re.match(rf"^{base}/(?P<id>[^/]+)(?P<send>/send)?$", path)
+        if match and match["id"] in self.invoices:
+            invoice_id = match["id"]
+            if match["send"] and method == "POST":
+                self.invoices[invoice_id]["status"] = "SENT"
+                self.invoice_sent_at[invoice_id] = time.monotonic()
+                return json_response({"href": self.invoices[invoice_id]["detail"]["metadata"]["recipient_view_url"]})
+            if method == "GET":
+                return json_response(self._invoice_view(invoice_id))
+        return json_response({"name": "RESOURCE_NOT_FOUND"}, status=404)
+
+    # ===== REPORTING =====
+    def summary(self) -> dict:
+        return {
+            "requests": dict(sorted(self.requests.items(), key=lambda kv: -kv[1])),
+            "rate_limited": dict(sorted(self.rate_limited.items(), key=lambda kv: -kv[1])),
+            "total_requests": sum(self.requests.values()),
+            "total_429": sum(self.rate_limited.values()),
+        }
@@ -6,9 +6,22 @@ from discord import app_commands
 import os
 import config
 from utils.logger import setup_logger
+from utils.dispatcher import MessageDispatcher
+from utils.eventbus import EventBus
+from utils.scheduler import Scheduler
+from utils.modcases import CaseStore
+from utils.warmstate import WarmState, tree_fingerprint
+from utils import perf
+from utils.loopmon import LoopLagMonitor
+from utils import member_cache
+from utils.audit import AuditArchive
+from utils import errors
+from utils import settings
 
 # ===== ALLOWED GUILDS =====
-ALLOWED_GUILDS = [config.HUBUBBA_GUILD_ID, config.PROJECT_INFINITE_ID]
+# Guilds commands are registered/synced to: the startup allow-list, plus guilds added by a settings reload.
+# The live allow-list (what checks enforce) is settings.current().allowed_guilds.
+ALLOWED_GUILDS = sorted(settings.current().allowed_guilds)
 
 # ===== INTENTS =====
 intents = discord.Intents.default()
@@ -17,9 +30,54 @@ intents.members = True
 intents.message_content = True
 
 # ===== BOT =====
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(
+    command_prefix="!",
+    intents=intents,
+    tree_cls=perf.TimedCommandTree,
+    **member_cache.bot_kwargs(intents),
+)
 logger = setup_logger(config.LOG_FILE_PATH, config.LOG_MAX_BYTES, config.LOG_BACKUP_COUNT)
 
+# Central outbound queue: cogs post logs/announcements through bot.dispatcher
+bot.dispatcher = MessageDispatcher()
+
+# Latency histograms for listeners / app commands / tasks (see /perfstats)
+bot.perf = perf.PerfRegistry()
+bot.add_listener(perf.on_app_command_completion, "on_app_command_completion")
+
+# Event-loop lag sampler + blocked-loop stack capture (started in main())
+bot.loopmon = LoopLagMonitor()
+
+# State carried across restarts (command-tree fingerprints, Twitch live state, ...); saved periodically and on shutdown
+bot.warmstate = WarmState()
+
+# Member cache policy (lazy chunking, recent/staff retention) + time-to-ready/RSS report
+bot.member_cache = member_cache.MemberCachePolicy(bot)
+bot.member_cache.attach()
+
+# Searchable local archive of every audit event (SQLite, written off the loop; started in main())
+bot.audit = AuditArchive()
+
+# Error fingerprints: one report per fingerprint per window, repeats summarised (see /errors)
+bot.errors = errors.ErrorTracker()
+
+# Hot-reload data/settings.json (guilds, log channels, role names/maps) without a restart (started in main())
+bot.settings_watcher = settings.SettingsWatcher()
+
+# Cog listeners run on per-cog bounded queues/workers so one stalled cog can't hold up the others
+bot.eventbus = EventBus(bot)
+
+# Persistent timed jobs (tempban expiry, timed unlocks, order deadline reminders); started in main()
+bot.scheduler = Scheduler(bot)
+
+# Numbered moderation cases behind /modlog and /case (SQLite)
+bot.modcases = CaseStore()
+
+
+# guild id -> fingerprint of the command set last synced there (also skips re-syncs on reconnect)
+_synced_trees = dict(bot.warmstate.section("command_trees", {}))
+bot.warmstate.register("command_trees", lambda: _synced_trees)
+
 
 @bot.event
 async def on_ready():
@@ -29,23 +87,63 @@ async def on_ready():
     )
     logger.info(f"✅ Logged in as {bot.user} ({bot.user.id})")
 
+    await sync_guild_commands(ALLOWED_GUILDS)
+
+
+async def sync_guild_commands(guild_ids):
+    """Sync commands to each guild whose command set changed since the last sync."""
     try:
-        # Sync commands for all allowed guilds
-        total_synced = 0
-        for guild_id in ALLOWED_GUILDS:
+        total_synced = skipped = 0
+        for guild_id in guild_ids:
             guild = discord.Object(id=guild_id)
+            fingerprint = tree_fingerprint(bot.tree, guild, bot.application_id)
+            if _synced_trees.get(str(guild_id)) == fingerprint:
+                skipped += 1
+                continue
             synced = await bot.tree.sync(guild=guild)
+            _synced_trees[str(guild_id)] = fingerprint
             total_synced += len(synced)
             logger.info(f"🌿 Synced {len(synced)} commands to guild {guild_id}.")
-        logger.info(f"✅ Finished syncing to {len(ALLOWED_GUILDS)} guilds ({total_synced} total commands).")
+        logger.info(f"✅ Finished syncing to {len(guild_ids) - skipped} guilds ({total_synced} total commands); "
+                    f"{skipped} unchanged since the last sync.")
     except Exception as e:
         logger.exception(f"❌ Failed to sync commands: {e}")
 
 
+def register_guild_commands(guild_id: int) -> int:
+    """Add every loaded cog's app commands to `guild_id`'s tree (not synced)."""
+    count = 0
+    for cog in bot.cogs.values():
+        for cmd in cog.get_app_commands():
+            bot.tree.add_command(cmd, guild=discord.Object(id=guild_id), override=True)
+            count += 1
+    return count
+
+
+def on_settings_reload(old: settings.Settings, new: settings.Settings):
+    """A reload that adds guilds registers and syncs commands there; removed guilds are blocked by the checks."""
+    added = sorted(new.allowed_guilds - set(ALLOWED_GUILDS))
+    removed = sorted(old.allowed_guilds - new.allowed_guilds)
+    if removed:
+        logger.info(f"⚙️ Guilds removed from allowed_guilds: {removed}; their commands stay synced but are refused "
+                    f"until the next restart.")
+    if not added:
+        return
+    ALLOWED_GUILDS.extend(added)
+    ALLOWED_GUILDS.sort()
+    for guild_id in added:
+        logger.info(f"⚙️ Guild {guild_id} added to allowed_guilds; registered {register_guild_commands(guild_id)} commands")
+    if bot.is_ready():
+        asyncio.get_running_loop().create_task(sync_guild_commands(added))  # otherwise on_ready syncs them
+
+
+settings.add_reload_listener(on_settings_reload)
+
+
 @bot.event
 async def on_guild_join(guild: discord.Guild):
     """Leave unauthorized guilds."""
-    if guild.id not in ALLOWED_GUILDS:
+    if not settings.current().is_allowed(guild.id):
         try:
             target = guild.system_channel
             if not target:
@@ -67,13 +165,14 @@ async def on_guild_join(guild: discord.Guild):
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
     from utils.checks import PermissionDenied
+    perf.finish_interaction(interaction, failed=True)
     if isinstance(error, (PermissionDenied, app_commands.CheckFailure)):
         try:
             await interaction.response.send_message(str(error), ephemeral=True)
         except discord.InteractionResponded:
             await interaction.followup.send(str(error), ephemeral=True)
         return
-    logger.exception("Slash command error", exc_info=error)
+    errors.capture(bot, error, where=errors.command_name(interaction), guild_id=interaction.guild_id)
     msg = "Something went wrong running that command."
     try:
         await interaction.response.send_message(msg, ephemeral=True)
@@ -105,6 +204,7 @@ async def load_extensions():
 
     # Force add all cog app_commands to bot.tree manually
     for cog_name, cog in bot.cogs.items():
+        bot.eventbus.attach_cog(cog)
         if hasattr(cog, "get_app_commands"):
             cmds = cog.get_app_commands()
             for cmd in cmds:
@@ -113,6 +213,19 @@ async def load_extensions():
             logger.info(f"✅ Registered {len(cmds)} commands from {cog_name}")
 
 
+def install_fast_loop() -> str:
+    """Switch to uvloop when FAST_RUNTIME is enabled and uvloop is installed."""
+    if not getattr(config, "FAST_RUNTIME", False):
+        return "asyncio"
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("⚠️ FAST_RUNTIME is on but uvloop is not installed; using the default asyncio loop.")
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+
 def read_token():
     """Read and clean token."""
     token_path = os.path.join(os.path.dirname(__file__), "token.txt")
@@ -125,13 +238,47 @@ def read_token():
     return token
 
 
+async def shutdown():
+    """Stop the background services and flush what they hold; each step runs even if an earlier one fails."""
+    queued = sum(bot.dispatcher.metrics()["queued"].values())
+    if queued:
+        logger.warning(f"🛑 Dropping {queued} queued dispatcher posts (the gateway is already closed)")
+    steps = (
+        ("scheduler", bot.scheduler.stop),
+        ("settings watcher", bot.settings_watcher.stop),
+        ("loop monitor", bot.loopmon.stop),
+        ("event bus", bot.eventbus.close),
+        ("dispatcher", bot.dispatcher.close),
+        ("warm state", lambda: (bot.warmstate.stop(), bot.warmstate.save())),
+        ("audit archive", bot.audit.close),  # writes the rows still buffered
+        ("mod cases", bot.modcases.close),
+    )
+    for name, step in steps:
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning(f"🛑 Shutdown: {name} failed: {e}")
+
+
 async def main():
+    bot.loopmon.start()
+    bot.audit.start()
+    bot.settings_watcher.start()
+    bot.scheduler.start()
+    bot.warmstate.start()
     await load_extensions()
     token = read_token()
-    await bot.start(token)
+    try:
+        await bot.start(token)
+    finally:
+        await shutdown()
 
 
 if __name__ == "__main__":
+    from utils import fastjson
+    logger.info(f"⚙️ Runtime: {install_fast_loop()} event loop, {fastjson.BACKEND} stores")
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,211 @@
+# utils/audit.py
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import config
+
+logger = logging.getLogger("bot")
+
+DB_PATH = getattr(config, "AUDIT_DB_PATH", os.path.join("data", "audit.db"))
+# Events older than this are pruned by the daily maintenance pass (0 = keep forever).
+RETENTION_DAYS = getattr(config, "AUDIT_RETENTION_DAYS", 90)
+FLUSH_EVERY = 1.0          # seconds between batched inserts
+MAX_PENDING = 50_000       # events buffered in memory before new ones are dropped
+MAINTENANCE_EVERY = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts         REAL    NOT NULL,
+    guild_id   INTEGER,
+    kind       TEXT    NOT NULL,
+    actor_id   INTEGER,
+    target_id  INTEGER,
+    channel_id INTEGER,
+    content    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_guild_ts   ON events (guild_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_actor_ts   ON events (actor_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_target_ts  ON events (target_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_channel_ts ON events (channel_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_kind_ts    ON events (kind, ts);
+"""
+
+COLUMNS = ("id", "ts", "guild_id", "kind", "actor_id", "target_id", "channel_id", "content")
+
+
+class AuditArchive:
+    """
+    Append-only SQLite archive of every audit event the bot logs.
+
+    record() only appends to an in-memory buffer; a background task flushes it in
+    batches on a dedicated thread, so the event loop never waits on disk. Queries
+    run on that same thread (one connection, no locking games).
+    """
+
+    def __init__(self, path: str = DB_PATH, retention_days: int = RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._pending: List[tuple] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.pruned = 0
+
+    # ===== LIFECYCLE =====
+    def start(self):
+        """Must be called from inside the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        await self.flush()
+        await self._call(self._close_db)
+        self._executor.shutdown(wait=False)
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ===== DB (audit-db thread only) =====
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _close_db(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _insert(self, rows: List[tuple]):
+        db = self._db()
+        with db:
+            db.executemany(
+                "INSERT INTO events (ts, guild_id, kind, actor_id, target_id, channel_id, content) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _query(self, sql: str, params: tuple) -> List[dict]:
+        cur = self._db().execute(sql, params)
+        return [dict(zip(COLUMNS, row)) for row in cur.fetchall()]
+
+    def _prune(self, cutoff: float) -> int:
+        db = self._db()
+        with db:
+            deleted = db.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+        if deleted:
+            # Give the freed pages back to the filesystem and keep the indexes tight.
+            db.execute("VACUUM")
+            db.execute("PRAGMA optimize")
+        return deleted
+
+    # ===== WRITE =====
+    def record(self, guild_id: Optional[int], kind: str, *, actor_id: Optional[int] = None,
+               target_id: Optional[int] = None, channel_id: Optional[int] = None, content: Optional[str] = None):
+        if len(self._pending) >= MAX_PENDING:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), guild_id, kind, actor_id, target_id, channel_id, content))
+
+    async def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            await self._call(self._insert, rows)
+            self.written += len(rows)
+        except Exception as e:
+            logger.warning(f"Audit archive write failed ({len(rows)} events lost): {e}")
+
+    async def _run(self):
+        last_maintenance = time.monotonic()
+        while True:
+            await asyncio.sleep(FLUSH_EVERY)
+            await self.flush()
+            if time.monotonic() - last_maintenance >= MAINTENANCE_EVERY:
+                last_maintenance = time.monotonic()
+                await self.prune()
+
+    # ===== MAINTENANCE =====
+    async def prune(self, retention_days: Optional[int] = None) -> int:
+        days = self.retention_days if retention_days is None else retention_days
+        if not days:
+            return 0
+        deleted = await self._call(self._prune, time.time() - days * 86400)
+        self.pruned += deleted
+        if deleted:
+            logger.info(f"🗄️ Audit archive: pruned {deleted} events older than {days} days")
+        return deleted
+
+    # ===== READ =====
+    async def search(
+        self,
+        guild_id: Optional[int] = None,
+        *,
+        kind: Optional[str] = None,
+        user_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        text: Optional[str] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 10,
+    ) -> List[dict]:
+        """
+        Newest-first events matching every given filter. `user_id` matches either the
+        actor or the target. Page with before_id (older) / after_id (newer); pages are
+        always returned newest first.
+        """
+        await self.flush()
+        where, params = [], []
+        for column, value in (("guild_id", guild_id), ("kind", kind), ("channel_id", channel_id)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if user_id is not None:
+            where.append("(actor_id = ? OR target_id = ?)")
+            params += [user_id, user_id]
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        if text:
+            where.append("content LIKE ? ESCAPE '\\'")
+            params.append("%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(before_id)
+        if after_id is not None:
+            where.append("id > ?")
+            params.append(after_id)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        order = "ASC" if after_id is not None and before_id is None else "DESC"
+        sql = f"SELECT {', '.join(COLUMNS)} FROM events {clause} ORDER BY id {order} LIMIT ?"
+        rows = await self._call(self._query, sql, tuple(params) + (limit,))
+        return rows if order == "DESC" else rows[::-1]
+
+    def snapshot(self) -> dict:
+        return {"pending": len(self._pending), "written": self.written, "dropped": self.dropped, "pruned": self.pruned}
+
+
+def record(bot, guild_id: Optional[int], kind: str, **fields):
+    """Archive an audit event if the bot has an archive attached (no-op otherwise)."""
+    archive: Optional[AuditArchive] = getattr(bot, "audit", None)
+    if archive is not None:
+        archive.record(guild_id, kind, **fields)
@@ -2,26 +2,27 @@
 import discord
 from discord import app_commands
 from typing import Callable
-import config
+from utils import settings
 
 # Custom permission failure so we can send friendly errors
 class PermissionDenied(app_commands.CheckFailure):
     pass
 
 
-# --- Role helper ---
+# --- Role helpers ---
 def _has_named_role(member: discord.Member, role_name: str) -> bool:
     return discord.utils.get(member.roles, name=role_name) is not None
 
 
+def _has_any_role(member: discord.Member, role_names: frozenset) -> bool:
+    return any(r.name in role_names for r in member.roles)
+
+
 # --- Guild restriction check (used by older cogs) ---
 def in_home_guild() -> Callable:
     """Restrict commands to Hububba's Coding World or Project Infinite."""
     async def predicate(interaction: discord.Interaction) -> bool:
-        if interaction.guild is None or interaction.guild_id not in [
-            config.HUBUBBA_GUILD_ID,
-            config.PROJECT_INFINITE_ID
-        ]:
+        if interaction.guild is None or not settings.current().is_allowed(interaction.guild_id):
             raise PermissionDenied("This bot only functions inside **Hububba's Coding World** or **Project Infinite ∞**.")
         return True
     return app_commands.check(predicate)
@@ -31,10 +32,7 @@ def in_home_guild() -> Callable:
 def in_allowed_guilds() -> Callable:
     """Restrict to allowed guilds list in config."""
     async def predicate(interaction: discord.Interaction) -> bool:
-        if interaction.guild is None or interaction.guild_id not in [
-            config.HUBUBBA_GUILD_ID,
-            config.PROJECT_INFINITE_ID
-        ]:
+        if interaction.guild is None or not settings.current().is_allowed(interaction.guild_id):
             raise PermissionDenied("This bot only functions inside authorized guilds.")
         return True
     return app_commands.check(predicate)
@@ -55,11 +53,12 @@ def perm_level(level: str) -> Callable:
             raise PermissionDenied("Members only.")
 
         member: discord.Member = interaction.user  # type: ignore
+        s = settings.current()
 
         # Always allow the server owner and those with the super role
         if member.guild.owner_id == member.id:
             return True
-        if _has_named_role(member, config.SUPER_ROLE_NAME):
+        if _has_named_role(member, s.super_role):
             return True
 
         # Admins also pass administrator perm
@@ -70,12 +69,12 @@ def perm_level(level: str) -> Callable:
             return True
 
         if level == "admin":
-            if _has_named_role(member, config.ADMIN_ROLE_NAME):
+            if _has_any_role(member, s.admin_roles):
                 return True
             raise PermissionDenied("You need the **Admin+ Perms** role for this command.")
 
         if level == "staff":
-            if _has_named_role(member, config.STAFF_ROLE_NAME) or _has_named_role(member, config.ADMIN_ROLE_NAME):
+            if _has_any_role(member, s.staff_roles):
                 return True
             raise PermissionDenied("You need the **Staff Perms Role** (or higher) for this command.")
 
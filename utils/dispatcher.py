@@ -0,0 +1,251 @@
+# utils/dispatcher.py
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+
+import discord
+
+from utils import errors
+
+logger = logging.getLogger("bot")
+
+# ===== PRIORITY CLASSES =====
+# Lower number = sent first.
+ANNOUNCEMENT = 0
+MODERATION = 1
+AUDIT = 2
+HEARTBEAT = 3
+
+PRIORITY_NAMES = {
+    ANNOUNCEMENT: "announcement",
+    MODERATION: "moderation",
+    AUDIT: "audit",
+    HEARTBEAT: "heartbeat",
+}
+
+# Heartbeats beyond this many per channel are dropped (oldest first).
+MAX_HEARTBEATS_PER_CHANNEL = 3
+# Idle channel workers exit after this many seconds with nothing queued.
+WORKER_IDLE_SECONDS = 30.0
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "kwargs", "future", "coalesce_key", "enqueued_at", "cancelled")
+
+    def __init__(self, priority: int, seq: int, kwargs: dict, future: asyncio.Future, coalesce_key: Optional[str]):
+        self.priority = priority
+        self.seq = seq
+        self.kwargs = kwargs
+        self.future = future
+        self.coalesce_key = coalesce_key
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ChannelQueue:
+    def __init__(self, channel: discord.abc.Messageable):
+        self.channel = channel
+        self.heap: List[_Job] = []
+        self.wakeup = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+        self.coalesced: Dict[str, _Job] = {}
+
+    def live_jobs(self) -> List[_Job]:
+        return [j for j in self.heap if not j.cancelled]
+
+
+class MessageDispatcher:
+    """
+    Central outbound queue for bot-originated channel messages.
+
+    Each channel gets its own priority queue and a single worker, so a flood of
+    heartbeats in Bot Logs can never hold up a go-live announcement or a ban log.
+    The lowest class (HEARTBEAT) is coalesced by key and capped per channel.
+    """
+
+    def __init__(self):
+        self._queues: Dict[int, _ChannelQueue] = {}
+        self._seq = itertools.count()
+        self.sent = {p: 0 for p in PRIORITY_NAMES}
+        self.dropped = {p: 0 for p in PRIORITY_NAMES}
+        self.coalesced = {p: 0 for p in PRIORITY_NAMES}
+        self.failed = {p: 0 for p in PRIORITY_NAMES}
+        self.max_wait = {p: 0.0 for p in PRIORITY_NAMES}
+
+    # ===== PUBLIC API =====
+    def submit(
+        self,
+        channel: discord.abc.Messageable,
+        content: Optional[str] = None,
+        *,
+        priority: int = AUDIT,
+        coalesce_key: Optional[str] = None,
+        **kwargs,
+    ) -> asyncio.Future:
+        """
+        Queue a message and return a future resolving to the sent discord.Message
+        (or None if it was dropped/coalesced). Callers may ignore the future.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        q = self._queue_for(channel)
+
+        if content is not None:
+            kwargs["content"] = content
+
+        job = _Job(priority, next(self._seq), kwargs, future, coalesce_key)
+
+        if coalesce_key is not None:
+            previous = q.coalesced.get(coalesce_key)
+            if previous is not None and not previous.cancelled:
+                previous.cancelled = True
+                self.coalesced[previous.priority] += 1
+                if not previous.future.done():
+                    previous.future.set_result(None)
+            q.coalesced[coalesce_key] = job
+
+        heapq.heappush(q.heap, job)
+        if priority == HEARTBEAT:
+            self._trim_heartbeats(q)
+
+        q.wakeup.set()
+        if q.worker is None or q.worker.done():
+            q.worker = loop.create_task(self._worker(channel.id, q))
+        return future
+
+    async def send(self, channel: discord.abc.Messageable, content: Optional[str] = None, **kwargs) -> Optional[discord.Message]:
+        """Queue a message and wait until it has actually been sent."""
+        return await self.submit(channel, content, **kwargs)
+
+    def queue_depths(self) -> Dict[int, Dict[str, int]]:
+        """Per-channel queue depth broken down by priority class."""
+        out: Dict[int, Dict[str, int]] = {}
+        for cid, q in self._queues.items():
+            counts = {name: 0 for name in PRIORITY_NAMES.values()}
+            for j in q.live_jobs():
+                counts[PRIORITY_NAMES[j.priority]] += 1
+            out[cid] = counts
+        return out
+
+    def metrics(self) -> dict:
+        depths = self.queue_depths()
+        total = {name: 0 for name in PRIORITY_NAMES.values()}
+        for counts in depths.values():
+            for name, n in counts.items():
+                total[name] += n
+        return {
+            "queued": total,
+            "channels": len(depths),
+            "sent": {PRIORITY_NAMES[p]: n for p, n in self.sent.items()},
+            "dropped": {PRIORITY_NAMES[p]: n for p, n in self.dropped.items()},
+            "coalesced": {PRIORITY_NAMES[p]: n for p, n in self.coalesced.items()},
+            "failed": {PRIORITY_NAMES[p]: n for p, n in self.failed.items()},
+            "max_wait_seconds": {PRIORITY_NAMES[p]: round(s, 3) for p, s in self.max_wait.items()},
+        }
+
+    async def close(self):
+        """Cancel all workers; pending jobs resolve to None."""
+        for q in self._queues.values():
+            if q.worker and not q.worker.done():
+                q.worker.cancel()
+            for j in q.heap:
+                if not j.future.done():
+                    j.future.set_result(None)
+            q.heap.clear()
+        self._queues.clear()
+
+    # ===== INTERNALS =====
+    def _queue_for(self, channel: discord.abc.Messageable) -> _ChannelQueue:
+        q = self._queues.get(channel.id)
+        if q is None:
+            q = self._queues[channel.id] = _ChannelQueue(channel)
+        else:
+            q.channel = channel
+        return q
+
+    def _trim_heartbeats(self, q: _ChannelQueue):
+        beats = sorted(j for j in q.live_jobs() if j.priority == HEARTBEAT)
+        for j in beats[:-MAX_HEARTBEATS_PER_CHANNEL]:
+            j.cancelled = True
+            self.dropped[HEARTBEAT] += 1
+            if not j.future.done():
+                j.future.set_result(None)
+
+    def _pop(self, q: _ChannelQueue) -> Optional[_Job]:
+        while q.heap:
+            job = heapq.heappop(q.heap)
+            if job.coalesce_key is not None and q.coalesced.get(job.coalesce_key) is job:
+                del q.coalesced[job.coalesce_key]
+            if not job.cancelled:
+                return job
+        return None
+
+    async def _worker(self, channel_id: int, q: _ChannelQueue):
+        while True:
+            job = self._pop(q)
+            if job is None:
+                q.wakeup.clear()
+                try:
+                    await asyncio.wait_for(q.wakeup.wait(), timeout=WORKER_IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    if not q.heap:
+                        self._queues.pop(channel_id, None)
+                        return
+                continue
+
+            waited = time.monotonic() - job.enqueued_at
+            if waited > self.max_wait[job.priority]:
+                self.max_wait[job.priority] = waited
+            try:
+                # discord.py handles 429s/retry-after per route; we only order the sends.
+                msg = await q.channel.send(**job.kwargs)
+                self.sent[job.priority] += 1
+                if not job.future.done():
+                    job.future.set_result(msg)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.set_result(None)
+                raise
+            except Exception as e:
+                self.failed[job.priority] += 1
+                logger.warning(f"Dispatcher send to {channel_id} failed ({PRIORITY_NAMES[job.priority]}): {e}")
+                if not job.future.done():
+                    job.future.set_exception(e)
+                    # Nobody may be awaiting this; mark as retrieved to avoid noisy warnings.
+                    job.future.exception()
+
+
+def dispatch(
+    bot,
+    channel: discord.abc.Messageable,
+    content: Optional[str] = None,
+    *,
+    priority: int = AUDIT,
+    coalesce_key: Optional[str] = None,
+    **kwargs,
+) -> asyncio.Future:
+    """
+    Send through bot.dispatcher when present, otherwise fall back to channel.send
+    (keeps cogs usable when loaded on a bare commands.Bot).
+    """
+    dispatcher: Optional[MessageDispatcher] = getattr(bot, "dispatcher", None)
+    if dispatcher is not None:
+        return dispatcher.submit(channel, content, priority=priority, coalesce_key=coalesce_key, **kwargs)
+    if content is not None:
+        kwargs["content"] = content
+    task = asyncio.ensure_future(channel.send(**kwargs))
+
+    def _report(t: asyncio.Future):
+        # Callers rarely await this; a failed send would otherwise vanish as "exception never retrieved".
+        if not t.cancelled() and t.exception() is not None:
+            guild = getattr(channel, "guild", None)
+            errors.capture(bot, t.exception(), where="dispatch:send", guild_id=getattr(guild, "id", None))
+
+    task.add_done_callback(_report)
+    return task
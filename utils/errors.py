@@ -0,0 +1,189 @@
+# utils/errors.py
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import traceback
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import config
+
+logger = logging.getLogger("bot")
+
+# A fingerprint is reported at most once per window; repeats are counted and summarised.
+REPORT_WINDOW = getattr(config, "ERROR_REPORT_WINDOW_SECONDS", 300)
+# Distinct fingerprints kept; the least recently seen is dropped beyond this.
+MAX_FINGERPRINTS = 200
+# Innermost frames that make up a fingerprint (with the exception type).
+FINGERPRINT_FRAMES = 3
+
+
+def unwrap(error: BaseException) -> BaseException:
+    """The exception the command actually raised, not discord.py's invoke wrapper."""
+    while isinstance(error, (app_commands.CommandInvokeError, commands.CommandInvokeError)) and error.original:
+        error = error.original
+    return error
+
+
+def fingerprint(error: BaseException) -> tuple:
+    """(fingerprint id, frames) — stable across messages/ids, changes when the failing code path does."""
+    frames = traceback.extract_tb(error.__traceback__)[-FINGERPRINT_FRAMES:]
+    # File basename + function (no line numbers) so unrelated edits don't split a fingerprint.
+    where = [f"{os.path.basename(f.filename)}:{f.name}" for f in frames]
+    key = "|".join([f"{type(error).__module__}.{type(error).__qualname__}", *where])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:10], where
+
+
+class ErrorStat:
+    __slots__ = ("fingerprint", "exc_type", "message", "frames", "where", "guild_id", "traceback",
+                 "count", "first_seen", "last_seen", "last_reported", "pending")
+
+    def __init__(self, fp: str, error: BaseException, frames: List[str], where: str, guild_id: Optional[int]):
+        now = time.time()
+        self.fingerprint = fp
+        self.exc_type = type(error).__name__
+        self.message = str(error)[:300]
+        self.frames = frames
+        self.where = where
+        self.guild_id = guild_id
+        self.traceback = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.last_reported = 0.0
+        self.pending = 0  # occurrences since the last report
+
+
+class ErrorReport:
+    __slots__ = ("stat", "occurrences", "first", "window")
+
+    def __init__(self, stat: ErrorStat, occurrences: int, first: bool, window: float = REPORT_WINDOW):
+        self.stat = stat
+        self.occurrences = occurrences
+        self.first = first
+        self.window = window
+
+    def render(self) -> str:
+        s = self.stat
+        if self.first:
+            return (f"❌ **{s.exc_type}** in `{s.where}` · fingerprint `{s.fingerprint}`\n"
+                    f"```py\n{s.traceback[-1700:]}\n```")
+        return (f"🔁 **{s.exc_type}** in `{s.where}` · fingerprint `{s.fingerprint}` — "
+                f"×{self.occurrences} in the last {max(1, round(self.window / 60))} min ({s.count} total): {s.message[:200]}")
+
+
+class ErrorTracker:
+    """
+    Bounded table of error fingerprints with windowed reporting.
+
+    The first occurrence of a fingerprint is logged with its traceback and handed to
+    the reporter; repeats within REPORT_WINDOW are only counted, then summarised once
+    (×N) when the window closes.
+    """
+
+    def __init__(self, window: float = REPORT_WINDOW, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self._stats: "OrderedDict[str, ErrorStat]" = OrderedDict()
+        self._reporter: Optional[Callable[[ErrorReport], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.total = 0
+        self.suppressed = 0
+
+    def set_reporter(self, reporter: Optional[Callable[[ErrorReport], None]]):
+        self._reporter = reporter
+
+    def _report(self, report: ErrorReport):
+        s = report.stat
+        if report.first:
+            logger.error(f"[{s.fingerprint}] {s.exc_type} in {s.where}\n{s.traceback}")
+        else:
+            logger.warning(f"[{s.fingerprint}] {s.exc_type} in {s.where} ×{report.occurrences} in {self.window:.0f}s "
+                           f"({s.count} total)")
+        if self._reporter is not None:
+            try:
+                self._reporter(report)
+            except Exception as e:
+                logger.warning(f"Error reporter failed: {e}")
+
+    # ===== CAPTURE =====
+    def capture(self, error: BaseException, where: str = "?", guild_id: Optional[int] = None) -> ErrorStat:
+        error = unwrap(error)
+        fp, frames = fingerprint(error)
+        now = time.time()
+        stat = self._stats.get(fp)
+        if stat is None:
+            stat = ErrorStat(fp, error, frames, where, guild_id)
+            self._stats[fp] = stat
+            while len(self._stats) > self.max_fingerprints:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(fp)
+            stat.message = str(error)[:300]
+            stat.where = where
+            stat.guild_id = guild_id or stat.guild_id
+        stat.count += 1
+        stat.last_seen = now
+        self.total += 1
+
+        if now - stat.last_reported >= self.window and stat.pending == 0:
+            stat.last_reported = now
+            self._report(ErrorReport(stat, 1, first=True, window=self.window))
+        else:
+            stat.pending += 1
+            self.suppressed += 1
+        self._ensure_flusher()
+        return stat
+
+    # ===== WINDOWED SUMMARIES =====
+    def flush(self, force: bool = False) -> List[ErrorReport]:
+        now = time.time()
+        reports = []
+        for stat in self._stats.values():
+            if stat.pending and (force or now - stat.last_reported >= self.window):
+                reports.append(ErrorReport(stat, stat.pending, first=False, window=self.window))
+                stat.pending = 0
+                stat.last_reported = now
+        for report in reports:
+            self._report(report)
+        return reports
+
+    def _ensure_flusher(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+        except RuntimeError:
+            self._task = None  # no running loop (offline tools); flush() can be called by hand
+
+    async def _flush_loop(self):
+        while any(s.pending for s in self._stats.values()):
+            await asyncio.sleep(max(1.0, self.window / 10))
+            self.flush()
+
+    # ===== QUERY =====
+    def top(self, n: int = 10) -> List[ErrorStat]:
+        return sorted(self._stats.values(), key=lambda s: (s.count, s.last_seen), reverse=True)[:n]
+
+    def snapshot(self) -> dict:
+        return {"fingerprints": len(self._stats), "total": self.total, "suppressed": self.suppressed}
+
+
+def capture(bot, error: BaseException, where: str = "?", guild_id: Optional[int] = None):
+    """Record through bot.errors when attached; otherwise just log the traceback."""
+    tracker: Optional[ErrorTracker] = getattr(bot, "errors", None)
+    if tracker is not None:
+        return tracker.capture(error, where, guild_id)
+    logger.exception(f"Error in {where}", exc_info=unwrap(error))
+    return None
+
+
+def command_name(interaction: discord.Interaction) -> str:
+    cmd = interaction.command
+    return f"/{cmd.qualified_name}" if cmd is not None else "interaction"
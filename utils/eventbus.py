@@ -0,0 +1,197 @@
+# utils/eventbus.py
+import asyncio
+import functools
+import logging
+import time
+from typing import Dict, List, Optional
+
+import discord
+
+import config
+from utils import errors
+
+logger = logging.getLogger("bot")
+
+# Per-cog defaults; a cog can override with event_workers / event_queue_size / event_timeout attributes.
+# Events within a lane only run in arrival order with a single worker (event_workers = 1).
+WORKERS = getattr(config, "EVENTBUS_WORKERS", 4)
+QUEUE_SIZE = getattr(config, "EVENTBUS_QUEUE_SIZE", 1000)
+HANDLER_TIMEOUT = getattr(config, "EVENTBUS_HANDLER_TIMEOUT", 15.0)
+# A full queue logs at most one "dropping events" warning per lane per this many seconds.
+DROP_LOG_INTERVAL = 30.0
+
+
+class _Event:
+    __slots__ = ("name", "method", "args", "kwargs", "enqueued_at")
+
+    def __init__(self, name: str, method, args: tuple, kwargs: dict):
+        self.name = name
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.perf_counter()
+
+
+def _guild_id(args: tuple) -> Optional[int]:
+    """Guild of a gateway event, from its first argument (message, member, channel, guild, raw payload)."""
+    if not args:
+        return None
+    first = args[0]
+    if isinstance(first, discord.Guild):
+        return first.id
+    gid = getattr(first, "guild_id", None)  # raw event payloads
+    if gid is None:
+        gid = getattr(getattr(first, "guild", None), "id", None)
+    return gid
+
+
+class _Lane:
+    """One cog's queue and worker pool."""
+
+    def __init__(self, name: str, workers: int, queue_size: int, timeout: float):
+        self.name = name
+        self.size = max(1, workers)
+        self.timeout = timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.workers: List[asyncio.Task] = []
+        self.busy = 0
+        self.processed = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.max_wait_ms = 0.0
+        self.last_drop_log = 0.0
+
+
+class EventBus:
+    """
+    Fans gateway events out to cog listeners through per-cog bounded queues.
+
+    attach_cog() swaps each of a cog's listeners for a stub that only enqueues,
+    so discord.py's dispatch returns immediately. Each cog's own workers run the
+    handlers with a timeout; a cog whose Discord calls stall fills (and then
+    drops from) its own queue without delaying any other cog. Handler latency
+    is recorded in bot.perf as before, plus the queue wait per cog.
+    """
+
+    def __init__(self, bot, workers: int = WORKERS, queue_size: int = QUEUE_SIZE, timeout: float = HANDLER_TIMEOUT):
+        self.bot = bot
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._lanes: Dict[str, _Lane] = {}
+        self._stubs: Dict[str, list] = {}  # cog name -> [(event_name, stub)]
+
+    # ===== REGISTRATION =====
+    def attach_cog(self, cog):
+        """Route every listener of `cog` through its lane (idempotent)."""
+        name = cog.qualified_name
+        listeners = cog.get_listeners()
+        if name in self._stubs or not listeners:
+            return
+        lane = self._lanes[name] = _Lane(
+            name,
+            getattr(cog, "event_workers", self.workers),
+            getattr(cog, "event_queue_size", self.queue_size),
+            getattr(cog, "event_timeout", self.timeout),
+        )
+        stubs = self._stubs[name] = []
+        for event_name, method in listeners:
+            stub = self._make_stub(lane, f"{name}.{method.__name__}", method)
+            self.bot.remove_listener(method, event_name)
+            self.bot.add_listener(stub, event_name)
+            stubs.append((event_name, stub))
+
+    def detach_cog(self, cog):
+        """Put the cog's own listeners back and stop its workers (pending events are discarded)."""
+        name = cog.qualified_name
+        for event_name, stub in self._stubs.pop(name, []):
+            self.bot.remove_listener(stub, event_name)
+        for event_name, method in cog.get_listeners():
+            self.bot.add_listener(method, event_name)
+        lane = self._lanes.pop(name, None)
+        if lane is not None:
+            for task in lane.workers:
+                task.cancel()
+
+    def _make_stub(self, lane: _Lane, name: str, method):
+        @functools.wraps(method)
+        async def stub(*args, **kwargs):
+            self._enqueue(lane, _Event(name, method, args, kwargs))
+
+        return stub
+
+    # ===== QUEUEING =====
+    def _enqueue(self, lane: _Lane, event: _Event):
+        if not lane.workers:
+            loop = asyncio.get_running_loop()
+            lane.workers = [loop.create_task(self._worker(lane)) for _ in range(lane.size)]
+        try:
+            lane.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            lane.dropped += 1
+            now = time.monotonic()
+            if now - lane.last_drop_log >= DROP_LOG_INTERVAL:
+                lane.last_drop_log = now
+                logger.warning(f"📬 {lane.name} event queue full ({lane.queue.maxsize}); dropping {event.name} "
+                               f"({lane.dropped} dropped so far)")
+            return
+        lane.max_depth = max(lane.max_depth, lane.queue.qsize())
+
+    async def _worker(self, lane: _Lane):
+        perf = getattr(self.bot, "perf", None)
+        while True:
+            event = await lane.queue.get()
+            started = time.perf_counter()
+            wait_ms = (started - event.enqueued_at) * 1000
+            lane.max_wait_ms = max(lane.max_wait_ms, wait_ms)
+            lane.busy += 1
+            try:
+                await asyncio.wait_for(event.method(*event.args, **event.kwargs), lane.timeout)
+            except asyncio.TimeoutError:
+                lane.timeouts += 1
+                logger.warning(f"📬 {event.name} timed out after {lane.timeout:.0f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                lane.failed += 1
+                errors.capture(self.bot, e, where=f"listener:{event.name}", guild_id=_guild_id(event.args))
+            finally:
+                lane.busy -= 1
+                lane.processed += 1
+                lane.queue.task_done()
+                if perf is not None:
+                    perf.record(f"listener:{event.name}", (time.perf_counter() - started) * 1000)
+                    perf.record(f"queue:{lane.name}", wait_ms)
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until every lane's queue is empty (tests/shutdown)."""
+        await asyncio.wait_for(asyncio.gather(*(lane.queue.join() for lane in self._lanes.values())), timeout)
+
+    async def close(self):
+        for lane in self._lanes.values():
+            for task in lane.workers:
+                task.cancel()
+            lane.workers = []
+
+    # ===== METRICS =====
+    def backlog(self) -> int:
+        return sum(lane.queue.qsize() + lane.busy for lane in self._lanes.values())
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "queued": lane.queue.qsize(),
+                "max_queued": lane.max_depth,
+                "capacity": lane.queue.maxsize,
+                "busy": lane.busy,
+                "workers": lane.size,
+                "processed": lane.processed,
+                "dropped": lane.dropped,
+                "timeouts": lane.timeouts,
+                "failed": lane.failed,
+                "max_wait_ms": round(lane.max_wait_ms, 2),
+            }
+            for name, lane in self._lanes.items()
+        }
@@ -0,0 +1,54 @@
+# utils/fastjson.py
+"""
+JSON for the on-disk stores: orjson when FAST_RUNTIME is on and orjson is
+installed, stdlib json otherwise.
+
+Both paths write compact UTF-8 bytes by default; pass pretty=True for an
+indented, human-editable dump. Files written by either backend read back with
+either backend.
+"""
+import json
+import os
+from typing import Any, Union
+
+import config
+
+orjson = None
+if getattr(config, "FAST_RUNTIME", False):
+    try:
+        import orjson  # optional: pip install orjson
+    except ImportError:  # pragma: no cover - depends on environment
+        orjson = None
+
+HAS_ORJSON = orjson is not None
+BACKEND = "orjson" if HAS_ORJSON else "json"
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    if orjson is not None:
+        # NON_STR_KEYS: match stdlib, which turns int dict keys into strings.
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_file(path: str, obj: Any, pretty: bool = False):
+    """Atomic write (tmp + os.replace), same as the stores did before."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(dumps(obj, pretty=pretty))
+    os.replace(tmp, path)
+
+
+def read_file(path: str, default: Any = None) -> Any:
+    with open(path, "rb") as f:
+        raw = f.read().strip()
+    return loads(raw) if raw else default
@@ -0,0 +1,211 @@
+# utils/lockdown.py
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+import config
+from utils import fastjson
+
+logger = logging.getLogger("bot")
+
+LOCKDOWN_PATH = getattr(config, "LOCKDOWN_PATH", os.path.join("data", "lockdown.json"))
+CONCURRENCY = getattr(config, "LOCKDOWN_CONCURRENCY", 5)
+# Starts are spaced at least this far apart; the gap doubles (up to MAX_INTERVAL) after a
+# call that was rate-limited or held by discord.py's limiter, and shrinks back on fast calls.
+MIN_INTERVAL = getattr(config, "LOCKDOWN_MIN_INTERVAL", 0.05)
+MAX_INTERVAL = 5.0
+SLOW_CALL = 1.0
+
+
+class PacedLimiter:
+    """At most `concurrency` calls in flight, started at least `interval` seconds apart."""
+
+    def __init__(self, concurrency: int = CONCURRENCY, interval: float = MIN_INTERVAL):
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._gate = asyncio.Lock()
+        self.min_interval = interval
+        self.interval = interval
+        self._next_start = 0.0
+        self.slow = 0
+
+    async def call(self, fn, *args, **kwargs):
+        async with self._sem:
+            async with self._gate:
+                wait = self._next_start - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = time.monotonic() + self.interval
+            t0 = time.monotonic()
+            limited = False
+            try:
+                return await fn(*args, **kwargs)
+            except discord.HTTPException as e:
+                limited = e.status == 429
+                raise
+            finally:
+                took = time.monotonic() - t0
+                if limited or took >= SLOW_CALL:
+                    self.slow += 1
+                    self.interval = min(max(self.interval * 2, took / 2), MAX_INTERVAL)
+                else:
+                    self.interval = max(self.min_interval, self.interval * 0.8)
+
+
+def _pack(ow: Optional[discord.PermissionOverwrite]) -> Optional[List[int]]:
+    if ow is None or ow.is_empty():
+        return None
+    allow, deny = ow.pair()
+    return [allow.value, deny.value]
+
+
+def _unpack(saved: Optional[List[int]]) -> Optional[discord.PermissionOverwrite]:
+    if saved is None:
+        return None
+    return discord.PermissionOverwrite.from_pair(discord.Permissions(saved[0]), discord.Permissions(saved[1]))
+
+
+class LockdownManager:
+    """
+    Server-wide lockdowns with an exact restore.
+
+    start() records every text channel's @everyone overwrite (allow/deny bits, or none
+    at all) in data/lockdown.json *before* touching anything, then denies Send Messages
+    everywhere through a PacedLimiter. end() puts each recorded overwrite back as it
+    was — including removing it when the channel had none — and drops the record only
+    for channels that were restored, so a partial failure can simply be retried. The
+    record survives restarts.
+    """
+
+    def __init__(self, path: str = LOCKDOWN_PATH):
+        self.path = path
+        self._state: Dict[str, dict] = self._load()
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    # ===== PERSISTENCE =====
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            return fastjson.read_file(self.path, default={}) or {}
+        except Exception as e:
+            logger.warning(f"🚨 Couldn't read {self.path} ({e}); no lockdowns will be restorable")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fastjson.write_file(self.path, self._state, pretty=getattr(config, "PRETTY_JSON_STORES", False))
+
+    def _lock(self, guild_id: int) -> asyncio.Lock:
+        return self._locks.setdefault(guild_id, asyncio.Lock())
+
+    # ===== STATE =====
+    def active(self, guild_id: int) -> Optional[dict]:
+        return self._state.get(str(guild_id))
+
+    def covers(self, guild_id: int, channel_id: int) -> bool:
+        entry = self.active(guild_id)
+        return entry is not None and str(channel_id) in entry["channels"]
+
+    def forget_send_deny(self, guild_id: int, channel_id: int) -> bool:
+        """
+        Clear Send Messages in a channel's *saved* overwrite (a timed /lock expiring mid-lockdown),
+        so lockdown end restores it unlocked. False if the channel isn't part of a lockdown.
+        """
+        if not self.covers(guild_id, channel_id):
+            return False
+        entry = self.active(guild_id)["channels"]
+        ow = _unpack(entry[str(channel_id)])
+        if ow is not None:
+            ow.send_messages = None
+            entry[str(channel_id)] = _pack(ow)
+            self._save()
+        return True
+
+    # ===== LOCK / RESTORE =====
+    async def start(self, guild: discord.Guild, *, by: int, reason: str) -> Tuple[int, int, List[str]]:
+        """Lock every text channel the bot can manage. Returns (locked, already_locked, failures)."""
+        async with self._lock(guild.id):
+            if self.active(guild.id) is not None:
+                raise RuntimeError("This server is already in lockdown.")
+            everyone = guild.default_role
+            snapshot, targets, skipped, failures = {}, [], 0, []
+            for chan in guild.text_channels:
+                if not chan.permissions_for(guild.me).manage_roles:
+                    failures.append(f"{chan.mention}: missing Manage Permissions")
+                    continue
+                ow = chan.overwrites.get(everyone)
+                # Already-locked channels are recorded too (a timed /lock may expire mid-lockdown)
+                # but need no API call.
+                snapshot[str(chan.id)] = _pack(ow)
+                if ow is not None and ow.send_messages is False:
+                    skipped += 1
+                else:
+                    targets.append((chan, ow))
+            self._state[str(guild.id)] = {"started_at": time.time(), "by": by, "reason": reason, "channels": snapshot}
+            self._save()
+
+            limiter = PacedLimiter()
+            audit_reason = f"Lockdown: {reason}"
+
+            async def lock(chan: discord.TextChannel, ow: Optional[discord.PermissionOverwrite]):
+                new = _unpack(_pack(ow)) or discord.PermissionOverwrite()
+                new.send_messages = False
+                await limiter.call(chan.set_permissions, everyone, overwrite=new, reason=audit_reason)
+
+            results = await asyncio.gather(*(lock(c, ow) for c, ow in targets), return_exceptions=True)
+            locked = 0
+            for (chan, _), result in zip(targets, results):
+                if isinstance(result, BaseException):
+                    # Never changed, so there is nothing to restore.
+                    self._state[str(guild.id)]["channels"].pop(str(chan.id), None)
+                    failures.append(f"{chan.mention}: {result}")
+                else:
+                    locked += 1
+            self._save()
+            if limiter.slow:
+                logger.info(f"🚨 Lockdown in {guild.name}: {limiter.slow} rate-limited call(s), pacing ended at {limiter.interval:.2f}s")
+            return locked, skipped, failures
+
+    async def end(self, guild: discord.Guild, *, reason: str) -> Tuple[int, int, List[str]]:
+        """Restore the saved overwrites. Returns (changed, gone, failures); failures stay recorded."""
+        async with self._lock(guild.id):
+            entry = self.active(guild.id)
+            if entry is None:
+                raise RuntimeError("This server is not in lockdown.")
+            everyone = guild.default_role
+            saved: Dict[str, Optional[List[int]]] = entry["channels"]
+            targets, gone = [], 0
+            for cid, packed in list(saved.items()):
+                chan = guild.get_channel(int(cid))
+                if not isinstance(chan, discord.TextChannel):
+                    gone += 1
+                    del saved[cid]
+                    continue
+                if _pack(chan.overwrites.get(everyone)) == packed:
+                    del saved[cid]  # already as it was (e.g. was locked before the lockdown)
+                    continue
+                targets.append((cid, chan, packed))
+
+            limiter = PacedLimiter()
+            audit_reason = f"Lockdown ended: {reason}"
+
+            async def restore(chan: discord.TextChannel, packed: Optional[List[int]]):
+                # overwrite=None deletes the @everyone overwrite, as it was before the lockdown.
+                await limiter.call(chan.set_permissions, everyone, overwrite=_unpack(packed), reason=audit_reason)
+
+            results = await asyncio.gather(*(restore(c, p) for _, c, p in targets), return_exceptions=True)
+            restored, failures = 0, []
+            for (cid, chan, _), result in zip(targets, results):
+                if isinstance(result, BaseException):
+                    failures.append(f"{chan.mention}: {result}")
+                else:
+                    restored += 1
+                    del saved[cid]
+            if not saved:
+                del self._state[str(guild.id)]
+            self._save()
+            return restored, gone, failures
@@ -0,0 +1,120 @@
+# utils/loopmon.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+import config
+from utils.perf import RollingHistogram
+
+logger = logging.getLogger("bot")
+
+# How often the loop is asked to wake up; lag = how late that wake-up actually was.
+SAMPLE_INTERVAL = getattr(config, "LOOP_LAG_INTERVAL", 0.1)
+# A loop that hasn't woken up for this long is considered blocked; its stack is captured.
+BLOCK_THRESHOLD_MS = getattr(config, "LOOP_BLOCK_THRESHOLD_MS", 250)
+# Recent stalls kept for /loopstats.
+MAX_STALLS = 20
+
+
+class Stall:
+    __slots__ = ("started_at", "duration_ms", "stack")
+
+    def __init__(self, started_at: float, duration_ms: float, stack: List[str]):
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.stack = stack
+
+    def top_frames(self, n: int = 6) -> str:
+        return "".join(self.stack[-n:])
+
+
+class LoopLagMonitor:
+    """
+    Continuously samples event-loop scheduling lag.
+
+    A coroutine sleeps SAMPLE_INTERVAL and records how late it woke up. A watchdog
+    thread watches that heartbeat; when it goes stale past BLOCK_THRESHOLD_MS the
+    loop thread's current stack is captured, which points straight at the blocking
+    call (sync file I/O, CPU-heavy JSON, ...).
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, threshold_ms: float = BLOCK_THRESHOLD_MS):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.lag = RollingHistogram(window=4096)
+        self.stalls: Deque[Stall] = deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._current: Optional[Stall] = None
+
+    # ===== LIFECYCLE =====
+    def start(self):
+        """Must be called from inside the running loop."""
+        if self._task and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sampler())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    # ===== SAMPLING =====
+    async def _sampler(self):
+        while True:
+            t0 = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - t0 - self.interval) * 1000)
+            self.lag.add(lag_ms, self.threshold_ms)
+            self._last_beat = now
+            current = self._current
+            if current is not None:
+                # The stall ended; the real duration is the full late wake-up.
+                current.duration_ms = lag_ms
+                logger.warning(f"🧊 Event loop was blocked for {lag_ms:.0f} ms; stack at detection:\n{current.top_frames()}")
+                self._current = None
+
+    def _watchdog(self):
+        check_every = max(0.01, self.threshold_ms / 4000)
+        while not self._stop.wait(check_every):
+            stale_ms = (time.monotonic() - self._last_beat) * 1000
+            if stale_ms < self.threshold_ms or self._current is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame) if frame is not None else ["<loop thread frame unavailable>\n"]
+            stall = Stall(time.time(), stale_ms, stack)
+            self._current = stall
+            self.stalls.append(stall)
+            self.stall_count += 1
+
+    # ===== EXPORT =====
+    def snapshot(self) -> dict:
+        p50, p95, p99 = self.lag.percentiles(50, 95, 99)
+        return {
+            "samples": self.lag.count,
+            "p50_ms": round(p50, 2),
+            "p95_ms": round(p95, 2),
+            "p99_ms": round(p99, 2),
+            "max_ms": round(self.lag.max_ms, 2),
+            "stalls": self.stall_count,
+            "threshold_ms": self.threshold_ms,
+        }
+
+    def recent_stalls(self, n: int = 3) -> List[Stall]:
+        return list(self.stalls)[-n:]
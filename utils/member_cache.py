@@ -0,0 +1,209 @@
+# utils/member_cache.py
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import discord
+
+import config
+from utils import settings
+from utils.ttlcache import TTLCache
+
+try:
+    import resource  # POSIX only
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+logger = logging.getLogger("bot")
+
+# "lean": no chunk-on-startup, keep only recently seen + staff members, fetch the rest on demand.
+# "full": discord.py defaults (download every member of every guild at startup).
+POLICY = getattr(config, "MEMBER_CACHE_POLICY", "lean")
+# Members not seen for this long (and without a staff role) are evicted.
+SEEN_TTL_SECONDS = getattr(config, "MEMBER_CACHE_TTL_SECONDS", 6 * 3600)
+TRIM_EVERY_SECONDS = getattr(config, "MEMBER_CACHE_TRIM_SECONDS", 10 * 60)
+# Members fetched over the API (not in the gateway cache) are kept this many at most, for SEEN_TTL_SECONDS.
+FETCHED_MAX = getattr(config, "MEMBER_CACHE_FETCHED_MAX", 2048)
+
+
+def bot_kwargs(intents: discord.Intents) -> dict:
+    """Extra commands.Bot(...) kwargs for the configured policy."""
+    if POLICY != "lean":
+        return {}
+    flags = discord.MemberCacheFlags.from_intents(intents)
+    return {"chunk_guilds_at_startup": False, "member_cache_flags": flags}
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (falls back to peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        if resource is None:
+            return 0.0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _staff_role_names() -> frozenset:
+    s = settings.current()
+    return s.staff_roles | {s.super_role}
+
+
+class MemberCachePolicy:
+    """
+    Keeps the member cache to members seen recently or holding staff roles.
+
+    discord.py only exposes on/off cache flags, so retention is done by touching
+    members as they show up (messages, interactions, joins) and periodically
+    evicting the rest. Members that aren't cached are fetched one at a time by
+    get_or_fetch_member and kept in a small TTL cache of our own; full member
+    lists are never downloaded.
+    """
+
+    def __init__(self, bot, ttl: float = SEEN_TTL_SECONDS, trim_every: float = TRIM_EVERY_SECONDS):
+        self.bot = bot
+        self.ttl = ttl
+        self.trim_every = trim_every
+        self.enabled = POLICY == "lean"
+        self._seen: Dict[Tuple[int, int], float] = {}
+        self._fetched: TTLCache[Optional[discord.Member]] = TTLCache(ttl, maxsize=FETCHED_MAX)
+        self._task: Optional[asyncio.Task] = None
+        self.started_at = time.monotonic()
+        self.ready_seconds: Optional[float] = None
+        self.ready_rss_mb: Optional[float] = None
+        self.evicted = 0
+        self.fetched = 0
+        self._trim_unsupported_logged = False
+
+    # ===== HOOKS =====
+    def attach(self):
+        self.bot.add_listener(self.on_ready, "on_ready")
+        if not self.enabled:
+            return
+        self.bot.add_listener(self.on_message, "on_message")
+        self.bot.add_listener(self.on_interaction, "on_interaction")
+        self.bot.add_listener(self.on_member_join, "on_member_join")
+
+    async def on_ready(self):
+        if self.ready_seconds is None:
+            self.ready_seconds = time.monotonic() - self.started_at
+            self.ready_rss_mb = rss_mb()
+            logger.info(
+                f"⏱️ Ready in {self.ready_seconds:.1f}s · RSS {self.ready_rss_mb:.0f} MiB · "
+                f"{self.cached_members()} cached members · policy={POLICY}"
+            )
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._trim_loop())
+
+    async def on_message(self, message: discord.Message):
+        if isinstance(message.author, discord.Member):
+            self.touch(message.author)
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        if isinstance(interaction.user, discord.Member):
+            self.touch(interaction.user)
+
+    async def on_member_join(self, member: discord.Member):
+        self.touch(member)
+
+    # ===== CACHE =====
+    def touch(self, member: discord.Member):
+        self._seen[(member.guild.id, member.id)] = time.monotonic()
+
+    def _keep(self, member: discord.Member, now: float, staff_names: set) -> bool:
+        if member.id == getattr(self.bot.user, "id", None):
+            return True
+        if staff_names and any(r.name in staff_names for r in member.roles):
+            return True
+        if member.guild_permissions.administrator:
+            return True
+        seen = self._seen.get((member.guild.id, member.id))
+        return seen is not None and now - seen < self.ttl
+
+    def trim(self) -> int:
+        """
+        Evict cached members that are neither staff nor recently seen. discord.py has no public
+        way to drop a member from the cache, so this relies on the private Guild._remove_member;
+        if a discord.py release removes it, trimming is skipped (with a warning) rather than failing.
+        """
+        if not hasattr(discord.Guild, "_remove_member"):
+            if not self._trim_unsupported_logged:
+                self._trim_unsupported_logged = True
+                logger.warning("🧹 This discord.py has no Guild._remove_member; member cache trimming is disabled")
+            return 0
+        now = time.monotonic()
+        staff_names = _staff_role_names()
+        removed = 0
+        for guild in self.bot.guilds:
+            for member in list(guild.members):
+                if not self._keep(member, now, staff_names):
+                    guild._remove_member(member)
+                    self._seen.pop((guild.id, member.id), None)
+                    removed += 1
+        for key, seen in list(self._seen.items()):
+            if now - seen >= self.ttl:
+                del self._seen[key]
+        self.evicted += removed
+        return removed
+
+    async def _trim_loop(self):
+        while True:
+            await asyncio.sleep(self.trim_every)
+            try:
+                removed = self.trim()
+                if removed:
+                    logger.info(f"🧹 Member cache trimmed {removed} members ({self.cached_members()} kept)")
+            except Exception as e:
+                logger.warning(f"Member cache trim failed: {e}")
+
+    # ===== ON-DEMAND =====
+    async def get_or_fetch_member(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        member = guild.get_member(user_id)
+        if member is not None:
+            self.touch(member)
+            return member
+        key = (guild.id, user_id)
+        if key in self._fetched:
+            return self._fetched.get(key)
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None  # remembered too: left the server
+        self.fetched += 1
+        self._fetched.set(key, member)
+        return member
+
+    # ===== REPORTING =====
+    def cached_members(self) -> int:
+        return sum(len(g.members) for g in self.bot.guilds)
+
+    def snapshot(self) -> dict:
+        return {
+            "policy": POLICY,
+            "ready_seconds": round(self.ready_seconds, 2) if self.ready_seconds is not None else None,
+            "ready_rss_mb": round(self.ready_rss_mb, 1) if self.ready_rss_mb is not None else None,
+            "rss_mb": round(rss_mb(), 1),
+            "cached_members": self.cached_members(),
+            "tracked_seen": len(self._seen),
+            "evicted": self.evicted,
+            "fetched": self.fetched,
+            "fetched_cached": len(self._fetched),
+        }
+
+
+async def get_or_fetch_member(bot, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    """Cache-policy aware lookup; works on a bot without the policy attached too."""
+    policy: Optional[MemberCachePolicy] = getattr(bot, "member_cache", None)
+    if policy is not None:
+        return await policy.get_or_fetch_member(guild, user_id)
+    member = guild.get_member(user_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+    return member
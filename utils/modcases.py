@@ -0,0 +1,147 @@
+# utils/modcases.py
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import config
+
+logger = logging.getLogger("bot")
+
+DB_PATH = getattr(config, "MODCASES_DB_PATH", os.path.join("data", "modcases.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    guild_id     INTEGER NOT NULL,
+    case_no      INTEGER NOT NULL,
+    action       TEXT    NOT NULL,
+    target_id    INTEGER,
+    moderator_id INTEGER,
+    channel_id   INTEGER,
+    reason       TEXT,
+    duration     TEXT,
+    created_at   REAL    NOT NULL,
+    updated_at   REAL,
+    edited_by    INTEGER,
+    PRIMARY KEY (guild_id, case_no)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cases_target    ON cases (guild_id, target_id, case_no);
+CREATE INDEX IF NOT EXISTS idx_cases_moderator ON cases (guild_id, moderator_id, case_no);
+CREATE INDEX IF NOT EXISTS idx_cases_created   ON cases (guild_id, created_at);
+"""
+
+COLUMNS = ("guild_id", "case_no", "action", "target_id", "moderator_id", "channel_id", "reason", "duration",
+           "created_at", "updated_at", "edited_by")
+
+
+class CaseStore:
+    """
+    Numbered moderation cases per guild (SQLite).
+
+    Case numbers are allocated inside the insert transaction on the store's single
+    DB thread, so concurrent actions never share a number. History lookups walk the
+    (guild, target, case_no) index, newest first, with keyset paging on case_no.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="modcases-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self.opened = 0
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def close(self):
+        await self._call(self._close_db)
+        self._executor.shutdown(wait=False)
+
+    # ===== DB (modcases-db thread only) =====
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _close_db(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _rows(self, sql: str, params: tuple) -> List[dict]:
+        return [dict(zip(COLUMNS, row)) for row in self._db().execute(sql, params).fetchall()]
+
+    def _insert(self, row: dict) -> dict:
+        db = self._db()
+        with db:
+            (last,) = db.execute("SELECT MAX(case_no) FROM cases WHERE guild_id = ?", (row["guild_id"],)).fetchone()
+            row["case_no"] = (last or 0) + 1
+            db.execute(f"INSERT INTO cases ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+        return row
+
+    def _update_reason(self, guild_id: int, case_no: int, reason: str, editor_id: int) -> Optional[dict]:
+        db = self._db()
+        with db:
+            cur = db.execute("UPDATE cases SET reason = ?, updated_at = ?, edited_by = ? WHERE guild_id = ? AND case_no = ?",
+                             (reason, time.time(), editor_id, guild_id, case_no))
+        if not cur.rowcount:
+            return None
+        return self._get(guild_id, case_no)
+
+    def _get(self, guild_id: int, case_no: int) -> Optional[dict]:
+        rows = self._rows(f"SELECT {', '.join(COLUMNS)} FROM cases WHERE guild_id = ? AND case_no = ?", (guild_id, case_no))
+        return rows[0] if rows else None
+
+    def _count(self, guild_id: int, column: str, user_id: int) -> int:
+        return self._db().execute(f"SELECT COUNT(*) FROM cases WHERE guild_id = ? AND {column} = ?",
+                                  (guild_id, user_id)).fetchone()[0]
+
+    # ===== API =====
+    async def open_case(self, guild_id: int, action: str, *, target_id: Optional[int] = None,
+                        moderator_id: Optional[int] = None, channel_id: Optional[int] = None,
+                        reason: Optional[str] = None, duration: Optional[str] = None) -> dict:
+        """Record an action as the guild's next case; returns the row (with case_no)."""
+        row = {"guild_id": guild_id, "action": action, "target_id": target_id, "moderator_id": moderator_id,
+               "channel_id": channel_id, "reason": reason, "duration": duration, "created_at": time.time()}
+        row = await self._call(self._insert, row)
+        self.opened += 1
+        return row
+
+    async def get(self, guild_id: int, case_no: int) -> Optional[dict]:
+        return await self._call(self._get, guild_id, case_no)
+
+    async def update_reason(self, guild_id: int, case_no: int, reason: str, editor_id: int) -> Optional[dict]:
+        return await self._call(self._update_reason, guild_id, case_no, reason, editor_id)
+
+    async def history(self, guild_id: int, user_id: int, *, moderator: bool = False,
+                      before_case: Optional[int] = None, after_case: Optional[int] = None, limit: int = 10) -> List[dict]:
+        """
+        Cases against `user_id` (or taken by them, with moderator=True), newest first.
+        Page with before_case (older) / after_case (newer).
+        """
+        column, index = ("moderator_id", "idx_cases_moderator") if moderator else ("target_id", "idx_cases_target")
+        where, params = ["guild_id = ?", f"{column} = ?"], [guild_id, user_id]
+        if before_case is not None:
+            where.append("case_no < ?")
+            params.append(before_case)
+        if after_case is not None:
+            where.append("case_no > ?")
+            params.append(after_case)
+        order = "ASC" if after_case is not None and before_case is None else "DESC"
+        # Without stats the planner may walk the primary key instead; pin the per-user index.
+        sql = (f"SELECT {', '.join(COLUMNS)} FROM cases INDEXED BY {index} WHERE {' AND '.join(where)} "
+               f"ORDER BY case_no {order} LIMIT ?")
+        rows = await self._call(self._rows, sql, tuple(params) + (limit,))
+        return rows if order == "DESC" else rows[::-1]
+
+    async def count(self, guild_id: int, user_id: int, *, moderator: bool = False) -> int:
+        return await self._call(self._count, guild_id, "moderator_id" if moderator else "target_id", user_id)
+
+    def snapshot(self) -> dict:
+        return {"opened": self.opened}
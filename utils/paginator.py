@@ -0,0 +1,140 @@
+# utils/paginator.py
+import io
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Sequence, Tuple
+
+import discord
+
+import config
+from utils.ttlcache import TTLCache
+
+PAGE_SIZE = 15
+# Rendered pages are reused for this long (flipping back and forth costs nothing), then rebuilt.
+PAGE_TTL = getattr(config, "PAGINATOR_PAGE_TTL", 60)
+MAX_MESSAGE = 2000
+
+# page index -> (lines on that page, whether a later page exists)
+PageFetch = Callable[[int], Awaitable[Tuple[List[str], bool]]]
+Export = Callable[[], AsyncIterator[str]]
+
+
+def list_source(lines: Sequence[str], per_page: int = PAGE_SIZE) -> Tuple[PageFetch, int]:
+    """Pages over an in-memory sequence; returns (fetch, page count)."""
+    async def fetch(page: int) -> Tuple[List[str], bool]:
+        start = page * per_page
+        return list(lines[start:start + per_page]), start + per_page < len(lines)
+
+    return fetch, max(1, -(-len(lines) // per_page))
+
+
+def iter_source(source: AsyncIterator[str], per_page: int = PAGE_SIZE) -> PageFetch:
+    """
+    Pages over an async iterator, pulled only as far as the furthest page viewed.
+    Lines already pulled are kept, since the iterator can't be rewound.
+    """
+    seen: List[str] = []
+    done = False
+
+    async def fetch(page: int) -> Tuple[List[str], bool]:
+        nonlocal done
+        want = (page + 1) * per_page + 1  # one extra line tells us whether a next page exists
+        while not done and len(seen) < want:
+            try:
+                seen.append(await source.__anext__())
+            except StopAsyncIteration:
+                done = True
+        start = page * per_page
+        return seen[start:start + per_page], len(seen) > start + per_page
+
+    return fetch
+
+
+async def aiter_lines(lines: Iterable[str]) -> AsyncIterator[str]:
+    for line in lines:
+        yield line
+
+
+class Paginator(discord.ui.View):
+    """
+    ◀ / ▶ over a listing, fetched and rendered one page at a time.
+
+    `fetch(page)` is only called for the page being shown, and its rendering is
+    cached for PAGE_TTL seconds. With `export`, a 📄 button sends the full listing
+    as a text file (streamed from the export iterator) for when paging isn't enough.
+    """
+
+    def __init__(self, owner_id: int, title: str, fetch: PageFetch, *, total_pages: Optional[int] = None,
+                 export: Optional[Export] = None, export_name: str = "export.txt", empty: str = "Nothing to show.",
+                 timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.title = title
+        self.fetch = fetch
+        self.total_pages = total_pages
+        self.export = export
+        self.export_name = export_name
+        self.empty = empty
+        self.page = 0
+        self._pages: TTLCache[Tuple[str, bool]] = TTLCache(PAGE_TTL, maxsize=32)
+        if export is None:
+            self.remove_item(self.export_file)
+
+    async def render(self, page: int) -> Tuple[str, bool]:
+        cached = self._pages.get(page)
+        if cached is not None:
+            return cached
+        lines, has_next = await self.fetch(page)
+        if not lines:
+            out = (self.empty if page == 0 else f"**{self.title}**\nNo more entries."), False
+        else:
+            of = f"/{self.total_pages}" if self.total_pages else ""
+            body = "\n".join(lines)
+            head = f"**{self.title}** · page {page + 1}{of}\n"
+            if len(head) + len(body) > MAX_MESSAGE:
+                body = body[:MAX_MESSAGE - len(head) - 1] + "…"
+            out = head + body, has_next
+        self._pages.set(page, out)
+        return out
+
+    def _sync_buttons(self, has_next: bool):
+        self.prev_page.disabled = self.page <= 0
+        self.next_page.disabled = not has_next
+
+    async def start(self, interaction: discord.Interaction, *, ephemeral: bool = True):
+        """Send the first page (as a followup if the interaction was already deferred)."""
+        content, has_next = await self.render(0)
+        self._sync_buttons(has_next)
+        view = self if has_next or self.export is not None else discord.utils.MISSING
+        if interaction.response.is_done():
+            await interaction.followup.send(content, view=view, ephemeral=ephemeral)
+        else:
+            await interaction.response.send_message(content, view=view, ephemeral=ephemeral)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.owner_id
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        content, has_next = await self.render(page)
+        self.page = page
+        self._sync_buttons(has_next)
+        await interaction.response.edit_message(content=content, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, max(0, self.page - 1))
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    @discord.ui.button(label="📄 Export", style=discord.ButtonStyle.secondary)
+    async def export_file(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        limit = interaction.guild.filesize_limit if interaction.guild else 10 * 1024 * 1024
+        buf = io.BytesIO()
+        async for line in self.export():
+            buf.write(line.encode("utf-8") + b"\n")
+            if buf.tell() > limit:
+                await interaction.followup.send("❌ The full listing is over this server's upload limit.", ephemeral=True)
+                return
+        buf.seek(0)
+        await interaction.followup.send(file=discord.File(buf, filename=self.export_name), ephemeral=True)
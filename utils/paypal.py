@@ -0,0 +1,179 @@
+# utils/paypal.py
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+import config
+from utils.tokens import TokenError, TokenManager
+
+logger = logging.getLogger("bot")
+
+OAUTH_URL = getattr(config, "PAYPAL_OAUTH_URL", "https://api-m.paypal.com/v1/oauth2/token")
+INVOICE_URL = getattr(config, "PAYPAL_INVOICE_URL", "https://api-m.paypal.com/v2/invoicing/invoices")
+CURRENCY = getattr(config, "PAYPAL_CURRENCY", "USD")
+# Refresh the OAuth token this long before PayPal says it expires.
+TOKEN_REFRESH_MARGIN = getattr(config, "PAYPAL_TOKEN_REFRESH_MARGIN", 300)
+# Max PayPal requests in flight during a status sync.
+MAX_CONCURRENCY = getattr(config, "PAYPAL_MAX_CONCURRENCY", 4)
+PAGE_SIZE = 100  # PayPal's maximum for the invoice list endpoint
+MAX_RETRIES = 3
+
+# Invoice states after which PayPal won't change anything on its own.
+FINAL_STATUSES = {"PAID", "MARKED_AS_PAID", "CANCELLED", "REFUNDED", "MARKED_AS_REFUNDED"}
+
+
+class PayPalError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"PayPal HTTP {status}: {message}")
+        self.status = status
+
+
+def configured() -> bool:
+    return bool((getattr(config, "PAYPAL_CLIENT_ID", "") or "").strip()
+                and (getattr(config, "PAYPAL_SECRET", "") or "").strip())
+
+
+class PayPalClient:
+    """
+    Minimal async client for PayPal Invoicing v2.
+
+    One aiohttp session, an OAuth token kept warm by a TokenManager, and 429/5xx
+    retries honouring Retry-After.
+    """
+
+    def __init__(self, client_id: Optional[str] = None, secret: Optional[str] = None,
+                 max_concurrency: int = MAX_CONCURRENCY):
+        self.client_id = client_id if client_id is not None else getattr(config, "PAYPAL_CLIENT_ID", "")
+        self.secret = secret if secret is not None else getattr(config, "PAYPAL_SECRET", "")
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.tokens = TokenManager("paypal", self._fetch_token, refresh_margin=TOKEN_REFRESH_MARGIN)
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self.requests = 0
+        self.retries = 0
+
+    async def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+
+    async def close(self):
+        self.tokens.close()
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    # ===== AUTH =====
+    async def _fetch_token(self) -> Tuple[str, float]:
+        """Raw client-credentials call; TokenManager handles caching, single-flight and retries."""
+        await self._ensure_session()
+        self.requests += 1
+        async with self._session.post(
+            OAUTH_URL,
+            data={"grant_type": "client_credentials"},
+            auth=aiohttp.BasicAuth(self.client_id, self.secret),
+            headers={"Accept": "application/json"},
+        ) as resp:
+            if resp.status != 200:
+                raise PayPalError(resp.status, "token request failed")
+            data = await resp.json()
+        return data["access_token"], data.get("expires_in", 0)
+
+    async def _get_token(self) -> str:
+        try:
+            return await self.tokens.get()
+        except TokenError as e:
+            raise PayPalError(0, str(e)) from e
+
+    # ===== HTTP =====
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        await self._ensure_session()
+        for attempt in range(MAX_RETRIES + 1):
+            token = await self._get_token()
+            headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json",
+                       "Prefer": "return=representation"}
+            self.requests += 1
+            async with self._session.request(method, url, headers=headers, **kwargs) as resp:
+                if resp.status == 401 and attempt < MAX_RETRIES:
+                    self.tokens.invalidate()  # revoked/expired early; fetch a new one
+                    continue
+                if (resp.status == 429 or resp.status >= 500) and attempt < MAX_RETRIES:
+                    self.retries += 1
+                    delay = float(resp.headers.get("Retry-After") or 2 ** attempt)
+                    await asyncio.sleep(min(delay, 30))
+                    continue
+                if resp.status >= 400:
+                    raise PayPalError(resp.status, (await resp.text())[:200])
+                if resp.status == 204:
+                    return {}
+                return await resp.json(content_type=None) or {}
+        raise PayPalError(0, "retries exhausted")
+
+    # ===== INVOICES =====
+    async def create_invoice(self, order, amount: str, currency: str = CURRENCY, note: Optional[str] = None) -> dict:
+        """Create and send (as a shareable link) an invoice for `order`. Returns {"id", "status", "url"}."""
+        body = {
+            "detail": {
+                "currency_code": currency,
+                "reference": f"Order #{order.id}",
+                "note": note or (order.notes or "")[:4000],
+            },
+            "items": [{
+                "name": (order.title or f"Commission #{order.id}")[:200],
+                "quantity": "1",
+                "unit_amount": {"currency_code": currency, "value": amount},
+            }],
+        }
+        invoice = await self._request("POST", INVOICE_URL, json=body)
+        invoice_id = invoice["id"]
+        # No recipient email on file, so send without emailing and hand out the payer link instead.
+        sent = await self._request("POST", f"{INVOICE_URL}/{invoice_id}/send", json={"send_to_recipient": False})
+        url = sent.get("href") or invoice.get("detail", {}).get("metadata", {}).get("recipient_view_url")
+        return {"id": invoice_id, "status": invoice.get("status", "DRAFT"), "url": url}
+
+    async def get_status(self, invoice_id: str) -> Optional[str]:
+        async with self._sem:
+            try:
+                invoice = await self._request("GET", f"{INVOICE_URL}/{invoice_id}")
+            except PayPalError as e:
+                if e.status == 404:
+                    return None
+                raise
+        return invoice.get("status")
+
+    async def _list_page(self, page: int) -> dict:
+        async with self._sem:
+            return await self._request(
+                "GET", INVOICE_URL,
+                params={"page": page, "page_size": PAGE_SIZE, "total_required": "true"},
+            )
+
+    async def fetch_statuses(self, invoice_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Current status for each invoice id.
+
+        A handful of ids are fetched one by one; larger sets page through the invoice
+        list (PAGE_SIZE per request, pages fetched concurrently) and only fall back to
+        single lookups for ids the list didn't contain.
+        """
+        wanted = set(invoice_ids)
+        found: Dict[str, str] = {}
+        if len(wanted) > PAGE_SIZE // 4:
+            first = await self._list_page(1)
+            pages = [first]
+            total_pages = int(first.get("total_pages") or 1)
+            if total_pages > 1:
+                pages += await asyncio.gather(*(self._list_page(p) for p in range(2, total_pages + 1)))
+            for page in pages:
+                for item in page.get("items", []):
+                    if item.get("id") in wanted:
+                        found[item["id"]] = item.get("status")
+
+        missing: List[str] = [i for i in wanted if i not in found]
+        statuses = await asyncio.gather(*(self.get_status(i) for i in missing))
+        for invoice_id, status in zip(missing, statuses):
+            if status:
+                found[invoice_id] = status
+        return found
+
+    def metrics(self) -> dict:
+        return {"requests": self.requests, "retries": self.retries, "token": self.tokens.metrics()}
@@ -0,0 +1,138 @@
+# utils/perf.py
+import contextlib
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+import config
+
+logger = logging.getLogger("bot")
+
+# Samples kept per handler for percentile maths (older samples roll off).
+HISTOGRAM_WINDOW = 1024
+# Anything slower than this is logged as a slow callback.
+SLOW_CALLBACK_MS = getattr(config, "SLOW_CALLBACK_MS", 1000)
+
+
+class RollingHistogram:
+    """Last N latency samples (ms) plus lifetime count/slow count."""
+
+    __slots__ = ("samples", "count", "slow", "max_ms")
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.slow = 0
+        self.max_ms = 0.0
+
+    def add(self, ms: float, slow_ms: float):
+        self.samples.append(ms)
+        self.count += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if ms >= slow_ms:
+            self.slow += 1
+
+    def percentiles(self, *pcts: float) -> List[float]:
+        if not self.samples:
+            return [0.0 for _ in pcts]
+        s = sorted(self.samples)
+        last = len(s) - 1
+        return [s[min(last, int(round(p / 100.0 * last)))] for p in pcts]
+
+
+class PerfRegistry:
+    """
+    Per-handler latency histograms for listeners, app commands and background tasks.
+    Lives on the bot as bot.perf (see main.py).
+    """
+
+    def __init__(self, slow_ms: float = SLOW_CALLBACK_MS):
+        self.slow_ms = slow_ms
+        self.histograms: Dict[str, RollingHistogram] = {}
+
+    def record(self, name: str, ms: float):
+        h = self.histograms.get(name)
+        if h is None:
+            h = self.histograms[name] = RollingHistogram()
+        h.add(ms, self.slow_ms)
+        if ms >= self.slow_ms:
+            logger.warning(f"🐢 Slow callback: {name} took {ms:.0f} ms")
+
+    @contextlib.asynccontextmanager
+    async def timer(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000)
+
+    def snapshot(self) -> Dict[str, dict]:
+        out = {}
+        for name, h in self.histograms.items():
+            p50, p95, p99 = h.percentiles(50, 95, 99)
+            out[name] = {
+                "count": h.count,
+                "slow": h.slow,
+                "p50_ms": round(p50, 2),
+                "p95_ms": round(p95, 2),
+                "p99_ms": round(p99, 2),
+                "max_ms": round(h.max_ms, 2),
+            }
+        return out
+
+
+# ===== HELPERS =====
+def timer(bot, name: str):
+    """bot.perf.timer(name), or a no-op when the bot isn't instrumented."""
+    perf: Optional[PerfRegistry] = getattr(bot, "perf", None)
+    return perf.timer(name) if perf is not None else contextlib.nullcontext()
+
+
+async def timed_defer(interaction: discord.Interaction, **kwargs):
+    """interaction.response.defer(), stamping the time so completion can report defer→followup latency."""
+    await interaction.response.defer(**kwargs)
+    interaction.extras["perf_deferred_at"] = time.perf_counter()
+
+
+def finish_interaction(interaction: discord.Interaction, failed: bool = False):
+    """Record app command latency from the start stamp set by TimedCommandTree."""
+    perf: Optional[PerfRegistry] = getattr(interaction.client, "perf", None)
+    started = interaction.extras.pop("perf_started_at", None)
+    if perf is None or started is None:
+        return
+    now = time.perf_counter()
+    cmd = interaction.command.qualified_name if interaction.command else "unknown"
+    perf.record(f"command:/{cmd}" + (" (error)" if failed else ""), (now - started) * 1000)
+    deferred = interaction.extras.pop("perf_deferred_at", None)
+    if deferred is not None:
+        perf.record(f"defer→followup:/{cmd}", (now - deferred) * 1000)
+
+
+class TimedCommandTree(app_commands.CommandTree):
+    """CommandTree that stamps every interaction on entry; see finish_interaction()."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["perf_started_at"] = time.perf_counter()
+        return True
+
+
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    finish_interaction(interaction)
+
+
+def format_table(snapshot: Dict[str, dict], limit: int = 25) -> str:
+    """Fixed-width table for /perfstats, slowest p99 first."""
+    rows = sorted(snapshot.items(), key=lambda kv: kv[1]["p99_ms"], reverse=True)[:limit]
+    if not rows:
+        return "No timings recorded yet."
+    width = min(38, max(len(n) for n, _ in rows))
+    lines = [f"{'handler':<{width}} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'slow':>5}"]
+    for name, s in rows:
+        short = name if len(name) <= width else name[: width - 1] + "…"
+        lines.append(f"{short:<{width}} {s['count']:>6} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['slow']:>5}")
+    return "\n".join(lines)
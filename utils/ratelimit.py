@@ -0,0 +1,76 @@
+# utils/ratelimit.py
+import time
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+
+class TokenBuckets:
+    """
+    One token bucket per key: `burst` tokens, refilled at `rate` tokens/second.
+
+    Each key is a single (tokens, stamp) tuple. A bucket that has refilled to full is
+    indistinguishable from a missing one, so such entries are dropped whenever the table
+    grows past `prune_at`; idle keys never accumulate.
+    """
+
+    def __init__(self, rate: float, burst: float, prune_at: int = 1024):
+        self.rate = rate
+        self.burst = burst
+        self.prune_at = prune_at
+        self._buckets: Dict[Hashable, Tuple[float, float]] = {}
+        self.allowed = 0
+        self.limited = 0
+
+    def _level(self, key: Hashable, now: float) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return self.burst
+        tokens, stamp = entry
+        return min(self.burst, tokens + (now - stamp) * self.rate)
+
+    def retry_after(self, key: Hashable, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available for `key` (0.0 = now). Takes nothing."""
+        missing = cost - self._level(key, time.monotonic())
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, key: Hashable, cost: float = 1.0) -> float:
+        """Spend `cost` tokens if available; returns 0.0 on success, else the retry_after."""
+        now = time.monotonic()
+        level = self._level(key, now)
+        if level < cost:
+            self.limited += 1
+            return (cost - level) / self.rate
+        self._buckets[key] = (level - cost, now)
+        self.allowed += 1
+        if len(self._buckets) > self.prune_at:
+            self.prune(now)
+        return 0.0
+
+    def prune(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        full = [k for k in self._buckets if self._level(k, now) >= self.burst]
+        for k in full:
+            del self._buckets[k]
+        return len(full)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def snapshot(self) -> dict:
+        return {"keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+
+def take_all(checks: Iterable[Tuple[TokenBuckets, Hashable]], cost: float = 1.0) -> float:
+    """
+    All-or-nothing take across several buckets (e.g. per-user and per-guild): nothing is
+    spent unless every bucket has room. Returns 0.0 on success, else the longest wait.
+    """
+    checks = list(checks)
+    waits = [b.retry_after(k, cost) for b, k in checks]
+    if any(w > 0 for w in waits):
+        for (b, _), w in zip(checks, waits):
+            if w > 0:
+                b.limited += 1
+        return max(waits)
+    for b, k in checks:
+        b.take(k, cost)
+    return 0.0
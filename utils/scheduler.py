@@ -0,0 +1,222 @@
+# utils/scheduler.py
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from utils import errors, fastjson
+from utils.perf import timer
+
+logger = logging.getLogger("bot")
+
+SCHEDULER_PATH = getattr(config, "SCHEDULER_PATH", os.path.join("data", "scheduler.json"))
+# Longest single sleep; bounds how long a wall-clock jump (suspend/NTP) can delay a job.
+MAX_SLEEP = 60.0
+# A failing job is retried this many times, RETRY_DELAY * attempt seconds apart, then dropped.
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 60.0
+
+Handler = Callable[["Job"], Awaitable[None]]
+
+
+class Job:
+    __slots__ = ("id", "kind", "due", "payload", "key", "attempts", "created_at")
+
+    def __init__(self, kind: str, due: float, payload: dict, key: Optional[str] = None,
+                 id: Optional[str] = None, attempts: int = 0, created_at: Optional[float] = None):
+        self.id = id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.due = due
+        self.payload = payload
+        self.key = key
+        self.attempts = attempts
+        self.created_at = created_at or time.time()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Scheduler:
+    """
+    Persistent one-shot jobs (unbans, unlocks, reminders) driven by one task.
+
+    Jobs sit in a min-heap on their due time and in data/scheduler.json. A single
+    runner sleeps until the earliest job (or until woken by an earlier one), then
+    pops every due job and runs that batch concurrently — after a restart, all
+    jobs missed while offline run together in the first batch.
+
+    Cogs register a handler per job kind; `key` makes a job replaceable (scheduling
+    the same key again, or cancel_key(), drops the previous one).
+    """
+
+    def __init__(self, bot, path: str = SCHEDULER_PATH):
+        self.bot = bot
+        self.path = path
+        self._handlers: Dict[str, Handler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._keys: Dict[str, str] = {}  # key -> job id
+        self._heap: List[Tuple[float, int, str]] = []  # (due, seq, job id); cancelled ids are skipped lazily
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.ran = 0
+        self.failed = 0
+        self.late_max = 0.0
+        self._load()
+
+    # ===== PERSISTENCE =====
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            raw = fastjson.read_file(self.path, default=[]) or []
+        except Exception as e:
+            logger.warning(f"⏰ Couldn't read {self.path} ({e}); starting with no scheduled jobs")
+            raw = []
+        for d in raw:
+            self._add(Job(**d))
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fastjson.write_file(self.path, [j.to_dict() for j in self._jobs.values()],
+                            pretty=getattr(config, "PRETTY_JSON_STORES", False))
+
+    # ===== JOBS =====
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    def _add(self, job: Job):
+        if job.key:
+            old = self._keys.get(job.key)
+            if old:
+                self._jobs.pop(old, None)
+            self._keys[job.key] = job.id
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (job.due, next(self._seq), job.id))
+
+    def schedule(self, kind: str, due: float, payload: dict, key: Optional[str] = None, *, save: bool = True) -> Job:
+        """
+        Run handler `kind` at epoch `due` with `payload` (JSON-serialisable).
+        Bulk callers pass save=False and call save() once at the end; each save rewrites the whole file.
+        """
+        job = Job(kind, due, payload, key)
+        head = self._heap[0][0] if self._heap else None
+        self._add(job)
+        if save:
+            self._save()
+        if head is None or due < head:
+            self._wake.set()
+        return job
+
+    def cancel(self, job_id: str, *, save: bool = True) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        if job.key and self._keys.get(job.key) == job_id:
+            del self._keys[job.key]
+        if save:
+            self._save()
+        return True
+
+    def cancel_key(self, key: str, *, save: bool = True) -> bool:
+        job_id = self._keys.get(key)
+        return self.cancel(job_id, save=save) if job_id else False
+
+    def save(self):
+        """Write the job file (after schedule/cancel calls made with save=False)."""
+        self._save()
+
+    def get_key(self, key: str) -> Optional[Job]:
+        job_id = self._keys.get(key)
+        return self._jobs.get(job_id) if job_id else None
+
+    def pending(self, kind: Optional[str] = None) -> List[Job]:
+        return sorted((j for j in self._jobs.values() if kind is None or j.kind == kind), key=lambda j: j.due)
+
+    # ===== RUNNER =====
+    def start(self):
+        """Must be called from inside the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def _pop_due(self, now: float) -> List[Job]:
+        batch = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue  # cancelled or replaced
+            if job.kind not in self._handlers:
+                logger.warning(f"⏰ No handler for scheduled job kind {job.kind!r}; dropping {job.id}")
+                self._forget(job)
+                continue
+            batch.append(job)
+        return batch
+
+    def _forget(self, job: Job):
+        self._jobs.pop(job.id, None)
+        if job.key and self._keys.get(job.key) == job.id:
+            del self._keys[job.key]
+
+    async def _run(self):
+        await self.bot.wait_until_ready()  # handlers need the guild cache
+        while True:
+            while self._heap and self._heap[0][2] not in self._jobs:
+                heapq.heappop(self._heap)  # discard cancelled heads so the sleep targets a live job
+            delay = MAX_SLEEP if not self._heap else min(MAX_SLEEP, self._heap[0][0] - time.time())
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            batch = self._pop_due(time.time())
+            if batch:
+                await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[Job]):
+        now = time.time()
+        for job in batch:
+            self._forget(job)
+        if len(batch) > 1:
+            logger.info(f"⏰ Running {len(batch)} scheduled jobs (up to {now - batch[0].due:.0f}s late)")
+        results = await asyncio.gather(*(self._run_job(j) for j in batch), return_exceptions=True)
+        for job, result in zip(batch, results):
+            self.late_max = max(self.late_max, now - job.due)
+            if isinstance(result, BaseException):
+                self.failed += 1
+                errors.capture(self.bot, result, where=f"scheduler:{job.kind}", guild_id=job.payload.get("guild_id"))
+                if job.attempts + 1 < MAX_ATTEMPTS and not (job.key and job.key in self._keys):
+                    job.attempts += 1
+                    job.due = time.time() + RETRY_DELAY * job.attempts
+                    self._add(job)
+            else:
+                self.ran += 1
+        if batch:
+            self._save()
+
+    async def _run_job(self, job: Job):
+        async with timer(self.bot, f"job:{job.kind}"):
+            await self._handlers[job.kind](job)
+
+    # ===== METRICS =====
+    def snapshot(self) -> dict:
+        head = self.pending()[:1]
+        return {
+            "pending": len(self._jobs),
+            "next_due_in": round(head[0].due - time.time(), 1) if head else None,
+            "ran": self.ran,
+            "failed": self.failed,
+            "max_late_seconds": round(self.late_max, 1),
+        }
+
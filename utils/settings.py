@@ -0,0 +1,332 @@
+# utils/settings.py
+"""
+Runtime settings: guild ids, log channels, role names/maps and a few channel ids.
+
+Loaded from data/settings.json (falling back to the values in config.py when the
+file doesn't exist), validated, and compiled into an immutable Settings snapshot
+with per-guild lookup tables. reload() builds a new snapshot and swaps it in with
+a single assignment, so readers never see a half-applied change; an invalid file
+leaves the previous snapshot in place.
+
+Secrets (tokens, client ids/secrets) stay in config.py.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+import config
+
+logger = logging.getLogger("bot")
+
+SETTINGS_PATH = getattr(config, "SETTINGS_PATH", os.path.join("data", "settings.json"))
+WATCH_INTERVAL = getattr(config, "SETTINGS_WATCH_SECONDS", 2.0)
+
+LOG_KEYS = ("GENERAL", "BOT", "WELCOME")
+
+RoleRef = Union[int, str]  # role id or role name
+
+
+class SettingsError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class GuildSettings:
+    guild_id: int
+    log_channels: Mapping[str, int]
+    roles: Mapping[str, RoleRef]  # e.g. {"AUTO": "Member"} or {"AUTO": 1234}
+
+    def log_channel(self, key: str) -> Optional[int]:
+        return self.log_channels.get(key)
+
+    def role(self, key: str) -> Optional[RoleRef]:
+        return self.roles.get(key)
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    allowed_guilds: FrozenSet[int]
+    super_role: str
+    admin_role: str
+    staff_role: str
+    guilds: Mapping[int, GuildSettings]
+    bot_logs_channel_id: Optional[int]
+    general_logs_channel_id: Optional[int]
+    announcement_channel_id: Optional[int]
+    twitch_username: str
+    stream_role_name: str
+    # Compiled role-name sets for permission checks.
+    admin_roles: FrozenSet[str]
+    staff_roles: FrozenSet[str]
+    source: str
+    loaded_at: float
+
+    def is_allowed(self, guild_id: Optional[int]) -> bool:
+        return guild_id is not None and guild_id in self.allowed_guilds
+
+    def guild(self, guild_id: Optional[int]) -> Optional[GuildSettings]:
+        return self.guilds.get(guild_id) if guild_id is not None else None
+
+    def log_channel(self, guild_id: Optional[int], key: str) -> Optional[int]:
+        g = self.guild(guild_id)
+        return g.log_channels.get(key) if g else None
+
+    def role(self, guild_id: Optional[int], key: str) -> Optional[RoleRef]:
+        g = self.guild(guild_id)
+        return g.roles.get(key) if g else None
+
+
+# ===== RAW -> SNAPSHOT =====
+def _defaults_from_config() -> dict:
+    """The same settings as a raw dict, taken from config.py (first run / no data file)."""
+    guilds: Dict[str, dict] = {}
+    for gid, chans in (getattr(config, "LOG_CHANNELS", {}) or {}).items():
+        guilds.setdefault(str(gid), {})["log_channels"] = dict(chans)
+    for gid, roles in (getattr(config, "ROLE_MAP", {}) or {}).items():
+        guilds.setdefault(str(gid), {})["roles"] = dict(roles)
+    allowed = getattr(config, "ALLOWED_GUILDS", None) or [
+        g for g in (getattr(config, "HUBUBBA_GUILD_ID", None), getattr(config, "PROJECT_INFINITE_ID", None)) if g
+    ]
+    return {
+        "allowed_guilds": list(allowed),
+        "roles": {
+            "super": getattr(config, "SUPER_ROLE_NAME", "Owner"),
+            "admin": getattr(config, "ADMIN_ROLE_NAME", "Admin+ Perms"),
+            "staff": getattr(config, "STAFF_ROLE_NAME", "Staff Perms Role"),
+        },
+        "channels": {
+            "bot_logs": getattr(config, "BOT_LOGS_CHANNEL_ID", None),
+            "general_logs": getattr(config, "GENERAL_LOGS_CHANNEL_ID", None),
+            "announcement": getattr(config, "ANNOUNCEMENT_CHANNEL_ID", None),
+        },
+        "twitch": {
+            "username": getattr(config, "TWITCH_USERNAME", ""),
+            "stream_role": getattr(config, "STREAM_NOTIS_ROLE_NAME", "Stream Notis"),
+        },
+        "guilds": guilds,
+    }
+
+
+def _id(value: Any, where: str, optional: bool = False) -> Optional[int]:
+    if value is None and optional:
+        return None
+    if isinstance(value, (bool, float)):
+        raise SettingsError(f"{where}: expected a Discord id, got {value!r}")
+    try:
+        out = int(value)
+    except (TypeError, ValueError):
+        raise SettingsError(f"{where}: expected a Discord id, got {value!r}")
+    if out <= 0:
+        raise SettingsError(f"{where}: expected a Discord id, got {value!r}")
+    return out
+
+
+def _name(value: Any, where: str) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise SettingsError(f"{where}: expected a non-empty string, got {value!r}")
+    return value.strip()
+
+
+def _section(parent: dict, key: str, kind: type, where: str):
+    """parent[key] (empty when missing/null), or SettingsError unless it is a `kind` (dict or list)."""
+    value = parent.get(key)
+    if value is None:
+        return kind()
+    if not isinstance(value, kind):
+        expected = "an object" if kind is dict else "a list"
+        raise SettingsError(f"{where}: expected {expected}, got {type(value).__name__}")
+    return value
+
+
+def _role_ref(value: Any, where: str) -> RoleRef:
+    # Role ids may be written as numbers; anything else is a role name.
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _id(value, where)
+    return _name(value, where)
+
+
+def compile_settings(raw: dict, source: str) -> Settings:
+    """Validate `raw` and build the immutable snapshot. Raises SettingsError with the offending path."""
+    if not isinstance(raw, dict):
+        raise SettingsError("top level: expected an object")
+    allowed = frozenset(_id(g, f"allowed_guilds[{i}]")
+                        for i, g in enumerate(_section(raw, "allowed_guilds", list, "allowed_guilds")))
+    roles = _section(raw, "roles", dict, "roles")
+    super_role = _name(roles.get("super", "Owner"), "roles.super")
+    admin_role = _name(roles.get("admin", "Admin+ Perms"), "roles.admin")
+    staff_role = _name(roles.get("staff", "Staff Perms Role"), "roles.staff")
+    channels = _section(raw, "channels", dict, "channels")
+    twitch = _section(raw, "twitch", dict, "twitch")
+    for name in ("username", "stream_role"):
+        if twitch.get(name) is not None and not isinstance(twitch[name], str):
+            raise SettingsError(f"twitch.{name}: expected a string, got {twitch[name]!r}")
+
+    guilds: Dict[int, GuildSettings] = {}
+    for key, g in _section(raw, "guilds", dict, "guilds").items():
+        gid = _id(key, f"guilds.{key}")
+        if not isinstance(g, dict):
+            raise SettingsError(f"guilds.{key}: expected an object")
+        log_channels = {}
+        for name, cid in _section(g, "log_channels", dict, f"guilds.{key}.log_channels").items():
+            if name not in LOG_KEYS:
+                raise SettingsError(f"guilds.{key}.log_channels.{name}: unknown key (expected one of {', '.join(LOG_KEYS)})")
+            log_channels[name] = _id(cid, f"guilds.{key}.log_channels.{name}")
+        role_map: Dict[str, RoleRef] = {}
+        for name, ref in _section(g, "roles", dict, f"guilds.{key}.roles").items():
+            role_map[name] = _role_ref(ref, f"guilds.{key}.roles.{name}")
+        guilds[gid] = GuildSettings(gid, MappingProxyType(log_channels), MappingProxyType(role_map))
+
+    return Settings(
+        allowed_guilds=allowed,
+        super_role=super_role,
+        admin_role=admin_role,
+        staff_role=staff_role,
+        guilds=MappingProxyType(guilds),
+        bot_logs_channel_id=_id(channels.get("bot_logs"), "channels.bot_logs", optional=True),
+        general_logs_channel_id=_id(channels.get("general_logs"), "channels.general_logs", optional=True),
+        announcement_channel_id=_id(channels.get("announcement"), "channels.announcement", optional=True),
+        twitch_username=str(twitch.get("username") or "").strip().lower(),
+        stream_role_name=str(twitch.get("stream_role") or "Stream Notis"),
+        admin_roles=frozenset({admin_role}),
+        staff_roles=frozenset({staff_role, admin_role}),
+        source=source,
+        loaded_at=time.time(),
+    )
+
+
+# ===== LOAD / SWAP =====
+_snapshot: Optional[Settings] = None
+_stamp: Optional[Tuple[int, int]] = None
+_reload_listeners: List[Callable[["Settings", "Settings"], None]] = []
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _build(path: str) -> Tuple[Settings, Optional[Tuple[int, int]]]:
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return compile_settings(_defaults_from_config(), "config.py"), None
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            raw = json.load(f)
+        except json.JSONDecodeError as e:
+            raise SettingsError(f"{path}: invalid JSON ({e})")
+        except UnicodeDecodeError as e:
+            raise SettingsError(f"{path}: not UTF-8 ({e})")
+    return compile_settings(raw, path), stamp
+
+
+def current() -> Settings:
+    """The live snapshot (built on first use). Cheap enough to call per event."""
+    global _snapshot, _stamp
+    if _snapshot is None:
+        _snapshot, _stamp = _build(SETTINGS_PATH)
+    return _snapshot
+
+
+def reload(path: Optional[str] = None) -> Settings:
+    """Rebuild from disk and swap atomically. On SettingsError the old snapshot stays live."""
+    global _snapshot, _stamp
+    new, stamp = _build(path or SETTINGS_PATH)
+    old, (_snapshot, _stamp) = _snapshot, (new, stamp)
+    if old is not None:
+        for fn in _reload_listeners:
+            try:
+                fn(old, new)
+            except Exception:
+                logger.exception("⚙️ Settings reload listener failed")
+    return new
+
+
+def install(snapshot: Settings) -> Settings:
+    """Make an already-built snapshot live without reading the file (benchmarks/load tests)."""
+    global _snapshot, _stamp
+    _snapshot, _stamp = snapshot, None
+    return snapshot
+
+
+def add_reload_listener(fn: Callable[[Settings, Settings], None]):
+    """Call fn(old, new) after every successful reload (watcher or /reloadconfig). Must not block."""
+    _reload_listeners.append(fn)
+
+
+def write_current(path: Optional[str] = None):
+    """Write the live snapshot out as a settings file (a starting point for editing)."""
+    s = current()
+    raw = {
+        "allowed_guilds": sorted(s.allowed_guilds),
+        "roles": {"super": s.super_role, "admin": s.admin_role, "staff": s.staff_role},
+        "channels": {"bot_logs": s.bot_logs_channel_id, "general_logs": s.general_logs_channel_id,
+                     "announcement": s.announcement_channel_id},
+        "twitch": {"username": s.twitch_username, "stream_role": s.stream_role_name},
+        "guilds": {str(gid): {"log_channels": dict(g.log_channels), "roles": dict(g.roles)}
+                   for gid, g in s.guilds.items()},
+    }
+    path = path or SETTINGS_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=2)
+    os.replace(tmp, path)
+
+
+def diff(old: Settings, new: Settings) -> list:
+    """Names of top-level settings that differ (for the reload message)."""
+    return [f for f in Settings.__dataclass_fields__ if f not in ("source", "loaded_at") and getattr(old, f) != getattr(new, f)]
+
+
+class SettingsWatcher:
+    """Polls the settings file's mtime/size and reloads when it changes."""
+
+    def __init__(self, interval: float = WATCH_INTERVAL, path: Optional[str] = None):
+        self.interval = interval
+        self.path = path or SETTINGS_PATH
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.errors = 0
+
+    def start(self):
+        """Must be called from inside the running loop."""
+        current()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        last_bad: Optional[Tuple[int, int]] = None
+        while True:
+            await asyncio.sleep(self.interval)
+            stamp = _file_stamp(self.path)
+            if stamp == _stamp or stamp is None or stamp == last_bad:
+                continue
+            old = current()
+            try:
+                new = reload(self.path)
+            except (SettingsError, OSError) as e:
+                last_bad = stamp  # don't re-log the same broken file every tick
+                self.errors += 1
+                logger.warning(f"⚙️ Settings file changed but is invalid; keeping the previous settings: {e}")
+                continue
+            except Exception:
+                # A bug here must not end the watcher for the rest of the process.
+                last_bad = stamp
+                self.errors += 1
+                logger.exception("⚙️ Settings reload failed; keeping the previous settings")
+                continue
+            self.reloads += 1
+            changed = diff(old, new)
+            logger.info(f"⚙️ Settings reloaded from {self.path} ({', '.join(changed) or 'no changes'})")
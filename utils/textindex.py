@@ -0,0 +1,94 @@
+# utils/textindex.py
+import bisect
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+_TOKEN_RE = re.compile(r"[\w$€£.]+", re.UNICODE)
+# Tokens shorter than this are not indexed (a, to, ...); numbers are always kept.
+MIN_TOKEN_LEN = 2
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    out = []
+    for raw in _TOKEN_RE.findall(text.lower()):
+        tok = raw.strip(".")
+        if len(tok) >= MIN_TOKEN_LEN or tok.isdigit():
+            out.append(tok)
+    return out
+
+
+class InvertedIndex:
+    """
+    In-memory token -> doc id postings, maintained incrementally.
+
+    Queries AND all terms; the last term also matches as a prefix so
+    "websi" finds "website" while someone is still typing.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        self._vocab: List[str] = []  # sorted, for prefix lookups
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def clear(self):
+        self._postings.clear()
+        self._doc_tokens.clear()
+        self._vocab.clear()
+
+    def add(self, doc_id: int, texts: Iterable[Optional[str]]):
+        self.remove(doc_id)
+        tokens: Set[str] = set()
+        for text in texts:
+            tokens.update(tokenize(text))
+        self._doc_tokens[doc_id] = tokens
+        for tok in tokens:
+            posting = self._postings.get(tok)
+            if posting is None:
+                posting = self._postings[tok] = set()
+                bisect.insort(self._vocab, tok)
+            posting.add(doc_id)
+
+    def remove(self, doc_id: int):
+        tokens = self._doc_tokens.pop(doc_id, None)
+        if not tokens:
+            return
+        for tok in tokens:
+            posting = self._postings.get(tok)
+            if posting is None:
+                continue
+            posting.discard(doc_id)
+            if not posting:
+                del self._postings[tok]
+                i = bisect.bisect_left(self._vocab, tok)
+                if i < len(self._vocab) and self._vocab[i] == tok:
+                    del self._vocab[i]
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        out: Set[int] = set()
+        i = bisect.bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            out |= self._postings[self._vocab[i]]
+            i += 1
+        return out
+
+    def search(self, query: str) -> Set[int]:
+        terms = tokenize(query)
+        if not terms:
+            return set()
+        # Rarest exact terms first keeps the intersections small.
+        exact = sorted(terms[:-1], key=lambda t: len(self._postings.get(t, ())))
+        result: Optional[Set[int]] = None
+        for term in exact:
+            posting = self._postings.get(term)
+            if not posting:
+                return set()
+            result = set(posting) if result is None else result & posting
+            if not result:
+                return set()
+        last = self._prefix_matches(terms[-1])
+        return last if result is None else result & last
@@ -0,0 +1,175 @@
+# utils/tokens.py
+import asyncio
+import logging
+import random
+import time
+import weakref
+from typing import Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger("bot")
+
+# Refresh this long before the provider's stated expiry.
+REFRESH_MARGIN = 300
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+# Assumed lifetime when the provider doesn't say (expires_in missing or 0).
+DEFAULT_LIFETIME = 3600.0
+
+# (access_token, expires_in_seconds)
+Fetcher = Callable[[], Awaitable[Tuple[str, float]]]
+
+_managers: "weakref.WeakSet[TokenManager]" = weakref.WeakSet()
+
+
+class TokenError(Exception):
+    pass
+
+
+def _retrieve(task: asyncio.Task):
+    # Every caller may have been cancelled before a failed refresh finished; don't warn about it.
+    if not task.cancelled():
+        task.exception()
+
+
+class TokenManager:
+    """
+    OAuth client-credentials token shared by every caller of one API.
+
+    - get() returns the cached token; if it is missing or inside the refresh margin,
+      callers wait on a single in-flight refresh instead of each hitting the endpoint.
+    - Once a token exists, a background task refreshes it `refresh_margin` seconds
+      before expiry so the poll/request path normally never waits.
+    - Failed refreshes retry with exponential backoff + jitter.
+
+    `fetch` does the actual HTTP call and returns (token, expires_in); raising
+    aborts that attempt.
+    """
+
+    def __init__(self, name: str, fetch: Fetcher, refresh_margin: float = REFRESH_MARGIN,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.name = name
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.max_attempts = max_attempts
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._issued_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.proactive_refreshes = 0
+        self.failures = 0
+        self.coalesced = 0
+        self.last_error: Optional[str] = None
+        _managers.add(self)
+
+    # ===== STATE =====
+    def _fresh(self) -> bool:
+        return self._token is not None and time.time() < self._refresh_at
+
+    def invalidate(self):
+        """Drop the cached token (e.g. after a 401); the next get() refreshes."""
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+
+    # ===== ACCESS =====
+    async def get(self) -> str:
+        if self._fresh():
+            return self._token  # type: ignore[return-value]
+        return await self.refresh()
+
+    async def refresh(self) -> str:
+        """Refresh now, or join the refresh already in flight."""
+        task = self._inflight
+        if task is not None and not task.done():
+            self.coalesced += 1
+        else:
+            # Its own task: a caller being cancelled (e.g. a handler timeout) must not abort
+            # the refresh the other callers are waiting on.
+            task = self._inflight = asyncio.get_running_loop().create_task(self._run_refresh())
+            task.add_done_callback(_retrieve)
+        return await asyncio.shield(task)
+
+    async def _run_refresh(self) -> str:
+        try:
+            return await self._refresh_with_backoff()
+        finally:
+            self._ensure_background()
+
+    async def _refresh_with_backoff(self) -> str:
+        delay = BACKOFF_BASE
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                token, expires_in = await self.fetch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                if attempt == self.max_attempts:
+                    raise TokenError(f"{self.name} token refresh failed after {attempt} attempts: {e}") from e
+                sleep_for = min(BACKOFF_MAX, delay) * random.uniform(0.5, 1.0)
+                logger.warning(f"🔐 {self.name} token refresh failed ({e}); retrying in {sleep_for:.1f}s")
+                await asyncio.sleep(sleep_for)
+                delay *= 2
+                continue
+            now = time.time()
+            lifetime = float(expires_in or 0) or DEFAULT_LIFETIME
+            self._token = token
+            self._issued_at = now
+            self._expires_at = now + lifetime
+            # Short-lived tokens: refresh at half-life rather than spinning inside the margin.
+            self._refresh_at = now + max(lifetime - self.refresh_margin, lifetime / 2)
+            self.refreshes += 1
+            self.last_error = None
+            logger.info(f"🔐 {self.name} token refreshed (valid {int(lifetime)}s)")
+            return token
+        raise TokenError(f"{self.name} token refresh failed")  # pragma: no cover - loop always returns/raises
+
+    # ===== BACKGROUND =====
+    def _ensure_background(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._proactive_loop())
+
+    async def _proactive_loop(self):
+        while True:
+            wait = self._refresh_at - time.time()
+            if self._token is None:
+                return  # nothing to keep warm until someone asks again
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await self.refresh()
+                self.proactive_refreshes += 1
+            except TokenError as e:
+                logger.warning(f"🔐 {e}")
+                self.invalidate()
+                return
+
+    def close(self):
+        for task in (self._task, self._inflight):
+            if task:
+                task.cancel()
+
+    # ===== METRICS =====
+    def metrics(self) -> dict:
+        now = time.time()
+        return {
+            "has_token": self._token is not None,
+            "age_seconds": round(now - self._issued_at, 1) if self._issued_at else None,
+            "expires_in_seconds": round(self._expires_at - now, 1) if self._token else None,
+            "refreshes": self.refreshes,
+            "proactive_refreshes": self.proactive_refreshes,
+            "failures": self.failures,
+            "coalesced_waiters": self.coalesced,
+            "last_error": self.last_error,
+        }
+
+
+def all_metrics() -> dict:
+    """Metrics for every live TokenManager, keyed by name."""
+    return {m.name: m.metrics() for m in list(_managers)}
@@ -0,0 +1,78 @@
+# utils/ttlcache.py
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """
+    Small LRU cache whose entries expire `ttl` seconds after they were stored.
+
+    `None` is a valid cached value (use it to remember "doesn't exist" answers);
+    get() returns `default` only for absent or expired keys.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def _lookup(self, key: Hashable):
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        value = self._lookup(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def missing(self, keys: Iterable[Hashable]) -> List[Hashable]:
+        """Keys (deduplicated, in order) that are absent or expired."""
+        seen = set()
+        out = []
+        for key in keys:
+            if key not in seen and self._lookup(key) is _MISSING:
+                out.append(key)
+            seen.add(key)
+        return out
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[V]]:
+        return {k: self.get(k) for k in keys}
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
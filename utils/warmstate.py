@@ -0,0 +1,110 @@
+# utils/warmstate.py
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+import config
+from utils import fastjson
+
+logger = logging.getLogger("bot")
+
+WARMSTATE_PATH = getattr(config, "WARMSTATE_PATH", os.path.join("data", "warmstate.json"))
+SAVE_INTERVAL = getattr(config, "WARMSTATE_SAVE_SECONDS", 300)
+# Sections older than this are ignored at boot (a long outage means the world has moved on).
+MAX_AGE = getattr(config, "WARMSTATE_MAX_AGE_SECONDS", 6 * 3600)
+
+
+def tree_fingerprint(tree, guild, application_id: Optional[int]) -> str:
+    """Hash of the payload tree.sync(guild=...) would send; equal hashes mean the sync is a no-op."""
+    payload = sorted((cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)), key=lambda c: (c.get("type", 1), c["name"]))
+    return hashlib.sha256(fastjson.dumps([application_id, payload])).hexdigest()
+
+
+class WarmState:
+    """
+    Runtime state carried across restarts in data/warmstate.json.
+
+    Components register a named provider (a function returning something
+    JSON-serialisable); save() collects them all and writes the file atomically.
+    It runs every SAVE_INTERVAL seconds and once more on graceful shutdown. At
+    boot, section(name) hands back what the previous run saved, unless it is
+    older than MAX_AGE.
+    """
+
+    def __init__(self, path: str = WARMSTATE_PATH, interval: float = SAVE_INTERVAL, max_age: float = MAX_AGE):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self._providers: Dict[str, Callable[[], Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.saved_at: Optional[float] = None
+        self.saves = 0
+        self._loaded = self._load()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            raw = fastjson.read_file(self.path, default={}) or {}
+        except Exception as e:
+            logger.warning(f"♨️ Couldn't read {self.path} ({e}); cold start")
+            return {}
+        age = time.time() - raw.get("saved_at", 0)
+        if age > self.max_age:
+            logger.info(f"♨️ Warm state is {age / 3600:.1f}h old; cold start")
+            return {}
+        logger.info(f"♨️ Warm state from {age:.0f}s ago: {', '.join(sorted(raw.get('sections', {}))) or 'empty'}")
+        return raw.get("sections", {})
+
+    # ===== SECTIONS =====
+    def register(self, name: str, provider: Callable[[], Any]):
+        self._providers[name] = provider
+
+    def unregister(self, name: str):
+        self._providers.pop(name, None)
+
+    def section(self, name: str, default: Any = None) -> Any:
+        """What the previous run saved under `name` (default when absent or stale)."""
+        return self._loaded.get(name, default)
+
+    # ===== SAVING =====
+    def save(self):
+        sections = dict(self._loaded)  # keep sections whose owner hasn't registered this run
+        for name, provider in self._providers.items():
+            try:
+                sections[name] = provider()
+            except Exception as e:
+                logger.warning(f"♨️ Warm state section {name!r} failed: {e}")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.saved_at = time.time()
+        fastjson.write_file(self.path, {"saved_at": self.saved_at, "sections": sections},
+                            pretty=getattr(config, "PRETTY_JSON_STORES", False))
+        self._loaded = sections
+        self.saves += 1
+
+    def start(self):
+        """Must be called from inside the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"♨️ Couldn't write {self.path}: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "sections": sorted(self._providers),
+            "saves": self.saves,
+            "saved_ago": round(time.time() - self.saved_at, 1) if self.saved_at else None,
+        }